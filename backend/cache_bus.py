@@ -0,0 +1,135 @@
+# Cross-worker invalidation bus for the catalog cache
+#
+# Each uvicorn worker keeps its own CatalogCache. Writers increment a shared
+# version document in MongoDB (db.cache_versions, id "catalog"); every worker
+# follows that document and adopts its counters, which drops entries built
+# from older data. Two ways of following it:
+#
+#   poll          read the document every CACHE_BUS_POLL_INTERVAL seconds
+#                 (default). Works on any deployment; staleness is bounded
+#                 by the interval.
+#   changestream  watch the collection with a change stream. Needs a replica
+#                 set; falls back to polling if the server rejects it.
+#
+# To try the change stream mode locally, start a single-node replica set:
+#
+#   mongod --replSet rs0 --dbpath /tmp/rs0 --port 27017
+#   mongosh --eval 'rs.initiate()'
+#   MONGO_URL=mongodb://localhost:27017/?replicaSet=rs0 CACHE_BUS_MODE=changestream \
+#       uvicorn server:app --workers 4 --port 8001
+
+import asyncio
+import logging
+import uuid
+from typing import Dict, Optional
+
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError, OperationFailure, PyMongoError
+
+from catalog_cache import CatalogCache
+
+logger = logging.getLogger(__name__)
+
+VERSION_DOC_ID = "catalog"
+
+
+class CacheInvalidationBus:
+    def __init__(self, db, cache: CatalogCache, mode: str = "poll", poll_interval: float = 1.0):
+        self.db = db
+        self.cache = cache
+        self.mode = mode
+        self.poll_interval = poll_interval
+        self._task: Optional[asyncio.Task] = None
+
+    @property
+    def enabled(self) -> bool:
+        return self.mode != "off"
+
+    async def publish(self, *collections: str):
+        """Announce a write to the given collections to every worker
+
+        The local cache is invalidated first, so this worker is consistent even
+        if the shared document cannot be updated.
+        """
+        self.cache.bump(*collections)
+        if not self.enabled:
+            return
+        names = [name for name in collections if name in self.cache.versions]
+        if not names:
+            return
+        try:
+            doc = await self._upsert_version_doc({"$inc": {f"versions.{name}": 1 for name in names}})
+            self._adopt(doc)
+        except PyMongoError as e:
+            logger.warning(f"Cache bus publish failed, other workers may serve stale data: {e}")
+
+    async def sync(self):
+        """Adopt the shared versions once, creating the document if needed"""
+        doc = await self._upsert_version_doc({})
+        self._adopt(doc)
+
+    async def _upsert_version_doc(self, update: Dict) -> Optional[Dict]:
+        update = {**update, "$setOnInsert": {"epoch": uuid.uuid4().hex[:8]}}
+        try:
+            return await self.db.cache_versions.find_one_and_update(
+                {"id": VERSION_DOC_ID}, update, projection={"_id": 0},
+                upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # Another worker created the document first; it exists now
+            return await self.db.cache_versions.find_one_and_update(
+                {"id": VERSION_DOC_ID}, update, projection={"_id": 0},
+                return_document=ReturnDocument.AFTER
+            )
+
+    def _adopt(self, doc: Optional[Dict]):
+        if doc and doc.get("epoch"):
+            self.cache.adopt(doc.get("versions") or {}, doc["epoch"])
+
+    async def start(self):
+        if not self.enabled or self._task is not None:
+            return
+        try:
+            # Relies on the unique index on cache_versions.id (indexes.py)
+            # to keep concurrent upserts down to one document
+            await self.sync()
+        except PyMongoError as e:
+            logger.warning(f"Cache bus initial sync failed: {e}")
+        loop = self._watch_loop() if self.mode == "changestream" else self._poll_loop()
+        self._task = asyncio.create_task(loop)
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _poll_loop(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                doc = await self.db.cache_versions.find_one({"id": VERSION_DOC_ID}, {"_id": 0})
+                self._adopt(doc)
+            except PyMongoError as e:
+                logger.warning(f"Cache bus poll failed: {e}")
+
+    async def _watch_loop(self):
+        pipeline = [{"$match": {"fullDocument.id": VERSION_DOC_ID}}]
+        while True:
+            try:
+                async with self.db.cache_versions.watch(pipeline, full_document="updateLookup") as stream:
+                    # Catch up on anything written before the stream opened
+                    await self.sync()
+                    async for change in stream:
+                        self._adopt(change.get("fullDocument"))
+            except OperationFailure as e:
+                # Standalone servers reject change streams; poll instead
+                logger.warning(f"Cache bus change stream unavailable, falling back to polling: {e}")
+                await self._poll_loop()
+            except PyMongoError as e:
+                logger.warning(f"Cache bus change stream interrupted, reopening: {e}")
+                await asyncio.sleep(self.poll_interval)
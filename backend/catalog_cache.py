@@ -0,0 +1,133 @@
+# Read-through cache for DryFruto catalog data
+#
+# Every entry remembers the version of each collection it was built from.
+# Admin writes bump those versions, so a reader never gets data older than
+# the last write it could have observed. TTL and size bounds keep memory
+# predictable; hit/miss counters are exposed through stats().
+
+import asyncio
+import time
+import uuid
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Iterable, Tuple
+
+
+class CatalogCache:
+    def __init__(self, collections: Iterable[str], ttl_seconds: float = 300, max_entries: int = 256):
+        self.versions: Dict[str, int] = {name: 0 for name in collections}
+        # Identifies the lineage of the version counters; replaced when the
+        # counters are adopted from a shared source (see cache_bus.py)
+        self.epoch = uuid.uuid4().hex[:8]
+        # The shared epoch last adopted; epoch carries a local suffix after a regression
+        self.source_epoch = self.epoch
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        # key -> (dependency versions, expires_at, value)
+        self._entries: "OrderedDict[str, Tuple[Tuple[int, ...], float, Any]]" = OrderedDict()
+        # key -> (dependency versions, in-flight load)
+        self._pending: Dict[str, Tuple[Tuple[int, ...], asyncio.Task]] = {}
+        # Bumped by every reset; a load started before one must not store its result
+        self._generation = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def bump(self, *collections: str):
+        """Mark collections as changed; entries built from them become stale"""
+        for name in collections:
+            if name in self.versions:
+                self.versions[name] += 1
+
+    def adopt(self, versions: Dict[str, int], epoch: str):
+        """Take over version counters published by another process
+
+        Counters only move forward within an epoch. If they would move back,
+        or the epoch changes, every entry is dropped so none can be mistaken
+        for fresh. Counters that moved back will repeat values this process
+        already used for other states, so its epoch gets a new local suffix.
+        """
+        regressed = any(versions.get(name, 0) < current for name, current in self.versions.items())
+        if epoch != self.source_epoch or regressed:
+            self.clear()
+            self.epoch = f"{epoch}.{uuid.uuid4().hex[:4]}" if epoch == self.source_epoch else epoch
+            self.source_epoch = epoch
+        for name in self.versions:
+            self.versions[name] = versions.get(name, 0)
+
+    def snapshot(self, deps: Iterable[str]) -> Tuple[int, ...]:
+        """Current versions of the given collections"""
+        return tuple(self.versions[name] for name in deps)
+
+    def get(self, key: str, deps: Tuple[str, ...]):
+        """Return (True, value) for a fresh entry, (False, None) otherwise"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            versions, expires_at, value = entry
+            if versions == self.snapshot(deps) and expires_at > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return True, value
+            del self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: str, versions: Tuple[int, ...], value: Any):
+        self._entries[key] = (versions, time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+    async def get_or_load(self, key: str, deps: Tuple[str, ...], loader: Callable[[], Awaitable[Any]]) -> Any:
+        """Return the cached value for key, calling loader on a miss
+
+        Concurrent misses for the same key share a single load.
+        """
+        found, value = self.get(key, deps)
+        if found:
+            return value
+        versions = self.snapshot(deps)
+        pending = self._pending.get(key)
+        # A load started before the latest write cannot be shared
+        if pending is not None and pending[0] == versions:
+            task = pending[1]
+        else:
+            task = asyncio.ensure_future(self._load(key, versions, self._generation, loader))
+            self._pending[key] = (versions, task)
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    async def _load(self, key: str, versions: Tuple[int, ...], generation: int, loader: Callable[[], Awaitable[Any]]) -> Any:
+        # Versions are captured before loading; a write during the load
+        # leaves the entry tagged with old versions so it is never served.
+        # After a reset the same versions may name another state, so the
+        # result is only stored if no reset happened since it was scheduled.
+        value = await loader()
+        if generation == self._generation:
+            self.put(key, versions, value)
+        return value
+
+    def _forget(self, key: str, task: asyncio.Task):
+        pending = self._pending.get(key)
+        if pending is not None and pending[1] is task:
+            del self._pending[key]
+
+    def clear(self):
+        """Drop every entry, and stop in-flight loads from being joined or stored"""
+        self._entries.clear()
+        self._pending.clear()
+        self._generation += 1
+
+    def stats(self) -> dict:
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hitRatio": round(self.hits / total, 4) if total else 0.0,
+            "epoch": self.epoch,
+            "versions": dict(self.versions),
+        }
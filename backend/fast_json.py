@@ -0,0 +1,119 @@
+# Fast JSON responses for DryFruto read routes
+#
+# Catalog documents are validated by the *Create/*Update models when they
+# are written. Read routes still declare response_model for the OpenAPI
+# schema, but return FastJSONResponse so FastAPI skips revalidating and
+# re-serializing every stored document. model_projection() and
+# apply_defaults() keep the output shaped like the model: only declared
+# fields are read, and missing fields get their defaults.
+#
+# compress() produces the gzip or brotli variant of an encoded body, so
+# callers can cache compressed bytes next to the plain ones.
+#
+# orjson and brotli are used when installed; without them the stdlib JSON
+# encoder is used and only gzip is offered.
+
+import copy
+import gzip
+import json
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Type
+
+from pydantic import BaseModel
+from starlette.responses import Response
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+# Bodies smaller than this are not worth compressing
+MIN_COMPRESS_SIZE = 512
+
+
+def dumps(obj: Any) -> bytes:
+    """Encode obj as compact UTF-8 JSON"""
+    if orjson is not None:
+        return orjson.dumps(obj, default=str)
+    return json.dumps(obj, ensure_ascii=False, separators=(",", ":"), default=str).encode("utf-8")
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred content coding we can produce for an Accept-Encoding header"""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[coding.strip()] = quality
+    for coding in ("br", "gzip"):
+        if coding == "br" and brotli is None:
+            continue
+        if accepted.get(coding, accepted.get("*", 0.0)) > 0:
+            return coding
+    return None
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=9)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        # Pre-encoded bodies (e.g. from the catalog cache) pass straight through
+        if isinstance(content, bytes):
+            return content
+        return dumps(content)
+
+
+@lru_cache(maxsize=None)
+def _field_names(model: Type[BaseModel]) -> tuple:
+    return tuple(model.model_fields)
+
+
+@lru_cache(maxsize=None)
+def _defaults(model: Type[BaseModel]) -> Dict[str, Any]:
+    # Fields with a default_factory (generated ids, timestamps) are left out:
+    # a stored document always has them
+    return {
+        name: field.default
+        for name, field in model.model_fields.items()
+        if not field.is_required() and field.default_factory is None
+    }
+
+
+def model_projection(model: Type[BaseModel]) -> Dict[str, int]:
+    """MongoDB projection returning only the fields the model declares"""
+    return {"_id": 0, **{name: 1 for name in _field_names(model)}}
+
+
+def apply_defaults(model: Type[BaseModel], doc: Dict[str, Any]) -> Dict[str, Any]:
+    """Fill fields missing from a stored document with the model defaults"""
+    missing = [name for name in _defaults(model) if name not in doc]
+    if not missing:
+        return doc
+    defaults = _defaults(model)
+    # Mutable defaults are copied so callers can't alter the shared ones
+    return {**{name: copy.copy(defaults[name]) for name in missing}, **doc}
+
+
+def dump_documents(model: Type[BaseModel], docs: Iterable[Dict[str, Any]]) -> bytes:
+    return dumps(shape_documents(model, docs))
+
+
+def shape_documents(model: Type[BaseModel], docs: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    return [apply_defaults(model, doc) for doc in docs]
@@ -0,0 +1,192 @@
+# Conditional and ranged responses for files served from disk
+#
+# Starlette's FileResponse (0.37) sends neither ETag-based 304s nor partial
+# content, so every image request re-downloads the whole file. serve_file()
+# adds strong ETags, Last-Modified, If-None-Match / If-Modified-Since
+# revalidation, single byte ranges (with If-Range) and a Cache-Control
+# policy chosen by the caller. Small files are kept in HotFileCache, an
+# in-memory LRU, so the most requested images skip disk I/O entirely.
+
+import asyncio
+import mimetypes
+import os
+import re
+from collections import OrderedDict
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import AsyncIterator, Dict, Optional, Tuple
+
+from starlette.requests import Request
+from starlette.responses import Response, StreamingResponse
+
+READ_CHUNK_SIZE = 64 * 1024
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+class HotFileCache:
+    """LRU of small file bodies keyed on path, size and modification time"""
+
+    def __init__(self, max_bytes: int = 32 * 1024 * 1024, max_file_size: int = 512 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self._entries: "OrderedDict[Tuple[str, int, int], bytes]" = OrderedDict()
+        self._total = 0
+        self.hits = 0
+        self.misses = 0
+
+    def accepts(self, size: int) -> bool:
+        return 0 < size <= self.max_file_size and self.max_bytes > 0
+
+    def get(self, key: Tuple[str, int, int]) -> Optional[bytes]:
+        body = self._entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key: Tuple[str, int, int], body: bytes):
+        old = self._entries.pop(key, None)
+        if old is not None:
+            self._total -= len(old)
+        self._entries[key] = body
+        self._total += len(body)
+        while self._total > self.max_bytes and self._entries:
+            _, evicted = self._entries.popitem(last=False)
+            self._total -= len(evicted)
+
+    def stats(self) -> Dict:
+        return {
+            "entries": len(self._entries),
+            "bytes": self._total,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
+
+
+def etag_matches(header: str, etag: str) -> bool:
+    """If-None-Match comparison (weak, as RFC 9110 requires for it)"""
+    if header.strip() == "*":
+        return True
+    bare = etag[2:] if etag.startswith("W/") else etag
+    for candidate in header.split(","):
+        candidate = candidate.strip()
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == bare:
+            return True
+    return False
+
+
+def _not_modified(request: Request, etag: str, mtime: float) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        return etag_matches(if_none_match, etag)
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def _byte_range(request: Request, etag: str, last_modified: str, size: int) -> Optional[Tuple[int, int]]:
+    """(start, end inclusive) of a satisfiable single range, None to send everything
+
+    Raises ValueError when the range cannot be satisfied.
+    """
+    header = request.headers.get("range")
+    if not header:
+        return None
+    if_range = request.headers.get("if-range")
+    # If-Range only holds for a strong, exact validator
+    if if_range is not None and if_range.strip() not in (etag, last_modified):
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if not match:
+        # Multiple or malformed ranges; a full response is always allowed
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        length = int(last)
+        if length == 0:
+            raise ValueError("empty suffix range")
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start >= size or (last and int(last) < start):
+        raise ValueError("range not satisfiable")
+    return start, end
+
+
+async def _read_range(path: Path, start: int, end: int) -> AsyncIterator[bytes]:
+    handle = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(handle.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(handle.read, min(READ_CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(handle.close)
+
+
+async def serve_file(
+    request: Request,
+    path: Path,
+    media_type: Optional[str] = None,
+    cache_control: str = "public, max-age=86400",
+    etag: Optional[str] = None,
+    cache: Optional[HotFileCache] = None
+) -> Response:
+    """Respond with a file, honouring conditional and range request headers
+
+    etag defaults to one built from the file's size and modification time;
+    callers that know a content hash should pass it instead.
+    """
+    stat = await asyncio.to_thread(os.stat, path)
+    size = stat.st_size
+    if etag is None:
+        etag = f'"{stat.st_mtime_ns:x}-{size:x}"'
+    last_modified = formatdate(stat.st_mtime, usegmt=True)
+    headers = {
+        "ETag": etag,
+        "Last-Modified": last_modified,
+        "Cache-Control": cache_control,
+        "Accept-Ranges": "bytes",
+    }
+    media_type = media_type or mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+
+    if _not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+
+    try:
+        byte_range = _byte_range(request, etag, last_modified, size)
+    except ValueError:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{size}"})
+
+    body = None
+    if cache is not None and cache.accepts(size):
+        key = (str(path), stat.st_mtime_ns, size)
+        body = cache.get(key)
+        if body is None:
+            body = await asyncio.to_thread(path.read_bytes)
+            cache.put(key, body)
+
+    start, end = byte_range if byte_range else (0, size - 1)
+    status_code = 206 if byte_range else 200
+    if byte_range:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    if body is not None:
+        return Response(body[start:end + 1], status_code=status_code, headers=headers, media_type=media_type)
+    headers["Content-Length"] = str(max(0, end - start + 1))
+    return StreamingResponse(_read_range(path, start, end), status_code=status_code, headers=headers, media_type=media_type)
@@ -0,0 +1,141 @@
+# Event-loop lag and MongoDB connection-pool statistics for /api/health/deep
+#
+# LoopLagMonitor sleeps for a fixed interval on the event loop and measures
+# how late it wakes up. Everything that runs on the loop without awaiting
+# (password hashing, large json.loads, synchronous file I/O) shows up as lag
+# and delays every other request by the same amount.
+#
+# PoolMonitor is a pymongo ConnectionPoolListener on the Motor client. It
+# tracks connections open and checked out, operations waiting for a
+# connection, and how long checkouts take. pymongo 4.5 events carry no
+# duration, so checkout time is measured between the started and
+# checked-out events. Both fire on the same driver thread.
+
+import asyncio
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Optional
+
+from pymongo import monitoring
+
+
+def _percentile(values, fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+class LoopLagMonitor:
+    def __init__(self, interval: float = 0.5, window: int = 120, recent: int = 5):
+        self.interval = interval
+        self.recent = recent
+        self.samples: Deque[float] = deque(maxlen=window)
+        self._task: Optional[asyncio.Task] = None
+
+    async def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    async def _run(self):
+        while True:
+            start = time.perf_counter()
+            await asyncio.sleep(self.interval)
+            self.samples.append(max(0.0, time.perf_counter() - start - self.interval))
+
+    def stats(self) -> Dict:
+        samples = list(self.samples)
+        return {
+            "intervalMs": self.interval * 1000,
+            "samples": len(samples),
+            "recentMs": round(max(samples[-self.recent:], default=0.0) * 1000, 2),
+            "p95Ms": round(_percentile(samples, 0.95) * 1000, 2),
+            "maxMs": round(max(samples, default=0.0) * 1000, 2),
+        }
+
+
+class PoolMonitor(monitoring.ConnectionPoolListener):
+    def __init__(self, window: int = 1000):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self.open = 0
+        self.in_use = 0
+        self.waiting = 0
+        self.checkouts = 0
+        self.failed_checkouts = 0
+        self.pool_clears = 0
+        self.checkout_times: Deque[float] = deque(maxlen=window)
+
+    def connection_check_out_started(self, event):
+        self._local.started = time.perf_counter()
+        with self._lock:
+            self.waiting += 1
+
+    def connection_checked_out(self, event):
+        started = getattr(self._local, "started", None)
+        with self._lock:
+            self.waiting -= 1
+            self.in_use += 1
+            self.checkouts += 1
+            if started is not None:
+                self.checkout_times.append(time.perf_counter() - started)
+
+    def connection_check_out_failed(self, event):
+        with self._lock:
+            self.waiting -= 1
+            self.failed_checkouts += 1
+
+    def connection_checked_in(self, event):
+        with self._lock:
+            self.in_use -= 1
+
+    def connection_created(self, event):
+        with self._lock:
+            self.open += 1
+
+    def connection_closed(self, event):
+        with self._lock:
+            self.open -= 1
+
+    def pool_cleared(self, event):
+        with self._lock:
+            self.pool_clears += 1
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def stats(self, max_pool_size: Optional[int] = None) -> Dict:
+        with self._lock:
+            times = list(self.checkout_times)
+            return {
+                "open": self.open,
+                "inUse": self.in_use,
+                "waiting": max(0, self.waiting),
+                "maxPoolSize": max_pool_size,
+                "checkouts": self.checkouts,
+                "failedCheckouts": self.failed_checkouts,
+                "poolClears": self.pool_clears,
+                "checkoutP50Ms": round(_percentile(times, 0.5) * 1000, 2),
+                "checkoutP95Ms": round(_percentile(times, 0.95) * 1000, 2),
+                "checkoutMaxMs": round(max(times, default=0.0) * 1000, 2),
+            }
@@ -0,0 +1,275 @@
+# Resized and re-encoded variants of uploaded images
+#
+# GET /api/uploads/{filename}?w=480&format=webp returns a derivative of the
+# upload instead of the original. Derivatives are rendered lazily, on first
+# request, by Pillow in a process pool (resizing is CPU-bound and would
+# otherwise hold the event loop and the GIL). They are kept on disk under
+# uploads/.derivatives and evicted least recently used first once the
+# directory grows past its byte cap.
+#
+# That directory is shared by every uvicorn worker, so the disk is the
+# index: a derivative any worker has written is a hit for all of them, and
+# file mtimes (refreshed on hits) are the shared recency order. The cap is
+# enforced by scanning the directory in a thread, at most every
+# scan_interval seconds, or sooner once this worker's own writes since the
+# last scan would take it over the cap.
+#
+# Pillow is optional: without it is_available() is False and the route
+# serves the original file.
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - optional dependency
+    Image = None
+
+# Requested widths are rounded up to one of these, so a client cannot fill
+# the cache with one derivative per pixel width
+WIDTHS = (96, 160, 320, 480, 640, 960, 1280, 1920)
+
+# format parameter -> (Pillow format, file extension, media type)
+FORMATS = {
+    "webp": ("WEBP", "webp", "image/webp"),
+    "jpeg": ("JPEG", "jpg", "image/jpeg"),
+    "png": ("PNG", "png", "image/png"),
+}
+
+# Source extension -> format parameter used when none is requested
+SOURCE_FORMATS = {"jpg": "jpeg", "jpeg": "jpeg", "png": "png", "webp": "webp", "gif": "png"}
+
+QUALITY = {"WEBP": 80, "JPEG": 82}
+
+# A hit refreshes the file's mtime at most this often (seconds)
+TOUCH_INTERVAL = 60
+
+# Undecodable sources are remembered so they aren't re-rendered on every
+# request; bounded, and retried after FAILED_TTL seconds
+MAX_FAILED = 1024
+FAILED_TTL = 3600
+
+logger = logging.getLogger(__name__)
+
+
+def is_available() -> bool:
+    return Image is not None
+
+
+def snap_width(width: int) -> int:
+    for candidate in WIDTHS:
+        if width <= candidate:
+            return candidate
+    return WIDTHS[-1]
+
+
+def render_derivative(source: str, target: str, width: Optional[int], pil_format: str) -> int:
+    """Resize and re-encode source into target; returns the size written
+
+    Runs in a worker process. Images are never enlarged.
+    """
+    with Image.open(source) as img:
+        img = ImageOps.exif_transpose(img)
+        if width and img.width > width:
+            height = max(1, round(img.height * width / img.width))
+            img = img.resize((width, height), Image.LANCZOS)
+        if pil_format == "JPEG" and img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        elif img.mode == "P":
+            img = img.convert("RGBA")
+        directory = os.path.dirname(target)
+        fd, tmp = tempfile.mkstemp(prefix=".render-", dir=directory)
+        try:
+            with os.fdopen(fd, "wb") as out:
+                img.save(out, pil_format, quality=QUALITY.get(pil_format, 90), optimize=True)
+            os.replace(tmp, target)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+    return os.path.getsize(target)
+
+
+class DerivativeCache:
+    def __init__(
+        self,
+        root: Path,
+        max_bytes: int = 512 * 1024 * 1024,
+        workers: Optional[int] = None,
+        scan_interval: float = 30.0
+    ):
+        self.root = root
+        self.max_bytes = max_bytes
+        self.workers = workers
+        self.scan_interval = scan_interval
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        # Directory size at the last scan, plus what this worker wrote since
+        self._files = 0
+        self._bytes = 0
+        self._last_scan: Optional[float] = None
+        self._scanning: Optional[asyncio.Future] = None
+        # derivative filename -> when rendering it failed
+        self._failed: "OrderedDict[str, float]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def available(self) -> bool:
+        return is_available()
+
+    def resolve(self, source: Path, width: Optional[int], fmt: Optional[str]) -> Tuple[str, Optional[int], str]:
+        """(derivative filename, snapped width, format parameter) for a request"""
+        stem, _, ext = source.name.rpartition(".")
+        fmt = fmt or SOURCE_FORMATS.get(ext.lower(), "png")
+        width = snap_width(width) if width else None
+        name = f"{stem or source.name}-{f'w{width}' if width else 'full'}.{FORMATS[fmt][1]}"
+        return name, width, fmt
+
+    async def get(self, source: Path, width: Optional[int], fmt: Optional[str]) -> Tuple[Path, str]:
+        """Path and media type of the derivative, rendering it if needed"""
+        name, width, fmt = self.resolve(source, width, fmt)
+        pil_format, _, media_type = FORMATS[fmt]
+        target = self.root / name
+        try:
+            mtime = target.stat().st_mtime
+        except FileNotFoundError:
+            mtime = None
+        if mtime is not None:
+            # Rendered by this worker or another one
+            self.hits += 1
+            if time.time() - mtime > TOUCH_INTERVAL:
+                try:
+                    os.utime(target)
+                except OSError:
+                    pass
+            return target, media_type
+
+        if self._has_failed(name):
+            raise ValueError(f"{source.name} could not be decoded as an image")
+        self.misses += 1
+        future = self._pending.get(name)
+        if future is None:
+            future = asyncio.ensure_future(self._render(source, target, width, pil_format))
+            self._pending[name] = future
+            future.add_done_callback(lambda _: self._pending.pop(name, None))
+        await asyncio.shield(future)
+        return target, media_type
+
+    async def _render(self, source: Path, target: Path, width: Optional[int], pil_format: str):
+        if self._executor is None:
+            # spawn rather than fork: the API process runs threads (Motor, the
+            # event loop's executor) that a forked child must not inherit
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")
+            )
+        self.root.mkdir(parents=True, exist_ok=True)
+        loop = asyncio.get_running_loop()
+        try:
+            size = await loop.run_in_executor(
+                self._executor, render_derivative, str(source), str(target), width, pil_format
+            )
+        except (OSError, ValueError):
+            # Pillow raises these for files it cannot identify or decode
+            self._remember_failure(target.name)
+            raise
+        self._files += 1
+        self._bytes += size
+        due = self._last_scan is None or time.monotonic() - self._last_scan >= self.scan_interval
+        if (due or self._bytes > self.max_bytes) and self._scanning is None:
+            self._scanning = asyncio.ensure_future(asyncio.to_thread(self._scan, target.name))
+            self._scanning.add_done_callback(self._scanned)
+
+    def _has_failed(self, name: str) -> bool:
+        failed_at = self._failed.get(name)
+        if failed_at is None:
+            return False
+        if time.monotonic() - failed_at > FAILED_TTL:
+            del self._failed[name]
+            return False
+        return True
+
+    def _remember_failure(self, name: str):
+        self._failed.pop(name, None)
+        self._failed[name] = time.monotonic()
+        while len(self._failed) > MAX_FAILED:
+            self._failed.popitem(last=False)
+
+    def _scan(self, keep: Optional[str] = None, evict: bool = True) -> Tuple[int, int, int]:
+        """Measure the shared directory and delete least recently used files over the cap
+
+        Runs in a thread. Returns (files, bytes, evicted).
+        """
+        files = []
+        try:
+            with os.scandir(self.root) as entries:
+                for entry in entries:
+                    if entry.name.startswith(".") or not entry.is_file():
+                        continue
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        # Evicted by another worker while we were listing
+                        continue
+                    files.append((stat.st_mtime, entry.name, stat.st_size))
+        except FileNotFoundError:
+            return 0, 0, 0
+        files.sort()
+        total = sum(size for _, _, size in files)
+        evicted = 0
+        for _, name, size in files:
+            if not evict or total <= self.max_bytes:
+                break
+            if name == keep:
+                continue
+            try:
+                (self.root / name).unlink()
+            except FileNotFoundError:
+                pass
+            total -= size
+            evicted += 1
+        return len(files) - evicted, total, evicted
+
+    def _scanned(self, future: asyncio.Future):
+        self._scanning = None
+        self._last_scan = time.monotonic()
+        try:
+            self._files, self._bytes, evicted = future.result()
+        except Exception as e:
+            logger.warning(f"Derivative cache scan failed: {e}")
+            return
+        self.evictions += evicted
+
+    async def wait_for_scan(self):
+        """Wait until a scan started by a render has finished"""
+        if self._scanning is not None:
+            await asyncio.shield(self._scanning)
+
+    def stats(self) -> Dict:
+        if self._last_scan is None:
+            # First look at the shared directory in this process
+            self._files, self._bytes, _ = self._scan(evict=False)
+            self._last_scan = time.monotonic()
+        return {
+            "available": self.available,
+            "entries": self._files,
+            "bytes": self._bytes,
+            "maxBytes": self.max_bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "failed": len(self._failed),
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
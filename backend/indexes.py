@@ -0,0 +1,243 @@
+# MongoDB index registry for DryFruto
+#
+# INDEXES declares every index the API relies on; ensure_indexes() creates
+# them at startup (create_index is a no-op when the index already exists).
+# QUERY_SHAPES lists the selective queries the routes issue, so that
+#
+#   python indexes.py --verify
+#
+# can run explain() on each of them and fail if any falls back to a
+# collection scan. Routes that read a whole collection (the catalog lists,
+# /status) are deliberately not listed: a COLLSCAN is the right plan there.
+#
+# ensure_indexes() first normalizes stored newsletter emails, so rows saved
+# before signups were lower-cased cannot duplicate or block the unique index.
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from pymongo.errors import DuplicateKeyError, OperationFailure
+
+logger = logging.getLogger(__name__)
+
+Keys = List[Tuple[str, int]]
+
+
+def index(keys: Keys, unique: bool = False) -> Dict[str, Any]:
+    return {"keys": keys, "unique": unique}
+
+
+def by_id() -> Dict[str, Any]:
+    return index([("id", 1)], unique=True)
+
+
+INDEXES: Dict[str, List[Dict[str, Any]]] = {
+    "admin_users": [
+        by_id(),
+        index([("username", 1)], unique=True),
+    ],
+    "categories": [by_id()],
+    "products": [
+        by_id(),
+        # Filter + sort combinations of GET /products (see PRODUCT_SORTS in server.py)
+        index([("category", 1), ("_id", 1)]),
+        index([("category", 1), ("name", 1), ("id", 1)]),
+        index([("category", 1), ("basePrice", 1), ("id", 1)]),
+        index([("category", 1), ("type", 1), ("basePrice", 1), ("id", 1)]),
+        index([("type", 1), ("basePrice", 1), ("id", 1)]),
+        index([("name", 1), ("id", 1)]),
+        index([("basePrice", 1), ("id", 1)]),
+    ],
+    "hero_slides": [by_id()],
+    "testimonials": [by_id()],
+    "gift_boxes": [by_id()],
+    "site_settings": [by_id()],
+    "status_checks": [
+        by_id(),
+        index([("timestamp", -1)]),
+    ],
+    "bulk_orders": [
+        by_id(),
+        # Keyset pages of GET /bulk-orders (SUBMISSION_SORT in server.py),
+        # unfiltered and filtered by status
+        index([("createdAt", -1), ("id", -1)]),
+        index([("status", 1), ("createdAt", -1), ("id", -1)]),
+    ],
+    "newsletter": [
+        by_id(),
+        index([("email", 1)], unique=True),
+        index([("createdAt", -1), ("id", -1)]),
+    ],
+    "data_changes": [
+        by_id(),
+        index([("timestamp", -1)]),
+    ],
+    "cache_versions": [by_id()],
+}
+
+# (collection, filter, sort) for every selective query a route issues
+QUERY_SHAPES: List[Tuple[str, Dict[str, Any], Keys]] = [
+    ("admin_users", {"username": "admin"}, []),
+    ("admin_users", {"id": "x"}, []),
+    ("categories", {"id": "x"}, []),
+    ("products", {"id": "x"}, []),
+    ("products", {"category": "nuts"}, [("_id", 1)]),
+    ("products", {"category": "nuts", "basePrice": {"$gte": 0, "$lte": 1000}}, [("name", 1), ("id", 1)]),
+    ("products", {"category": "nuts", "basePrice": {"$gte": 0, "$lte": 1000}}, [("basePrice", 1), ("id", 1)]),
+    ("products", {"category": "nuts", "type": "Almonds"}, [("basePrice", -1), ("id", -1)]),
+    ("products", {"type": "Almonds"}, [("basePrice", 1), ("id", 1)]),
+    ("products", {"basePrice": {"$gte": 0, "$lte": 1000}}, [("name", 1), ("id", 1)]),
+    ("products", {"basePrice": {"$gte": 0, "$lte": 1000}}, [("basePrice", -1), ("id", -1)]),
+    ("hero_slides", {"id": "x"}, []),
+    ("testimonials", {"id": "x"}, []),
+    ("gift_boxes", {"id": "x"}, []),
+    ("site_settings", {"id": "site_settings"}, []),
+    ("bulk_orders", {"id": "x"}, []),
+    ("bulk_orders", {}, [("createdAt", -1), ("id", -1)]),
+    ("bulk_orders", {"status": "new"}, [("createdAt", -1), ("id", -1)]),
+    ("bulk_orders", {"status": "new", "$or": [{"createdAt": {"$lt": "2025"}}, {"createdAt": "2025", "id": {"$lt": "x"}}]},
+     [("createdAt", -1), ("id", -1)]),
+    # Admin stats: per-status counts and the submissions-per-day window
+    ("bulk_orders", {"status": {"$in": [None, "new"]}}, []),
+    ("bulk_orders", {"createdAt": {"$gte": "2025-01-01"}}, []),
+    ("newsletter", {"createdAt": {"$gte": "2025-01-01"}}, []),
+    ("newsletter", {"email": "a@example.com"}, []),
+    # Startup email normalization (normalize_newsletter_emails)
+    ("newsletter", {"email": {"$regex": r"[A-Z]|^\s|\s$"}}, []),
+    ("newsletter", {"id": "x"}, []),
+    ("newsletter", {}, [("createdAt", -1), ("id", -1)]),
+    # Date-range exports (GET /newsletter/export, /bulk-orders/export)
+    ("newsletter", {"createdAt": {"$gte": "2025-01-01", "$lt": "2025-02-01"}}, [("createdAt", -1), ("id", -1)]),
+    ("data_changes", {"id": "x"}, []),
+    ("data_changes", {}, [("timestamp", -1)]),
+    ("cache_versions", {"id": "catalog"}, []),
+]
+
+
+async def create_collection_indexes(collection, specs: List[Dict[str, Any]]) -> List[str]:
+    """Create the given index specs on one collection; returns the names that failed"""
+    failed = []
+    for spec in specs:
+        try:
+            await collection.create_index(spec["keys"], unique=spec["unique"])
+        except OperationFailure as e:
+            name = f"{collection.name}.{'_'.join(f'{k}_{d}' for k, d in spec['keys'])}"
+            logger.error(f"Could not create index {name}: {e}")
+            failed.append(name)
+    return failed
+
+
+async def normalize_newsletter_emails(db) -> int:
+    """Trim and lower-case stored newsletter emails, deleting the duplicates that exposes
+
+    Signups are matched on the normalized address (normalize_email in
+    server.py), so a mixed-case row saved before that would never match
+    again. When the normalized address is already taken the mixed-case row
+    is dropped. Returns the number of rows updated or deleted.
+    """
+    collection = db.newsletter
+    changed = 0
+    # Only rows that need it; the regex is evaluated against the email index keys
+    async for doc in collection.find({"email": {"$regex": r"[A-Z]|^\s|\s$"}}, {"_id": 1, "email": 1}):
+        email = doc["email"].strip().lower()
+        if await collection.find_one({"email": email, "_id": {"$ne": doc["_id"]}}, {"_id": 1}):
+            await collection.delete_one({"_id": doc["_id"]})
+        else:
+            try:
+                await collection.update_one({"_id": doc["_id"]}, {"$set": {"email": email}})
+            except DuplicateKeyError:
+                # Another worker normalized a spelling of the same address first
+                await collection.delete_one({"_id": doc["_id"]})
+        changed += 1
+
+    # Exact duplicates can only exist while the unique index is missing;
+    # keep the earliest signup of each address
+    if not any(info.get("unique") and info["key"] == [("email", 1)] for info in (await collection.index_information()).values()):
+        duplicates = collection.aggregate([
+            {"$sort": {"createdAt": 1, "_id": 1}},
+            {"$group": {"_id": "$email", "ids": {"$push": "$_id"}}},
+            {"$match": {"ids.1": {"$exists": True}}},
+        ])
+        async for group in duplicates:
+            changed += (await collection.delete_many({"_id": {"$in": group["ids"][1:]}})).deleted_count
+    if changed:
+        logger.info(f"Normalized newsletter emails: {changed} row(s) updated or removed")
+    return changed
+
+
+async def ensure_indexes(db) -> List[str]:
+    """Create every registered index; returns the names of indexes that failed
+
+    A failure (e.g. existing duplicates blocking a unique index) is logged
+    rather than raised so the API can still start.
+    """
+    await normalize_newsletter_emails(db)
+    failed = []
+    for collection, specs in INDEXES.items():
+        failed += await create_collection_indexes(db[collection], specs)
+    return failed
+
+
+def _stages(plan: Any):
+    """Yield every stage name in an explain plan tree"""
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for value in plan.values():
+            yield from _stages(value)
+    elif isinstance(plan, list):
+        for item in plan:
+            yield from _stages(item)
+
+
+async def verify_query_shapes(db) -> List[str]:
+    """Explain every registered query shape; returns descriptions of COLLSCANs"""
+    problems = []
+    for collection, query, sort in QUERY_SHAPES:
+        cursor = db[collection].find(query).limit(25)
+        if sort:
+            cursor = cursor.sort(sort)
+        plan = (await cursor.explain()).get("queryPlanner", {}).get("winningPlan", {})
+        stages = set(_stages(plan))
+        status = "COLLSCAN" if "COLLSCAN" in stages else "ok"
+        print(f"{status:9} {collection:15} filter={query} sort={sort}")
+        if "COLLSCAN" in stages:
+            problems.append(f"{collection} {query} {sort}")
+    return problems
+
+
+async def _main(verify: bool) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        failed = await ensure_indexes(db)
+        if failed:
+            print(f"Failed to create {len(failed)} index(es): {', '.join(failed)}")
+            return 1
+        print("All indexes ensured")
+        if verify:
+            problems = await verify_query_shapes(db)
+            if problems:
+                print(f"{len(problems)} query shape(s) fall back to a collection scan")
+                return 1
+            print("No query shape uses a collection scan")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create DryFruto MongoDB indexes")
+    parser.add_argument("--verify", action="store_true", help="explain every route query shape and fail on COLLSCAN")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args.verify)))
@@ -0,0 +1,362 @@
+# Incremental JSON parsing and encoding for large DryFruto export files
+#
+# Exports are a single JSON object whose values are mostly long arrays
+# ({"categories": [...], "products": [...], ...}). TopLevelParser walks that
+# object as bytes arrive and hands back one array element (or one
+# non-array value) at a time, so memory use is bounded by the largest single
+# element rather than by the file. Decoding is done by the stdlib C decoder
+# through JSONDecoder.raw_decode, once per element: _ValueScanner tracks
+# strings and bracket depth as chunks arrive, and an element that spans
+# many chunks is parked as a list of pieces until its end has been seen.
+#
+# iter_json_object() is the inverse: it encodes such an object while its
+# arrays are still being read from database cursors.
+
+import codecs
+import json
+import re
+import zlib
+from typing import Any, AsyncIterator, Callable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional encoding
+    brotli = None
+
+# Upper bound on a single element; protects against unbounded buffering
+# when the input is malformed
+MAX_ELEMENT_CHARS = 32 * 1024 * 1024
+
+# Kinds of events produced by the parser
+ITEM = "item"      # one element of a top-level array
+VALUE = "value"    # a complete non-array top-level value
+
+_WHITESPACE = " \t\n\r"
+
+# Characters that matter while looking for the end of a value
+_STRUCTURAL = re.compile(r'["\\{}\[\]]')
+_STRING_END = re.compile(r'["\\]')
+_SCALAR_END = re.compile(r'[\s,\]}]')
+
+_START, _KEY, _COLON, _VALUE, _ARRAY_FIRST, _ARRAY_ITEM, _ARRAY_SEP, _OBJECT_SEP, _DONE = range(9)
+
+
+class _ValueScanner:
+    """Finds where one JSON value ends as its text arrives, without decoding it
+
+    Only string boundaries and bracket depth are tracked; whether the value
+    is valid is left to the decoder once its end has been found.
+    """
+
+    def __init__(self, first: str):
+        self.scalar = first not in '{["'
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+
+    def scan(self, text: str, start: int) -> int:
+        """Continue over text[start:]; index just past the value, or -1 if it goes on"""
+        if self.scalar:
+            match = _SCALAR_END.search(text, start)
+            return match.start() if match else -1
+        i = start
+        while True:
+            if self.escape:
+                if i >= len(text):
+                    return -1
+                self.escape = False
+                i += 1
+            match = (_STRING_END if self.in_string else _STRUCTURAL).search(text, i)
+            if match is None:
+                return -1
+            char, i = match.group(), match.end()
+            if self.in_string:
+                if char == "\\":
+                    self.escape = True
+                else:
+                    self.in_string = False
+                    if self.depth == 0:
+                        return i
+            elif char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth <= 0:
+                    return i
+
+
+class TopLevelParser:
+    def __init__(self):
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buf = ""
+        self._pos = 0
+        self._state = _START
+        self._key = None
+        self.keys: Set[str] = set()
+        # An element still arriving: its scanner and the pieces seen so far
+        self._scanner: Optional[_ValueScanner] = None
+        self._pieces: Optional[List[str]] = None
+        self._pieces_size = 0
+        # Set when _buf starts with an element known to be complete
+        self._value_ready = False
+
+    def _decode_utf8(self, data: bytes, final: bool = False) -> str:
+        try:
+            return self._utf8.decode(data, final=final)
+        except UnicodeDecodeError as e:
+            raise json.JSONDecodeError(f"Invalid UTF-8: {e}", "", 0)
+
+    def feed(self, data: bytes) -> List[Tuple[str, str, Any]]:
+        """Consume a chunk; returns (kind, key, value) events now complete"""
+        text = self._decode_utf8(data)
+        if self._pieces is not None:
+            end = self._scanner.scan(text, 0)
+            self._pieces.append(text)
+            self._pieces_size += len(text)
+            if end < 0:
+                if self._pieces_size > MAX_ELEMENT_CHARS:
+                    raise json.JSONDecodeError("Element too large", "", 0)
+                return []
+            self._buf = "".join(self._pieces)
+            self._value_ready = True
+            self._pieces = self._scanner = None
+        else:
+            self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return list(self._parse(final=False))
+
+    def close(self) -> List[Tuple[str, str, Any]]:
+        """Signal end of input; raises JSONDecodeError if the document is incomplete"""
+        tail = self._decode_utf8(b"", final=True)
+        if self._pieces is not None:
+            self._buf = "".join(self._pieces) + tail
+            self._pieces = self._scanner = None
+        else:
+            self._buf = self._buf[self._pos:] + tail
+        self._pos = 0
+        events = list(self._parse(final=True))
+        self._skip_whitespace()
+        if self._state != _DONE or self._pos != len(self._buf):
+            raise json.JSONDecodeError("Unexpected end of JSON document", self._buf, self._pos)
+        return events
+
+    def _skip_whitespace(self):
+        while self._pos < len(self._buf) and self._buf[self._pos] in _WHITESPACE:
+            self._pos += 1
+
+    def _expect(self, allowed: str):
+        """Next significant character if it is in allowed, None if more input is needed"""
+        self._skip_whitespace()
+        if self._pos >= len(self._buf):
+            return None
+        char = self._buf[self._pos]
+        if char not in allowed:
+            raise json.JSONDecodeError(f"Expected one of {allowed!r}", self._buf, self._pos)
+        return char
+
+    def _decode_value(self, final: bool):
+        """Decode one JSON value at the current position; (found, value)"""
+        self._skip_whitespace()
+        if self._pos >= len(self._buf):
+            return False, None
+        if not self._value_ready and not final:
+            scanner = _ValueScanner(self._buf[self._pos])
+            if scanner.scan(self._buf, self._pos) < 0:
+                # Park the partial element; feed() extends it piece by piece
+                # instead of rebuilding and re-parsing the buffer per chunk
+                if len(self._buf) - self._pos > MAX_ELEMENT_CHARS:
+                    raise json.JSONDecodeError("Element too large", self._buf, self._pos)
+                self._scanner = scanner
+                self._pieces = [self._buf[self._pos:]]
+                self._pieces_size = len(self._pieces[0])
+                self._buf, self._pos = "", 0
+                return False, None
+        self._value_ready = False
+        value, self._pos = self._decoder.raw_decode(self._buf, self._pos)
+        return True, value
+
+    def _parse(self, final: bool) -> Iterator[Tuple[str, str, Any]]:
+        while True:
+            state = self._state
+            if state == _START:
+                if self._expect("{") is None:
+                    return
+                self._pos += 1
+                self._state = _KEY
+            elif state == _KEY:
+                # A closing brace is only valid straight after the opening one
+                char = self._expect('"}' if self._key is None else '"')
+                if char is None:
+                    return
+                if char == "}":
+                    self._pos += 1
+                    self._state = _DONE
+                    continue
+                found, key = self._decode_value(final)
+                if not found:
+                    return
+                self._key = key
+                self.keys.add(key)
+                self._state = _COLON
+            elif state == _COLON:
+                if self._expect(":") is None:
+                    return
+                self._pos += 1
+                self._state = _VALUE
+            elif state == _VALUE:
+                self._skip_whitespace()
+                if self._pos >= len(self._buf):
+                    return
+                if self._buf[self._pos] == "[":
+                    self._pos += 1
+                    self._state = _ARRAY_FIRST
+                    continue
+                found, value = self._decode_value(final)
+                if not found:
+                    return
+                yield VALUE, self._key, value
+                self._state = _OBJECT_SEP
+            elif state in (_ARRAY_FIRST, _ARRAY_ITEM):
+                self._skip_whitespace()
+                if self._pos >= len(self._buf):
+                    return
+                if state == _ARRAY_FIRST and self._buf[self._pos] == "]":
+                    self._pos += 1
+                    self._state = _OBJECT_SEP
+                    continue
+                found, value = self._decode_value(final)
+                if not found:
+                    return
+                yield ITEM, self._key, value
+                self._state = _ARRAY_SEP
+            elif state == _ARRAY_SEP:
+                char = self._expect(",]")
+                if char is None:
+                    return
+                self._pos += 1
+                self._state = _ARRAY_ITEM if char == "," else _OBJECT_SEP
+            elif state == _OBJECT_SEP:
+                char = self._expect(",}")
+                if char is None:
+                    return
+                self._pos += 1
+                self._state = _KEY if char == "," else _DONE
+            else:
+                return
+
+
+async def iter_events(chunks: AsyncIterator[bytes]) -> AsyncIterator[Tuple[str, str, Any]]:
+    """Parse an async stream of byte chunks into top-level events"""
+    parser = TopLevelParser()
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            yield event
+    for event in parser.close():
+        yield event
+
+
+async def scan_keys(
+    chunks: AsyncIterator[bytes],
+    check: Optional[Callable[[str, str, Any], None]] = None
+) -> Set[str]:
+    """Validate a whole stream and return its top-level keys, discarding values
+
+    check, if given, sees every (kind, key, value) event and may raise to
+    reject the stream.
+    """
+    parser = TopLevelParser()
+    async for chunk in chunks:
+        for event in parser.feed(chunk):
+            if check is not None:
+                check(*event)
+    for event in parser.close():
+        if check is not None:
+            check(*event)
+    return parser.keys
+
+
+async def iter_upload(file, chunk_size: int = 256 * 1024) -> AsyncIterator[bytes]:
+    """Read an UploadFile in fixed-size chunks"""
+    while True:
+        chunk = await file.read(chunk_size)
+        if not chunk:
+            return
+        yield chunk
+
+
+async def iter_json_object(
+    fields: Sequence[Tuple[str, Any]],
+    indent: Optional[int] = None,
+    default: Optional[Callable[[Any], Any]] = None,
+    chunk_size: int = 64 * 1024
+) -> AsyncIterator[bytes]:
+    """Encode a JSON object field by field, yielding UTF-8 chunks
+
+    A field value with __aiter__ (e.g. a Motor cursor) is written as an array,
+    one element at a time. With indent set, the output matches
+    json.dumps(obj, indent=indent, ensure_ascii=False).
+    """
+    if indent is None:
+        encoder = json.JSONEncoder(ensure_ascii=False, separators=(",", ":"), default=default)
+    else:
+        encoder = json.JSONEncoder(ensure_ascii=False, indent=indent, default=default)
+    step = " " * (indent or 0)
+
+    def encode(value: Any, level: int) -> str:
+        text = encoder.encode(value)
+        return text.replace("\n", "\n" + step * level) if indent is not None else text
+
+    def newline(level: int) -> str:
+        return "\n" + step * level if indent is not None else ""
+
+    colon = ": " if indent is not None else ":"
+    parts: List[str] = ["{"]
+    size = 1
+    for position, (key, value) in enumerate(fields):
+        parts.append(("," if position else "") + newline(1) + encoder.encode(key) + colon)
+        if hasattr(value, "__aiter__"):
+            parts.append("[")
+            count = 0
+            async for item in value:
+                piece = ("," if count else "") + newline(2) + encode(item, 2)
+                parts.append(piece)
+                size += len(piece)
+                count += 1
+                if size >= chunk_size:
+                    yield "".join(parts).encode("utf-8")
+                    parts, size = [], 0
+            parts.append((newline(1) if count else "") + "]")
+        else:
+            piece = encode(value, 1)
+            parts.append(piece)
+            size += len(piece)
+    parts.append(newline(0) + "}")
+    yield "".join(parts).encode("utf-8")
+
+
+async def gzip_chunks(chunks: AsyncIterator[bytes], level: int = 6) -> AsyncIterator[bytes]:
+    """Gzip-compress a byte stream on the fly"""
+    compressor = zlib.compressobj(level, zlib.DEFLATED, 31)
+    async for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+
+async def brotli_chunks(chunks: AsyncIterator[bytes], quality: int = 5) -> AsyncIterator[bytes]:
+    """Brotli-compress a byte stream on the fly"""
+    compressor = brotli.Compressor(quality=quality)
+    async for chunk in chunks:
+        compressed = compressor.process(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.finish()
+
+
+def compress_chunks(chunks: AsyncIterator[bytes], encoding: str) -> AsyncIterator[bytes]:
+    """Compress a byte stream with a coding from fast_json.negotiate_encoding"""
+    return brotli_chunks(chunks) if encoding == "br" else gzip_chunks(chunks)
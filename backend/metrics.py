@@ -0,0 +1,207 @@
+# Request and MongoDB command metrics in Prometheus text format
+#
+# HTTPMetricsMiddleware counts requests per route template (the path as
+# declared, e.g. /api/products/{product_id}, so ids don't explode label
+# cardinality), method and status, and records their latency in a histogram.
+# MongoCommandMetrics is a pymongo CommandListener passed to the Motor client
+# through event_listeners; it times every command per collection.
+#
+# Recording is a dict lookup and a bisect per event. Buckets are kept as
+# plain counts and only made cumulative when /api/metrics renders them.
+# Counters are per process: with several uvicorn workers each scrape sees
+# the worker that answered it.
+
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Tuple
+
+from pymongo import monitoring
+
+# Upper bounds in seconds; the implicit last bucket is +Inf
+HTTP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+MONGO_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+# Label value for requests that matched no route
+UNMATCHED_ROUTE = "unmatched"
+
+
+class Histogram:
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> Iterable[str]:
+        cumulative = 0
+        sep = "," if labels else ""
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            yield f'{name}_bucket{{{labels}{sep}le="{bound}"}} {cumulative}'
+        yield f'{name}_bucket{{{labels}{sep}le="+Inf"}} {self.count}'
+        yield f"{name}_sum{{{labels}}} {self.sum:.6f}"
+        yield f"{name}_count{{{labels}}} {self.count}"
+
+
+def _label(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels: str) -> str:
+    return ",".join(f'{key}="{_label(value)}"' for key, value in labels.items())
+
+
+class HTTPMetrics:
+    def __init__(self, buckets: Tuple[float, ...] = HTTP_BUCKETS):
+        self.buckets = buckets
+        self.requests: Dict[Tuple[str, str, int], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+        self.in_progress = 0
+
+    def record(self, method: str, route: str, status: int, seconds: float):
+        key = (method, route, status)
+        self.requests[key] = self.requests.get(key, 0) + 1
+        histogram = self.latency.get((method, route))
+        if histogram is None:
+            histogram = self.latency[(method, route)] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def render(self) -> List[str]:
+        lines = [
+            "# HELP dryfruto_http_requests_total Requests handled, by route template and status",
+            "# TYPE dryfruto_http_requests_total counter",
+        ]
+        for (method, route, status), count in sorted(self.requests.items()):
+            lines.append(f"dryfruto_http_requests_total{{{_labels(method=method, route=route, status=str(status))}}} {count}")
+        lines += [
+            "# HELP dryfruto_http_request_duration_seconds Time to produce the full response",
+            "# TYPE dryfruto_http_request_duration_seconds histogram",
+        ]
+        for (method, route), histogram in sorted(self.latency.items()):
+            lines += histogram.render("dryfruto_http_request_duration_seconds", _labels(method=method, route=route))
+        lines += [
+            "# HELP dryfruto_http_requests_in_progress Requests currently being handled",
+            "# TYPE dryfruto_http_requests_in_progress gauge",
+            f"dryfruto_http_requests_in_progress {self.in_progress}",
+        ]
+        return lines
+
+
+class HTTPMetricsMiddleware:
+    """ASGI middleware feeding HTTPMetrics; plain ASGI so streamed bodies pass straight through"""
+
+    def __init__(self, app, metrics: HTTPMetrics):
+        self.app = app
+        self.metrics = metrics
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        status = 500
+        metrics = self.metrics
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        metrics.in_progress += 1
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            metrics.in_progress -= 1
+            # The router stores the matched route in the scope it was given
+            route = scope.get("route")
+            metrics.record(
+                scope["method"],
+                getattr(route, "path", None) or UNMATCHED_ROUTE,
+                status,
+                time.perf_counter() - start
+            )
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """Per command and collection timings; callbacks run on the driver's threads"""
+
+    def __init__(self, buckets: Tuple[float, ...] = MONGO_BUCKETS):
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._started: Dict[Tuple, Tuple[str, str]] = {}
+        self.commands: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[Tuple[str, str], Histogram] = {}
+
+    @staticmethod
+    def _collection(event: monitoring.CommandStartedEvent) -> str:
+        target = event.command.get(event.command_name)
+        if isinstance(target, str):
+            return target
+        # getMore names the collection separately; admin commands have none
+        return event.command.get("collection") or "-"
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        with self._lock:
+            self._started[(event.connection_id, event.request_id)] = (event.command_name, self._collection(event))
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event, "ok")
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event, "error")
+
+    def _finish(self, event, outcome: str):
+        with self._lock:
+            command, collection = self._started.pop(
+                (event.connection_id, event.request_id), (event.command_name, "-")
+            )
+            key = (command, collection, outcome)
+            self.commands[key] = self.commands.get(key, 0) + 1
+            histogram = self.latency.get((command, collection))
+            if histogram is None:
+                histogram = self.latency[(command, collection)] = Histogram(self.buckets)
+            histogram.observe(event.duration_micros / 1_000_000)
+
+    def render(self) -> List[str]:
+        with self._lock:
+            commands = sorted(self.commands.items())
+            histograms = [(key, self._copy(histogram)) for key, histogram in sorted(self.latency.items())]
+        lines = [
+            "# HELP dryfruto_mongo_commands_total MongoDB commands run, by collection and outcome",
+            "# TYPE dryfruto_mongo_commands_total counter",
+        ]
+        for (command, collection, outcome), count in commands:
+            labels = _labels(command=command, collection=collection, outcome=outcome)
+            lines.append(f"dryfruto_mongo_commands_total{{{labels}}} {count}")
+        lines += [
+            "# HELP dryfruto_mongo_command_duration_seconds Round trip of a MongoDB command as seen by the driver",
+            "# TYPE dryfruto_mongo_command_duration_seconds histogram",
+        ]
+        for (command, collection), histogram in histograms:
+            lines += histogram.render("dryfruto_mongo_command_duration_seconds", _labels(command=command, collection=collection))
+        return lines
+
+    @staticmethod
+    def _copy(histogram: Histogram) -> Histogram:
+        copy = Histogram(histogram.buckets)
+        copy.counts = list(histogram.counts)
+        copy.sum = histogram.sum
+        copy.count = histogram.count
+        return copy
+
+
+def render_metrics(*sources) -> str:
+    """Prometheus exposition text for every source's render() lines"""
+    lines = []
+    for source in sources:
+        lines += source.render()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,243 @@
+# Opt-in sampling profiler for live requests
+#
+# ProfilerMiddleware picks requests to profile: a random sample_rate
+# fraction (set at runtime through PUT /api/admin/profiler), or one request
+# that carries "X-Profile: 1" with a valid admin token. While any profiled
+# request is in flight, a background thread samples the event loop thread's
+# Python stack every interval seconds. A profiled request is recognised in a
+# sample by its middleware frame, and only the frames below that are kept.
+# Work the request hands to child tasks (a StreamingResponse body runs in an
+# anyio task group) is attributed too: the middleware sets a context variable
+# that child tasks inherit, and a task factory on the loop registers the root
+# coroutine frame of every task created under it.
+#
+# Samples that land inside a request are its on-CPU time. This includes
+# blocking calls made on the loop, which are exactly what hurts. The rest
+# of the request's wall time was spent awaiting: database round trips,
+# to_thread work, or other requests using the loop. Finished profiles are
+# kept in a ring of the last `keep`. Each stores its stacks collapsed
+# ("frame;frame;frame count"), which is the input format for flamegraph.pl
+# and speedscope.
+#
+# Sampling reads sys._current_frames() from a separate thread, so requests
+# that aren't profiled pay nothing. The profiled ones pay about a
+# microsecond of GIL time per sample.
+
+import asyncio
+import os
+import random
+import sys
+import threading
+import time
+import uuid
+from collections import Counter, deque
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Callable, Deque, Dict, List, Optional
+
+PROFILE_HEADER = "x-profile"
+
+# The profile of the request the current task works for, inherited by child tasks
+_current_profile: ContextVar[Optional["RequestProfile"]] = ContextVar("request_profile", default=None)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class RequestProfile:
+    def __init__(self, method: str, path: str, reason: str):
+        self.id = uuid.uuid4().hex[:12]
+        self.method = method
+        self.path = path
+        self.reason = reason
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = datetime.now(timezone.utc)
+        self.wall = 0.0
+        self.samples = 0
+        self.cpu = 0.0
+        self.stacks: Counter = Counter()
+        self.active = False
+        self._start = time.perf_counter()
+
+    def finish(self, route: Optional[str], status: int):
+        self.wall = time.perf_counter() - self._start
+        self.route = route
+        self.status = status
+
+    def summary(self) -> Dict:
+        cpu = min(self.cpu, self.wall)
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "reason": self.reason,
+            "startedAt": self.started_at.isoformat(),
+            "wallMs": round(self.wall * 1000, 2),
+            "cpuMs": round(cpu * 1000, 2),
+            "awaitMs": round((self.wall - cpu) * 1000, 2),
+            "samples": self.samples,
+        }
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class SamplingProfiler:
+    def __init__(self, interval: float = 0.005, keep: int = 50, sample_rate: float = 0.0):
+        self.interval = interval
+        self.sample_rate = sample_rate
+        self.profiles: Deque[RequestProfile] = deque(maxlen=keep)
+        # id() of each profiled request's middleware frame, and of the root
+        # frame of every task it spawned -> its profile
+        self._active: Dict[int, RequestProfile] = {}
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._target_thread: Optional[int] = None
+
+    def begin(self, frame, profile: RequestProfile):
+        with self._lock:
+            self._active[id(frame)] = profile
+            profile.active = True
+        # Requests are served on the loop thread, which is the one we sample
+        self._target_thread = threading.get_ident()
+        self._install_task_factory(asyncio.get_running_loop())
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+            self._thread.start()
+        self._wake.set()
+
+    def end(self, frame, profile: RequestProfile):
+        with self._lock:
+            profile.active = False
+            # Tasks that outlive the request (background work) stop counting
+            for key in [key for key, owner in self._active.items() if owner is profile]:
+                del self._active[key]
+            if not self._active:
+                self._wake.clear()
+        self.profiles.append(profile)
+
+    def _install_task_factory(self, loop):
+        """Register the root frame of tasks created on behalf of a profiled request"""
+        previous = loop.get_task_factory()
+        if getattr(previous, "profiler", None) is self:
+            return
+
+        def factory(loop, coro, **kwargs):
+            task = previous(loop, coro, **kwargs) if previous else asyncio.Task(coro, loop=loop, **kwargs)
+            context = kwargs.get("context")
+            profile = context.get(_current_profile) if context is not None else _current_profile.get()
+            frame = getattr(coro, "cr_frame", None)
+            if profile is not None and frame is not None:
+                self._adopt(task, frame, profile)
+            return task
+
+        factory.profiler = self
+        loop.set_task_factory(factory)
+
+    def _adopt(self, task, frame, profile: RequestProfile):
+        with self._lock:
+            if not profile.active:
+                return
+            self._active[id(frame)] = profile
+
+        def release(_task):
+            # The closure keeps frame alive, so its id() is not reused before this runs
+            with self._lock:
+                if self._active.get(id(frame)) is profile:
+                    del self._active[id(frame)]
+
+        task.add_done_callback(release)
+
+    def get(self, profile_id: str) -> Optional[RequestProfile]:
+        for profile in self.profiles:
+            if profile.id == profile_id:
+                return profile
+        return None
+
+    def summaries(self) -> List[Dict]:
+        return [profile.summary() for profile in reversed(self.profiles)]
+
+    def _run(self):
+        last = None
+        while True:
+            if not self._wake.is_set():
+                last = None
+            self._wake.wait()
+            time.sleep(self.interval)
+            now = time.perf_counter()
+            # A busy loop holds the GIL, so the real gap between samples can
+            # be well above interval; it is what the sample stands for
+            elapsed = now - last if last is not None else self.interval
+            last = now
+            frame = sys._current_frames().get(self._target_thread)
+            with self._lock:
+                if not self._active:
+                    continue
+                stack = []
+                while frame is not None:
+                    profile = self._active.get(id(frame))
+                    if profile is not None:
+                        profile.samples += 1
+                        profile.cpu += elapsed
+                        profile.stacks[";".join(reversed(stack))] += 1
+                        break
+                    stack.append(_frame_label(frame))
+                    frame = frame.f_back
+            # A stack that reached no profiled request means the loop was idle
+            # or serving someone else: await time for the profiled ones
+
+
+class ProfilerMiddleware:
+    """Profile sampled requests, or one request sent with X-Profile and an admin token"""
+
+    def __init__(self, app, profiler: SamplingProfiler, authorize: Callable[[str], bool]):
+        self.app = app
+        self.profiler = profiler
+        self.authorize = authorize
+
+    def _reason(self, scope) -> Optional[str]:
+        headers = dict(scope["headers"])
+        if headers.get(PROFILE_HEADER.encode()) == b"1":
+            scheme, _, token = headers.get(b"authorization", b"").decode("latin-1").partition(" ")
+            if scheme.lower() == "bearer" and self.authorize(token):
+                return "header"
+        rate = self.profiler.sample_rate
+        if rate and random.random() < rate:
+            return "sampled"
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        reason = self._reason(scope)
+        if reason is None:
+            await self.app(scope, receive, send)
+            return
+
+        profile = RequestProfile(scope["method"], scope["path"], reason)
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = [*message.get("headers", []), (b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        frame = sys._getframe()
+        self.profiler.begin(frame, profile)
+        token = _current_profile.set(profile)
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _current_profile.reset(token)
+            route = scope.get("route")
+            profile.finish(getattr(route, "path", None), status)
+            self.profiler.end(frame, profile)
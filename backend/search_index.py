@@ -0,0 +1,193 @@
+# In-memory product search for DryFruto
+#
+# An inverted index over the searchable product fields. It supports ranked
+# results, prefix matching on the last query word (for search-as-you-type)
+# and single-typo tolerance through a symmetric-delete table. Products are
+# added, replaced or removed one at a time, so a catalog write does not
+# require rebuilding the whole index.
+
+import math
+import re
+from bisect import bisect_left, insort
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+# Relative importance of each searchable field
+FIELD_WEIGHTS = {
+    "name": 4.0,
+    "category": 2.0,
+    "type": 2.0,
+    "shortDescription": 1.5,
+    "benefits": 1.0,
+    "description": 1.0,
+}
+
+STOPWORDS = {"a", "an", "and", "are", "as", "for", "from", "in", "is", "it", "of", "on", "or", "the", "to", "with"}
+
+PREFIX_FACTOR = 0.7
+TYPO_FACTOR = 0.5
+MAX_PREFIX_EXPANSIONS = 50
+MIN_TYPO_LENGTH = 4
+
+_TOKEN_RE = re.compile(r"[a-z0-9]+")
+
+
+def tokenize(text: str) -> List[str]:
+    return [t for t in _TOKEN_RE.findall(text.lower()) if t not in STOPWORDS]
+
+
+def _deletes(term: str) -> Set[str]:
+    """Every string obtained by removing one character from term"""
+    return {term[:i] + term[i + 1:] for i in range(len(term))}
+
+
+def _within_one_edit(a: str, b: str) -> bool:
+    """True if a and b differ by one insertion, deletion, substitution or adjacent swap"""
+    if a == b:
+        return True
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    if la == lb:
+        diff = [i for i in range(la) if a[i] != b[i]]
+        if len(diff) == 1:
+            return True
+        return len(diff) == 2 and diff[1] == diff[0] + 1 and a[diff[0]] == b[diff[1]] and a[diff[1]] == b[diff[0]]
+    if la > lb:
+        a, b = b, a
+    # b is one character longer than a
+    i = 0
+    while i < len(a) and a[i] == b[i]:
+        i += 1
+    return a[i:] == b[i + 1:]
+
+
+class ProductSearchIndex:
+    def __init__(self):
+        self._reset()
+        # Opaque marker of the catalog state the index reflects
+        self.version: Any = None
+
+    def _reset(self):
+        # term -> {product id -> field-weighted term frequency}
+        self._postings: Dict[str, Dict[str, float]] = defaultdict(dict)
+        # product id -> terms it contributed, so it can be removed again
+        self._doc_terms: Dict[str, Set[str]] = {}
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        # Sorted vocabulary for prefix lookups
+        self._vocabulary: List[str] = []
+        # one-character deletion (or the term itself) -> terms
+        self._typo_table: Dict[str, Set[str]] = defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self.docs)
+
+    def rebuild(self, docs: Iterable[Dict[str, Any]], version: Any = None):
+        self._reset()
+        for doc in docs:
+            self.add(doc)
+        self.version = version
+
+    def add(self, doc: Dict[str, Any]):
+        """Index a product, replacing any previous version of it"""
+        product_id = doc.get("id")
+        if not product_id:
+            return
+        self.remove(product_id)
+        weights: Dict[str, float] = defaultdict(float)
+        for field, weight in FIELD_WEIGHTS.items():
+            value = doc.get(field)
+            if isinstance(value, list):
+                value = " ".join(str(v) for v in value)
+            if not value:
+                continue
+            for term in tokenize(str(value)):
+                weights[term] += weight
+        for term, tf in weights.items():
+            if not self._postings.get(term):
+                self._add_term(term)
+            # Dampen repetition so long descriptions don't swamp names
+            self._postings[term][product_id] = 1 + math.log(tf)
+        self._doc_terms[product_id] = set(weights)
+        self.docs[product_id] = doc
+
+    def remove(self, product_id: str):
+        terms = self._doc_terms.pop(product_id, None)
+        if terms is None:
+            return
+        self.docs.pop(product_id, None)
+        for term in terms:
+            postings = self._postings.get(term)
+            if postings is None:
+                continue
+            postings.pop(product_id, None)
+            if not postings:
+                del self._postings[term]
+                self._remove_term(term)
+
+    def _add_term(self, term: str):
+        insort(self._vocabulary, term)
+        for variant in _deletes(term) | {term}:
+            self._typo_table[variant].add(term)
+
+    def _remove_term(self, term: str):
+        i = bisect_left(self._vocabulary, term)
+        if i < len(self._vocabulary) and self._vocabulary[i] == term:
+            del self._vocabulary[i]
+        for variant in _deletes(term) | {term}:
+            terms = self._typo_table.get(variant)
+            if terms is not None:
+                terms.discard(term)
+                if not terms:
+                    del self._typo_table[variant]
+
+    def _expand(self, token: str, prefix: bool) -> Dict[str, float]:
+        """Index terms matching token, with the factor applied to their score"""
+        matches: Dict[str, float] = {}
+        if token in self._postings:
+            matches[token] = 1.0
+        if prefix:
+            i = bisect_left(self._vocabulary, token)
+            while i < len(self._vocabulary) and len(matches) < MAX_PREFIX_EXPANSIONS:
+                term = self._vocabulary[i]
+                if not term.startswith(token):
+                    break
+                matches.setdefault(term, PREFIX_FACTOR)
+                i += 1
+        if len(token) >= MIN_TYPO_LENGTH:
+            candidates: Set[str] = set()
+            for variant in _deletes(token) | {token}:
+                candidates |= self._typo_table.get(variant, set())
+            for term in candidates:
+                if term not in matches and _within_one_edit(token, term):
+                    matches[term] = TYPO_FACTOR
+        return matches
+
+    def search(self, query: str, limit: int = 20, prefix: bool = True) -> List[Tuple[str, float]]:
+        """Rank products matching every query word; returns (product id, score)
+
+        The last word also matches as a prefix when prefix is True.
+        """
+        tokens = tokenize(query)
+        if not tokens or not self.docs:
+            return []
+        total = len(self.docs)
+        scores: Optional[Dict[str, float]] = None
+        for position, token in enumerate(tokens):
+            token_scores: Dict[str, float] = {}
+            expansions = self._expand(token, prefix and position == len(tokens) - 1)
+            for term, factor in expansions.items():
+                postings = self._postings[term]
+                idf = math.log(1 + total / len(postings))
+                for product_id, tf in postings.items():
+                    score = factor * idf * tf
+                    if score > token_scores.get(product_id, 0.0):
+                        token_scores[product_id] = score
+            if scores is None:
+                scores = token_scores
+            else:
+                scores = {pid: s + token_scores[pid] for pid, s in scores.items() if pid in token_scores}
+            if not scores:
+                return []
+        ranked = sorted(scores.items(), key=lambda item: (-item[1], self.docs[item[0]].get("name", "")))
+        return ranked[:limit]
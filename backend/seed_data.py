@@ -1,5 +1,23 @@
 # Seed Data for DryFruto - Extracted from Production
-# This file contains the seed data used by the "Seed Initial Data" button in admin panel
+# This file contains the seed data used by the "Seed Initial Data" button in admin panel,
+# and a generator for large synthetic datasets (see the end of the file)
+
+import argparse
+import asyncio
+import itertools
+import logging
+import os
+import random
+import sys
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Dict, Iterator
+
+from pymongo.errors import BulkWriteError
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
 
 LOGO_URL = "https://customer-assets.emergentagent.com/job_70b8c44d-b0eb-46ab-b798-c90870274405/artifacts/5olvlaa7_WhatsApp%20Image%202025-12-26%20at%2013.46.33.jpeg"
 
@@ -116,3 +134,331 @@ SEED_GIFT_BOXES = [
     {"id": "gift-5", "name": "Anniversary Special", "image": "https://images.pexels.com/photos/5945759/pexels-photo-5945759.jpeg?auto=compress&cs=tinysrgb&w=500", "price": 2999.0},
     {"id": "gift-6", "name": "Diwali Gift Box", "image": "https://images.pexels.com/photos/4033321/pexels-photo-4033321.jpeg?auto=compress&cs=tinysrgb&w=500", "price": 1799.0}
 ]
+
+
+# Synthetic data generator
+#
+# generate() builds a catalog and submission history of any size, for
+# reproducing how the site behaves with 10k-1M products. The same scale and
+# seed always produce the same documents: every collection draws from its
+# own random stream, and timestamps count back from GENERATED_UNTIL rather
+# than from the current time. Documents are yielded lazily, so a million
+# products are never all in memory.
+#
+#   python seed_data.py --scale 100 --seed 7     # 100k products into DB_NAME
+#
+# /api/seed-data?scale=&seed= runs the same generator (admin token required).
+# Generated submissions carry ids starting with GENERATED_PREFIX. Re-seeding
+# replaces those and leaves real customer submissions alone.
+
+GENERATED_PREFIX = "gen-"
+GENERATED_UNTIL = datetime(2025, 12, 31, tzinfo=timezone.utc)
+GENERATED_SPAN_DAYS = 730
+
+# Documents per unit of scale; scale 1 is a 1,000 product shop
+SCALE_UNIT = {
+    "products": 1000,
+    "testimonials": 20,
+    "bulk_orders": 200,
+    "newsletter": 2000,
+    "status_checks": 500,
+}
+
+CATALOG_OUTPUT = ("categories", "products", "testimonials")
+SUBMISSION_OUTPUT = ("bulk_orders", "newsletter", "status_checks")
+
+# Product types per seed category slug, with a plausible price per 100g
+PRODUCT_TYPES = {
+    "nuts-dry-fruits": [("Almonds", 145), ("Cashews", 185), ("Walnuts", 250), ("Pistachios", 195),
+                        ("Raisins", 85), ("Dried Fig", 220), ("Apricots", 160), ("Hazelnuts", 290),
+                        ("Brazil Nuts", 310), ("Pecans", 340), ("Macadamia", 420), ("Pine Nuts", 650)],
+    "dates": [("Medjool Dates", 320), ("Ajwa Dates", 380), ("Kimia Dates", 150), ("Safawi Dates", 240)],
+    "mix-dry-fruits": [("Mix dry fruits", 165), ("Trail Mix", 140), ("Berry Mix", 190)],
+    "makhana": [("Makhana", 175), ("Flavoured Makhana", 195)],
+    "seeds": [("Pumpkin Seeds", 125), ("Sunflower Seeds", 95), ("Chia Seeds", 110), ("Flax Seeds", 60),
+              ("Watermelon Seeds", 130), ("Melon Seeds", 140)],
+    "gift-boxes": [("Gift Box", 450), ("Festive Hamper", 600)],
+}
+
+ORIGINS = ["California", "Kashmiri", "Afghan", "Iranian", "Turkish", "Kerala", "Goan", "Omani",
+           "Saudi", "Chilean", "Australian", "Himalayan", "Bihar", "Rajasthani", "Mediterranean"]
+QUALITIES = ["Premium", "Select", "Jumbo", "Classic", "Royal", "Organic", "Handpicked", "Farm Fresh", "Gold", "Everyday"]
+PREPARATIONS = ["Raw", "Roasted", "Salted", "Lightly Salted", "Honey Glazed", "Peri Peri", "Unsalted", "Whole", "Kernels", "Halves"]
+
+BENEFITS = [
+    "Rich in Vitamin E", "Supports heart health", "High protein content", "Source of magnesium",
+    "Promotes brain function", "Supports bone health", "Plant protein source", "Heart-healthy fats",
+    "Omega-3 fatty acids", "Natural iron source", "Boosts energy", "Digestive health",
+    "Excellent protein source", "Rich in fiber", "Eye health", "Low calorie snack",
+    "Rich in calcium", "Source of zinc", "Sleep quality", "Selenium for immunity",
+    "Healthy skin", "Natural energy", "Rich in potassium", "Antioxidant rich",
+]
+FEATURES = ["Healthy Heart", "High Nutrition", "Gluten Free", "Cholesterol Free", "Vegan", "No Added Sugar"]
+
+# Pack size -> (grams, discount against the per-100g price)
+PACK_SIZES = {"100g": (100, 1.0), "250g": (250, 0.96), "500g": (500, 0.92), "1kg": (1000, 0.88)}
+
+FIRST_NAMES = ["Aarav", "Priya", "Rajesh", "Anita", "Mohammed", "Sunita", "Vikram", "Neha", "Arjun", "Kavya",
+               "Rohan", "Meera", "Imran", "Pooja", "Sanjay", "Divya", "Karan", "Fatima", "Rahul", "Sneha",
+               "Amit", "Lakshmi", "Harpreet", "Zoya", "Deepak", "Ananya", "Suresh", "Ritu", "Joseph", "Nisha"]
+LAST_NAMES = ["Sharma", "Kumar", "Patel", "Ali", "Verma", "Singh", "Gupta", "Reddy", "Nair", "Iyer",
+              "Khan", "Mehta", "Joshi", "Das", "Chopra", "Bose", "Menon", "Rao", "Fernandes", "Agarwal"]
+COMPANY_SUFFIXES = ["Traders", "Foods", "Enterprises", "Sweets", "Caterers", "Retail", "Exports", "Hotels"]
+# Reserved for documentation (RFC 2606), so no real subscriber uses them
+EMAIL_DOMAINS = ["example.com", "example.org", "example.net", "mail.example.net"]
+CITIES = ["Mumbai", "Delhi", "Bengaluru", "Hyderabad", "Chennai", "Kolkata", "Pune", "Jaipur", "Lucknow", "Kochi"]
+
+REVIEW_OPENINGS = ["Excellent quality", "Really fresh", "Great value", "Superb taste", "Lovely packaging", "Consistently good"]
+REVIEW_DETAILS = [
+    "The {product} were crunchy and full of flavour.",
+    "Ordered {product} for the family and everyone loved them.",
+    "Delivery to {city} was quick and the {product} arrived well sealed.",
+    "The {product} taste just like the ones we buy at the farm.",
+    "Bought {product} as festival gifts and got many compliments.",
+]
+REVIEW_CLOSINGS = ["Will order again!", "Highly recommended.", "Five stars.", "My go-to shop now.", ""]
+
+BULK_STATUSES = [("new", 5), ("contacted", 3), ("completed", 2)]
+BULK_MESSAGES = [
+    "", "Need samples before confirming.", "Monthly supply required for our outlets.",
+    "Please share rates for custom branded packs.", "Required before the festive season.",
+    "Looking for a long term contract.",
+]
+
+
+def scaled_counts(scale: float) -> Dict[str, int]:
+    """Documents per collection for a scale factor"""
+    counts = {name: max(1, round(unit * scale)) for name, unit in SCALE_UNIT.items()}
+    # Categories grow much slower than products; the seed six always come first
+    counts["categories"] = len(SEED_CATEGORIES) + round(4 * scale ** 0.5)
+    return counts
+
+
+def _rng(seed: int, collection: str) -> random.Random:
+    return random.Random(f"{seed}:{collection}")
+
+
+def _timestamp(rng: random.Random) -> str:
+    offset = timedelta(seconds=rng.randrange(GENERATED_SPAN_DAYS * 86400))
+    return (GENERATED_UNTIL - offset).isoformat()
+
+
+def _slugify(text: str) -> str:
+    return "-".join("".join(ch if ch.isalnum() else " " for ch in text.lower()).split())
+
+
+def _images_by_category() -> Dict[str, list]:
+    images: Dict[str, list] = {}
+    for product in SEED_PRODUCTS:
+        images.setdefault(product["category"], []).extend(product["images"])
+    fallback = [url for urls in images.values() for url in urls]
+    for category in SEED_CATEGORIES:
+        images.setdefault(category["slug"], [category["image"]] if category["image"] else fallback)
+    return images
+
+
+def _category_plan(count: int, seed: int):
+    """(category, slug of the seed category it sells like) pairs"""
+    rng = _rng(seed, "categories")
+    plan = [(dict(category), category["slug"]) for category in SEED_CATEGORIES[:count]]
+    for i in range(count - len(SEED_CATEGORIES)):
+        parent = rng.choice(SEED_CATEGORIES)
+        name = f"{rng.choice(ORIGINS)} {parent['name']}"
+        category = {
+            "id": f"{GENERATED_PREFIX}cat-{i}",
+            "name": name,
+            "slug": f"{_slugify(name)}-{i}",
+            "image": parent["image"],
+            "icon": parent["icon"],
+        }
+        plan.append((category, parent["slug"]))
+    return plan
+
+
+def generate_categories(count: int, seed: int) -> Iterator[dict]:
+    for category, _ in _category_plan(count, seed):
+        yield category
+
+
+def generate_products(count: int, seed: int, category_count: int = len(SEED_CATEGORIES)) -> Iterator[dict]:
+    rng = _rng(seed, "products")
+    images = _images_by_category()
+    plan = [(category["slug"], kind) for category, kind in _category_plan(category_count, seed) if kind in PRODUCT_TYPES]
+    for i in range(count):
+        category, kind = rng.choice(plan)
+        product_type, price = rng.choice(PRODUCT_TYPES[kind])
+        origin = rng.choice(ORIGINS)
+        name = f"{rng.choice(QUALITIES)} {origin} {product_type} {rng.choice(PREPARATIONS)}"
+        base_price = round(price * rng.uniform(0.75, 1.4), 0)
+        gallery = rng.sample(images[kind], min(len(images[kind]), rng.randint(1, 3)))
+        benefits = rng.sample(BENEFITS, rng.randint(2, 5))
+        yield {
+            "id": f"{GENERATED_PREFIX}prod-{i}",
+            "name": name,
+            "slug": f"{_slugify(name)}-{i}",
+            "category": category,
+            "type": product_type,
+            "basePrice": base_price,
+            "image": gallery[0],
+            "images": gallery,
+            "sku": f"GEN{i:07d}",
+            "shortDescription": f"{name.split(' ', 1)[1]}, {benefits[0].lower()}.",
+            "description": f"Our {name} are sourced from {origin} growers and packed fresh. {' '.join(b + '.' for b in benefits)}",
+            "benefits": benefits,
+            "features": rng.sample(FEATURES, rng.randint(2, 4)),
+            "priceVariants": {
+                size: round(base_price * grams / 100 * discount)
+                for size, (grams, discount) in PACK_SIZES.items()
+            },
+        }
+
+
+def _person(rng: random.Random):
+    return rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+
+
+def generate_testimonials(count: int, seed: int) -> Iterator[dict]:
+    rng = _rng(seed, "testimonials")
+    avatars = [testimonial["avatar"] for testimonial in SEED_TESTIMONIALS]
+    products = [product_type.lower() for types in PRODUCT_TYPES.values() for product_type, _ in types]
+    for i in range(count):
+        first, last = _person(rng)
+        detail = rng.choice(REVIEW_DETAILS).format(product=rng.choice(products), city=rng.choice(CITIES))
+        review = " ".join(part for part in (f"{rng.choice(REVIEW_OPENINGS)}!", detail, rng.choice(REVIEW_CLOSINGS)) if part)
+        yield {
+            "id": f"{GENERATED_PREFIX}test-{i}",
+            "name": f"{first} {last}",
+            "review": review,
+            "avatar": rng.choice(avatars),
+        }
+
+
+def generate_bulk_orders(count: int, seed: int) -> Iterator[dict]:
+    rng = _rng(seed, "bulk_orders")
+    product_types = SEED_SITE_SETTINGS["bulkOrderProductTypes"]
+    statuses, weights = zip(*BULK_STATUSES)
+    for i in range(count):
+        first, last = _person(rng)
+        company = f"{last} {rng.choice(COMPANY_SUFFIXES)}" if rng.random() < 0.8 else ""
+        yield {
+            "id": f"{GENERATED_PREFIX}bulk-{i}",
+            "name": f"{first} {last}",
+            "company": company,
+            "email": f"{first}.{last}.{i}@{rng.choice(EMAIL_DOMAINS)}".lower(),
+            "phone": f"{rng.choice('6789')}{rng.randrange(10 ** 9):09d}",
+            "productType": rng.choice(product_types),
+            "quantity": f"{rng.choice((10, 25, 50, 100, 250, 500, 1000))} kg",
+            "message": rng.choice(BULK_MESSAGES),
+            "createdAt": _timestamp(rng),
+            "status": rng.choices(statuses, weights)[0],
+        }
+
+
+def generate_newsletter(count: int, seed: int) -> Iterator[dict]:
+    rng = _rng(seed, "newsletter")
+    for i in range(count):
+        first, last = _person(rng)
+        yield {
+            "id": f"{GENERATED_PREFIX}news-{i}",
+            # The index keeps emails unique, so each one carries its row number
+            "email": f"{first}{rng.choice(('.', '_', ''))}{last}{i}@{rng.choice(EMAIL_DOMAINS)}".lower(),
+            "createdAt": _timestamp(rng),
+        }
+
+
+def generate_status_checks(count: int, seed: int) -> Iterator[dict]:
+    rng = _rng(seed, "status_checks")
+    for i in range(count):
+        yield {
+            "id": f"{GENERATED_PREFIX}status-{i}",
+            "client_name": f"client-{rng.randrange(50)}",
+            "timestamp": _timestamp(rng),
+        }
+
+
+GENERATORS = {
+    "categories": generate_categories,
+    "products": generate_products,
+    "testimonials": generate_testimonials,
+    "bulk_orders": generate_bulk_orders,
+    "newsletter": generate_newsletter,
+    "status_checks": generate_status_checks,
+}
+
+
+def generate(scale: float, seed: int = 0) -> Dict[str, Iterator[dict]]:
+    """Lazy document streams per collection for a scale factor and seed"""
+    counts = scaled_counts(scale)
+    # Products are spread over the generated categories, so they need that count too
+    options = {"products": {"category_count": counts["categories"]}}
+    return {name: generator(counts[name], seed, **options.get(name, {})) for name, generator in GENERATORS.items()}
+
+
+async def insert_generated(db, scale: float, seed: int = 0, batch_size: int = 1000) -> Dict[str, int]:
+    """Replace the catalog and the generated submissions with generated data
+
+    Catalog collections are cleared; in the submission collections only
+    rows with generated ids are removed. Generated rows that collide with a
+    kept row on a unique index (a real subscriber's email) are skipped and
+    logged. Returns documents inserted per collection.
+    """
+    inserted = {}
+    for name, docs in generate(scale, seed).items():
+        collection = db[name]
+        if name in CATALOG_OUTPUT:
+            await collection.delete_many({})
+        else:
+            await collection.delete_many({"id": {"$regex": f"^{GENERATED_PREFIX}"}})
+        inserted[name] = skipped = 0
+        while True:
+            batch = list(itertools.islice(docs, batch_size))
+            if not batch:
+                break
+            try:
+                await collection.insert_many(batch, ordered=False)
+                inserted[name] += len(batch)
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != DUPLICATE_KEY for error in errors):
+                    raise
+                inserted[name] += e.details.get("nInserted", 0)
+                skipped += len(errors)
+        if skipped:
+            logger.warning(f"Skipped {skipped} generated {name} rows that duplicate existing ones")
+    return inserted
+
+
+async def publish_catalog_change(db):
+    """Bump the shared catalog versions so running workers drop their cached catalog (see cache_bus.py)"""
+    from cache_bus import CacheInvalidationBus
+    from catalog_cache import CatalogCache
+
+    # The bus creates the versions document (with its epoch) if no worker has yet
+    await CacheInvalidationBus(db, CatalogCache(CATALOG_OUTPUT)).publish(*CATALOG_OUTPUT)
+
+
+async def _main(scale: float, seed: int, batch_size: int) -> int:
+    from dotenv import load_dotenv
+    from motor.motor_asyncio import AsyncIOMotorClient
+
+    load_dotenv(Path(__file__).parent / '.env')
+    client = AsyncIOMotorClient(os.environ['MONGO_URL'])
+    db = client[os.environ['DB_NAME']]
+    try:
+        inserted = await insert_generated(db, scale, seed, batch_size)
+        await publish_catalog_change(db)
+        for name, count in inserted.items():
+            print(f"{name}: {count}")
+        return 0
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load generated DryFruto data (replaces the catalog)")
+    parser.add_argument("--scale", type=float, default=1.0, help=f"size factor; 1 is {SCALE_UNIT['products']} products")
+    parser.add_argument("--seed", type=int, default=0, help="random seed; the same seed gives the same data")
+    parser.add_argument("--batch-size", type=int, default=1000, help="documents per insert_many")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    sys.exit(asyncio.run(_main(args.scale, args.seed, args.batch_size)))
@@ -1,14 +1,37 @@
-from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, HTTPException, UploadFile, File, Form, Depends, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from bson import ObjectId
+from bson.errors import InvalidId
+from catalog_cache import CatalogCache
+from cache_bus import CacheInvalidationBus
+from indexes import INDEXES, create_collection_indexes, ensure_indexes
+from search_index import ProductSearchIndex
+from json_stream import ITEM, VALUE, compress_chunks, iter_events, iter_json_object, iter_upload, scan_keys
+from fast_json import FastJSONResponse, MIN_COMPRESS_SIZE, apply_defaults, compress, dumps as dump_json, model_projection, negotiate_encoding, shape_documents
+from upload_store import UploadError, receive_upload
+from image_derivatives import FORMATS as IMAGE_FORMATS, DerivativeCache
+from file_responses import HotFileCache, etag_matches, serve_file
+from write_behind import WriteBehindQueue
+from metrics import HTTPMetrics, HTTPMetricsMiddleware, MongoCommandMetrics, render_metrics
+from slow_queries import SlowQueryLog
+from profiler import ProfilerMiddleware, SamplingProfiler
+from health import LoopLagMonitor, PoolMonitor
+from pymongo import ReplaceOne, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import os
+import re
+import asyncio
+import time
 import logging
 import json
+import csv
+import io
 from pathlib import Path
-from pydantic import BaseModel, Field, ConfigDict
+from pydantic import BaseModel, Field, ConfigDict, ValidationError
 from typing import List, Optional, Dict, Any
 import uuid
 from datetime import datetime, timezone, timedelta
@@ -20,9 +43,16 @@ import jwt
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
-# MongoDB connection
+# MongoDB connection; every command is timed for /api/metrics, slow ones
+# are recorded for /api/admin/slow-queries and pool usage feeds /api/health/deep
 mongo_url = os.environ['MONGO_URL']
-client = AsyncIOMotorClient(mongo_url)
+mongo_metrics = MongoCommandMetrics()
+slow_query_log = SlowQueryLog(
+    threshold_ms=float(os.environ.get('SLOW_QUERY_MS', 100)),
+    explain_rate=float(os.environ.get('SLOW_QUERY_EXPLAIN_RATE', 0.1))
+)
+pool_monitor = PoolMonitor()
+client = AsyncIOMotorClient(mongo_url, event_listeners=[mongo_metrics, slow_query_log, pool_monitor])
 db = client[os.environ['DB_NAME']]
 
 # JWT Configuration
@@ -408,6 +438,243 @@ class NewsletterSubscription(BaseModel):
     email: str
     createdAt: str = ""
 
+class BulkOrderPage(BaseModel):
+    items: List[BulkOrderSubmission]
+    nextCursor: Optional[str] = None
+
+class NewsletterPage(BaseModel):
+    items: List[NewsletterSubscription]
+    nextCursor: Optional[str] = None
+
+class ProductPage(BaseModel):
+    items: List[Product]
+    nextCursor: Optional[str] = None
+
+class SearchResults(BaseModel):
+    query: str
+    items: List[Product]
+
+class StorefrontPayload(BaseModel):
+    version: str
+    categories: List[Category]
+    products: List[Product]
+    productsTruncated: bool = False
+    heroSlides: List[HeroSlide]
+    testimonials: List[Testimonial]
+    giftBoxes: List[GiftBox]
+    siteSettings: SiteSettings
+
+# ============== CATALOG CACHE ==============
+
+# Collections served from the in-process catalog cache
+CATALOG_COLLECTIONS = ("categories", "products", "hero_slides", "testimonials", "gift_boxes", "site_settings")
+
+catalog_cache = CatalogCache(
+    CATALOG_COLLECTIONS,
+    ttl_seconds=float(os.environ.get('CATALOG_CACHE_TTL', 300)),
+    max_entries=int(os.environ.get('CATALOG_CACHE_MAX_ENTRIES', 256))
+)
+
+# Keeps the caches of all uvicorn workers in step (see cache_bus.py)
+cache_bus = CacheInvalidationBus(
+    db,
+    catalog_cache,
+    mode=os.environ.get('CACHE_BUS_MODE', 'poll'),
+    poll_interval=float(os.environ.get('CACHE_BUS_POLL_INTERVAL', 1.0))
+)
+
+# Response model of each cached catalog collection; reads return only its fields
+CATALOG_MODELS = {
+    "categories": Category,
+    "products": Product,
+    "hero_slides": HeroSlide,
+    "testimonials": Testimonial,
+    "gift_boxes": GiftBox,
+}
+
+# /admin/stats results, keyed on the catalog version so catalog writes on any
+# worker show at once; submissions clear only this worker's copy, so other
+# workers may show counts up to ADMIN_STATS_TTL old
+admin_stats_cache = CatalogCache((), ttl_seconds=float(os.environ.get('ADMIN_STATS_TTL', 15)), max_entries=8)
+
+async def mark_catalog_changed(*collections: str):
+    """Record an admin write so every worker reloads cached catalog data"""
+    admin_stats_cache.clear()
+    await cache_bus.publish(*collections)
+
+def catalog_version(deps=CATALOG_COLLECTIONS) -> str:
+    """Version string for the current state of the given collections"""
+    return f"{catalog_cache.epoch}-{'.'.join(map(str, catalog_cache.snapshot(deps)))}"
+
+async def cached_find(collection: str, limit: int) -> list:
+    """Read a whole catalog collection through the cache, shaped like its model"""
+    model = CATALOG_MODELS[collection]
+
+    async def load():
+        docs = await db[collection].find({}, model_projection(model)).to_list(limit)
+        return shape_documents(model, docs)
+
+    return await catalog_cache.get_or_load(collection, (collection,), load)
+
+async def catalog_response(request: Request, deps, load_body, key: Optional[str] = None) -> Response:
+    """JSON response validated by the catalog version of deps
+
+    The ETag is the version, so a matching If-None-Match gets a 304 before
+    anything is loaded. With a key, the encoded body and its gzip/brotli
+    variants are cached until one of deps changes; without one (per-item or
+    per-query responses) they are built for this request only.
+    """
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    version = catalog_version(deps)
+    headers = {
+        "ETag": f'"{version}-{encoding}"' if encoding else f'"{version}"',
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding",
+    }
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    
+    body = await (catalog_cache.get_or_load(key, deps, load_body) if key else load_body())
+    if encoding and len(body) >= MIN_COMPRESS_SIZE:
+        if key:
+            body = await catalog_cache.get_or_load(
+                f"{key}:{encoding}", deps, lambda: asyncio.to_thread(compress, body, encoding)
+            )
+        else:
+            body = compress(body, encoding)
+        headers["Content-Encoding"] = encoding
+    return FastJSONResponse(body, headers=headers)
+
+async def catalog_list_response(request: Request, collection: str, limit: int) -> Response:
+    """A whole catalog collection as a cached, conditional response"""
+    async def load():
+        return dump_json(await cached_find(collection, limit))
+
+    return await catalog_response(request, (collection,), load, key=f"{collection}:json")
+
+async def cached_site_settings() -> dict:
+    """Site settings document with defaults for any field not yet saved"""
+    async def load():
+        settings = await db.site_settings.find_one({"id": "site_settings"}, model_projection(SiteSettings))
+        return apply_defaults(SiteSettings, settings or {})
+
+    return await catalog_cache.get_or_load("site_settings", ("site_settings",), load)
+
+# Products embedded in /storefront; larger catalogs are cut off here and
+# flagged with productsTruncated (GET /products pages through all of them)
+STOREFRONT_PRODUCT_LIMIT = int(os.environ.get('STOREFRONT_PRODUCT_LIMIT', 1000))
+
+async def build_storefront_payload(version: str) -> bytes:
+    """Encode every storefront collection into one JSON document"""
+    categories, products, hero_slides, testimonials, gift_boxes, settings = await asyncio.gather(
+        cached_find("categories", 100),
+        # One extra document tells a full catalog from a truncated one
+        cached_find("products", STOREFRONT_PRODUCT_LIMIT + 1),
+        cached_find("hero_slides", 100),
+        cached_find("testimonials", 100),
+        cached_find("gift_boxes", 100),
+        cached_site_settings()
+    )
+    truncated = len(products) > STOREFRONT_PRODUCT_LIMIT
+    if truncated:
+        logging.warning(f"Storefront payload truncated to the first {STOREFRONT_PRODUCT_LIMIT} products (STOREFRONT_PRODUCT_LIMIT)")
+    return dump_json({
+        "version": version,
+        "categories": categories,
+        "products": products[:STOREFRONT_PRODUCT_LIMIT],
+        "productsTruncated": truncated,
+        "heroSlides": hero_slides,
+        "testimonials": testimonials,
+        "giftBoxes": gift_boxes,
+        "siteSettings": settings
+    })
+
+# ============== PRODUCT SEARCH ==============
+
+product_search = ProductSearchIndex()
+_search_rebuild_lock = asyncio.Lock()
+
+def search_index_version() -> tuple:
+    return (catalog_cache.epoch, catalog_cache.versions["products"])
+
+async def get_search_index() -> ProductSearchIndex:
+    """Return the search index, rebuilding it if products changed elsewhere
+
+    A rebuild fills a new index in a worker thread and then swaps it in, so
+    other requests keep being served while a large catalog is indexed.
+    """
+    global product_search
+    if product_search.version != search_index_version():
+        async with _search_rebuild_lock:
+            version = search_index_version()
+            if product_search.version != version:
+                docs = await db.products.find({}, model_projection(Product)).to_list(None)
+                fresh = ProductSearchIndex()
+                await asyncio.to_thread(fresh.rebuild, docs, version)
+                product_search = fresh
+    return product_search
+
+def update_search_index(before: tuple, product_id: str, doc: Optional[dict]):
+    """Apply a single product write to the index without a rebuild
+
+    Only possible when the index was current before the write and the write
+    was the only product change since; otherwise the next search rebuilds.
+    """
+    if product_search.version != before or search_index_version() != (before[0], before[1] + 1):
+        return
+    if doc:
+        product_search.add(doc)
+    else:
+        product_search.remove(product_id)
+    product_search.version = search_index_version()
+
+# ============== KEYSET PAGINATION ==============
+
+def encode_cursor(values: list) -> str:
+    """Opaque cursor holding the sort key values of the last item on a page"""
+    values = [str(v) if isinstance(v, ObjectId) else v for v in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str, sort: list) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()).decode())
+        if not isinstance(values, list) or len(values) != len(sort):
+            raise ValueError("cursor does not match sort")
+        # Only scalars: a document here would be read as query operators
+        if not all(v is None or isinstance(v, (str, int, float)) for v in values):
+            raise ValueError("cursor values must be scalars")
+        return [ObjectId(v) if field == "_id" else v for (field, _), v in zip(sort, values)]
+    except (ValueError, InvalidId, UnicodeDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+def keyset_filter(sort: list, values: list) -> dict:
+    """Match documents strictly after values in the given sort order"""
+    clauses = []
+    for i, (field, direction) in enumerate(sort):
+        clause = {f: v for (f, _), v in zip(sort[:i], values[:i])}
+        clause[field] = {"$gt" if direction == 1 else "$lt": values[i]}
+        clauses.append(clause)
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+async def find_page(collection, query: dict, sort: list, cursor: Optional[str], limit: int, projection: Optional[dict] = None):
+    """Fetch one keyset page; returns (items, next_cursor)
+
+    Sort keys must be part of the returned documents; _id is stripped afterwards.
+    """
+    if cursor:
+        after = keyset_filter(sort, decode_cursor(cursor, sort))
+        query = {"$and": [query, after]} if query else after
+    docs = await collection.find(query, projection).sort(sort).limit(limit + 1).to_list(limit + 1)
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor([docs[-1].get(field) for field, _ in sort])
+    for doc in docs:
+        doc.pop("_id", None)
+    return docs, next_cursor
+
 # ============== ROUTES ==============
 
 @api_router.get("/")
@@ -424,6 +691,74 @@ async def health_check():
     except Exception as e:
         return {"status": "unhealthy", "database": "disconnected", "error": str(e)}
 
+loop_lag_monitor = LoopLagMonitor(interval=float(os.environ.get('LOOP_LAG_INTERVAL', 0.5)))
+
+# Readiness thresholds for /health/deep
+HEALTH_MAX_LOOP_LAG_MS = float(os.environ.get('HEALTH_MAX_LOOP_LAG_MS', 200))
+HEALTH_MAX_PING_MS = float(os.environ.get('HEALTH_MAX_PING_MS', 1000))
+HEALTH_MAX_POOL_WAITING = int(os.environ.get('HEALTH_MAX_POOL_WAITING', 10))
+HEALTH_MAX_CHECKOUT_MS = float(os.environ.get('HEALTH_MAX_CHECKOUT_MS', 500))
+
+def max_pool_size() -> Optional[int]:
+    try:
+        return client.options.pool_options.max_pool_size
+    except AttributeError:
+        return None
+
+@api_router.get("/health/deep")
+async def deep_health_check():
+    """Readiness check: database round trip, event-loop lag and connection-pool saturation
+
+    Answers 503 while any of them is over its threshold, so a load balancer
+    can stop routing to a saturated worker. /health stays the cheap liveness check.
+    """
+    failing = []
+    start = time.perf_counter()
+    try:
+        await asyncio.wait_for(db.command("ping"), timeout=HEALTH_MAX_PING_MS / 1000 * 5)
+        ping_ms = round((time.perf_counter() - start) * 1000, 2)
+        database = {"status": "connected", "pingMs": ping_ms}
+        if ping_ms > HEALTH_MAX_PING_MS:
+            failing.append("database")
+    except Exception as e:
+        database = {"status": "disconnected", "error": str(e) or type(e).__name__}
+        failing.append("database")
+
+    loop = loop_lag_monitor.stats()
+    if loop["recentMs"] > HEALTH_MAX_LOOP_LAG_MS:
+        failing.append("eventLoop")
+    pool = pool_monitor.stats(max_pool_size())
+    if pool["waiting"] > HEALTH_MAX_POOL_WAITING or pool["checkoutP95Ms"] > HEALTH_MAX_CHECKOUT_MS:
+        failing.append("connectionPool")
+
+    body = {
+        "status": "degraded" if failing else "ready",
+        "failing": failing,
+        "database": database,
+        "eventLoop": loop,
+        "connectionPool": pool,
+        "writeBehind": write_behind.stats(),
+        "thresholds": {
+            "loopLagMs": HEALTH_MAX_LOOP_LAG_MS,
+            "pingMs": HEALTH_MAX_PING_MS,
+            "poolWaiting": HEALTH_MAX_POOL_WAITING,
+            "checkoutP95Ms": HEALTH_MAX_CHECKOUT_MS,
+        },
+    }
+    return JSONResponse(body, status_code=503 if failing else 200)
+
+# ----- Metrics Route -----
+http_metrics = HTTPMetrics()
+# Prometheus scrapers send this as a bearer token; unset leaves /metrics open
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+
+@api_router.get("/metrics", include_in_schema=False)
+async def get_metrics(credentials: HTTPAuthorizationCredentials = Depends(security)):
+    """Per-route request and MongoDB command metrics in Prometheus text format"""
+    if METRICS_TOKEN and not (credentials and secrets.compare_digest(credentials.credentials, METRICS_TOKEN)):
+        raise HTTPException(status_code=401, detail="Invalid metrics token")
+    return Response(render_metrics(http_metrics, mongo_metrics), media_type="text/plain; version=0.0.4; charset=utf-8")
+
 # ============== AUTH ROUTES ==============
 
 @api_router.post("/auth/login", response_model=LoginResponse)
@@ -522,7 +857,7 @@ async def create_status_check(input: StatusCheckCreate):
     status_obj = StatusCheck(**status_dict)
     doc = status_obj.model_dump()
     doc['timestamp'] = doc['timestamp'].isoformat()
-    _ = await db.status_checks.insert_one(doc)
+    await write_behind.submit("status_checks", doc)
     return status_obj
 
 @api_router.get("/status", response_model=List[StatusCheck])
@@ -535,14 +870,14 @@ async def get_status_checks():
 
 # ----- Category Routes -----
 @api_router.get("/categories", response_model=List[Category])
-async def get_categories():
-    categories = await db.categories.find({}, {"_id": 0}).to_list(100)
-    return categories
+async def get_categories(request: Request):
+    return await catalog_list_response(request, "categories", 100)
 
 @api_router.post("/categories", response_model=Category)
 async def create_category(category: CategoryCreate):
     category_obj = Category(**category.model_dump())
     await db.categories.insert_one(category_obj.model_dump())
+    await mark_catalog_changed("categories")
     return category_obj
 
 @api_router.put("/categories/{category_id}", response_model=Category)
@@ -553,6 +888,7 @@ async def update_category(category_id: str, category: CategoryUpdate):
     result = await db.categories.update_one({"id": category_id}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
+    await mark_catalog_changed("categories")
     updated = await db.categories.find_one({"id": category_id}, {"_id": 0})
     return Category(**updated)
 
@@ -561,25 +897,72 @@ async def delete_category(category_id: str):
     result = await db.categories.delete_one({"id": category_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Category not found")
+    await mark_catalog_changed("categories")
     return {"message": "Category deleted"}
 
 # ----- Product Routes -----
-@api_router.get("/products", response_model=List[Product])
-async def get_products():
-    products = await db.products.find({}, {"_id": 0}).to_list(1000)
-    return products
+# Sort keys accepted by /products; the trailing unique field makes the order total
+PRODUCT_SORTS = {
+    "default": [("_id", 1)],
+    "name": [("name", 1), ("id", 1)],
+    "price-low": [("basePrice", 1), ("id", 1)],
+    "price-high": [("basePrice", -1), ("id", -1)],
+}
+
+@api_router.get("/products", response_model=ProductPage)
+async def get_products(
+    request: Request,
+    category: Optional[str] = None,
+    product_type: Optional[str] = Query(None, alias="type"),
+    minPrice: Optional[float] = Query(None, ge=0),
+    maxPrice: Optional[float] = Query(None, ge=0),
+    sort: str = "default",
+    cursor: Optional[str] = None,
+    limit: int = Query(24, ge=1, le=100)
+):
+    """Filtered, sorted product listing paginated by cursor"""
+    if sort not in PRODUCT_SORTS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort. Use one of: {', '.join(PRODUCT_SORTS)}")
+    query = {}
+    if category:
+        query["category"] = category
+    if product_type:
+        query["type"] = product_type
+    if minPrice is not None or maxPrice is not None:
+        query["basePrice"] = {}
+        if minPrice is not None:
+            query["basePrice"]["$gte"] = minPrice
+        if maxPrice is not None:
+            query["basePrice"]["$lte"] = maxPrice
+    sort_spec = PRODUCT_SORTS[sort]
+    projection = model_projection(Product)
+    if sort_spec[0][0] == "_id":
+        projection = {**projection, "_id": 1}
+
+    async def load_page():
+        items, next_cursor = await find_page(db.products, query, sort_spec, cursor, limit, projection)
+        return dump_json({"items": shape_documents(Product, items), "nextCursor": next_cursor})
+
+    key = "products:" + json.dumps([category, product_type, minPrice, maxPrice, sort, cursor, limit])
+    return await catalog_response(request, ("products",), load_page, key=key)
 
 @api_router.get("/products/{product_id}", response_model=Product)
-async def get_product(product_id: str):
-    product = await db.products.find_one({"id": product_id}, {"_id": 0})
-    if not product:
-        raise HTTPException(status_code=404, detail="Product not found")
-    return Product(**product)
+async def get_product(request: Request, product_id: str):
+    async def load():
+        product = await db.products.find_one({"id": product_id}, model_projection(Product))
+        if not product:
+            raise HTTPException(status_code=404, detail="Product not found")
+        return dump_json(apply_defaults(Product, product))
+
+    return await catalog_response(request, ("products",), load)
 
 @api_router.post("/products", response_model=Product)
 async def create_product(product: ProductCreate):
+    index_version = search_index_version()
     product_obj = Product(**product.model_dump())
     await db.products.insert_one(product_obj.model_dump())
+    await mark_catalog_changed("products")
+    update_search_index(index_version, product_obj.id, product_obj.model_dump())
     return product_obj
 
 @api_router.put("/products/{product_id}", response_model=Product)
@@ -587,29 +970,50 @@ async def update_product(product_id: str, product: ProductUpdate):
     update_data = {k: v for k, v in product.model_dump().items() if v is not None}
     if not update_data:
         raise HTTPException(status_code=400, detail="No data to update")
+    index_version = search_index_version()
     result = await db.products.update_one({"id": product_id}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
-    updated = await db.products.find_one({"id": product_id}, {"_id": 0})
+    await mark_catalog_changed("products")
+    updated = await db.products.find_one({"id": product_id}, model_projection(Product))
+    update_search_index(index_version, product_id, updated)
     return Product(**updated)
 
 @api_router.delete("/products/{product_id}")
 async def delete_product(product_id: str):
+    index_version = search_index_version()
     result = await db.products.delete_one({"id": product_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Product not found")
+    await mark_catalog_changed("products")
+    update_search_index(index_version, product_id, None)
     return {"message": "Product deleted"}
 
+# ----- Search Route -----
+@api_router.get("/search", response_model=SearchResults)
+async def search_products(
+    request: Request,
+    q: str = Query(..., min_length=1, max_length=100),
+    limit: int = Query(20, ge=1, le=50)
+):
+    """Ranked product search with prefix matching on the last word and typo tolerance"""
+    async def load():
+        index = await get_search_index()
+        hits = index.search(q, limit)
+        return dump_json({"query": q, "items": shape_documents(Product, [index.docs[pid] for pid, _ in hits])})
+
+    return await catalog_response(request, ("products",), load)
+
 # ----- Hero Slide Routes -----
 @api_router.get("/hero-slides", response_model=List[HeroSlide])
-async def get_hero_slides():
-    slides = await db.hero_slides.find({}, {"_id": 0}).to_list(100)
-    return slides
+async def get_hero_slides(request: Request):
+    return await catalog_list_response(request, "hero_slides", 100)
 
 @api_router.post("/hero-slides", response_model=HeroSlide)
 async def create_hero_slide(slide: HeroSlideCreate):
     slide_obj = HeroSlide(**slide.model_dump())
     await db.hero_slides.insert_one(slide_obj.model_dump())
+    await mark_catalog_changed("hero_slides")
     return slide_obj
 
 @api_router.put("/hero-slides/{slide_id}", response_model=HeroSlide)
@@ -620,6 +1024,7 @@ async def update_hero_slide(slide_id: str, slide: HeroSlideUpdate):
     result = await db.hero_slides.update_one({"id": slide_id}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Hero slide not found")
+    await mark_catalog_changed("hero_slides")
     updated = await db.hero_slides.find_one({"id": slide_id}, {"_id": 0})
     return HeroSlide(**updated)
 
@@ -628,18 +1033,19 @@ async def delete_hero_slide(slide_id: str):
     result = await db.hero_slides.delete_one({"id": slide_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Hero slide not found")
+    await mark_catalog_changed("hero_slides")
     return {"message": "Hero slide deleted"}
 
 # ----- Testimonial Routes -----
 @api_router.get("/testimonials", response_model=List[Testimonial])
-async def get_testimonials():
-    testimonials = await db.testimonials.find({}, {"_id": 0}).to_list(100)
-    return testimonials
+async def get_testimonials(request: Request):
+    return await catalog_list_response(request, "testimonials", 100)
 
 @api_router.post("/testimonials", response_model=Testimonial)
 async def create_testimonial(testimonial: TestimonialCreate):
     testimonial_obj = Testimonial(**testimonial.model_dump())
     await db.testimonials.insert_one(testimonial_obj.model_dump())
+    await mark_catalog_changed("testimonials")
     return testimonial_obj
 
 @api_router.put("/testimonials/{testimonial_id}", response_model=Testimonial)
@@ -650,6 +1056,7 @@ async def update_testimonial(testimonial_id: str, testimonial: TestimonialUpdate
     result = await db.testimonials.update_one({"id": testimonial_id}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    await mark_catalog_changed("testimonials")
     updated = await db.testimonials.find_one({"id": testimonial_id}, {"_id": 0})
     return Testimonial(**updated)
 
@@ -658,18 +1065,19 @@ async def delete_testimonial(testimonial_id: str):
     result = await db.testimonials.delete_one({"id": testimonial_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Testimonial not found")
+    await mark_catalog_changed("testimonials")
     return {"message": "Testimonial deleted"}
 
 # ----- Gift Box Routes -----
 @api_router.get("/gift-boxes", response_model=List[GiftBox])
-async def get_gift_boxes():
-    gift_boxes = await db.gift_boxes.find({}, {"_id": 0}).to_list(100)
-    return gift_boxes
+async def get_gift_boxes(request: Request):
+    return await catalog_list_response(request, "gift_boxes", 100)
 
 @api_router.post("/gift-boxes", response_model=GiftBox)
 async def create_gift_box(gift_box: GiftBoxCreate):
     gift_box_obj = GiftBox(**gift_box.model_dump())
     await db.gift_boxes.insert_one(gift_box_obj.model_dump())
+    await mark_catalog_changed("gift_boxes")
     return gift_box_obj
 
 @api_router.put("/gift-boxes/{gift_box_id}", response_model=GiftBox)
@@ -680,6 +1088,7 @@ async def update_gift_box(gift_box_id: str, gift_box: GiftBoxUpdate):
     result = await db.gift_boxes.update_one({"id": gift_box_id}, {"$set": update_data})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Gift box not found")
+    await mark_catalog_changed("gift_boxes")
     updated = await db.gift_boxes.find_one({"id": gift_box_id}, {"_id": 0})
     return GiftBox(**updated)
 
@@ -688,15 +1097,16 @@ async def delete_gift_box(gift_box_id: str):
     result = await db.gift_boxes.delete_one({"id": gift_box_id})
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Gift box not found")
+    await mark_catalog_changed("gift_boxes")
     return {"message": "Gift box deleted"}
 
 # ----- Site Settings Routes -----
 @api_router.get("/site-settings", response_model=SiteSettings)
-async def get_site_settings():
-    settings = await db.site_settings.find_one({"id": "site_settings"}, {"_id": 0})
-    if not settings:
-        return SiteSettings()
-    return SiteSettings(**settings)
+async def get_site_settings(request: Request):
+    async def load():
+        return dump_json(await cached_site_settings())
+
+    return await catalog_response(request, ("site_settings",), load, key="site_settings:json")
 
 @api_router.put("/site-settings", response_model=SiteSettings)
 async def update_site_settings(settings: SiteSettingsUpdate):
@@ -710,13 +1120,163 @@ async def update_site_settings(settings: SiteSettingsUpdate):
         {"$set": update_data},
         upsert=True
     )
+    await mark_catalog_changed("site_settings")
     updated = await db.site_settings.find_one({"id": "site_settings"}, {"_id": 0})
     return SiteSettings(**updated)
 
+# ----- Storefront Route -----
+@api_router.get("/storefront", response_model=StorefrontPayload)
+async def get_storefront(request: Request):
+    """Everything the storefront needs on page load, in one precomputed payload"""
+    return await catalog_response(
+        request, CATALOG_COLLECTIONS,
+        lambda: build_storefront_payload(catalog_version()),
+        key="storefront"
+    )
+
+@api_router.get("/cache/stats")
+async def get_cache_stats(current_user: dict = Depends(get_current_user)):
+    """Catalog cache hit/miss counters and collection versions"""
+    return {**catalog_cache.stats(), "imageDerivatives": derivative_cache.stats(), "uploadMemoryCache": hot_file_cache.stats(), "writeBehind": write_behind.stats()}
+
+# ----- Admin Stats Route -----
+# Collections counted on the admin dashboard, keyed by their JSON name
+ADMIN_STATS_COLLECTIONS = {
+    "categories": "categories",
+    "products": "products",
+    "heroSlides": "hero_slides",
+    "testimonials": "testimonials",
+    "giftBoxes": "gift_boxes",
+    "bulkOrders": "bulk_orders",
+    "newsletter": "newsletter",
+}
+
+def submissions_per_day_pipeline(since: str) -> list:
+    """Submissions per day since a date, starting from the createdAt index"""
+    return [
+        # createdAt is a UTC ISO string: the range stays on the index and its first 10 (ASCII) bytes are the day
+        {"$match": {"createdAt": {"$gte": since}}},
+        {"$group": {"_id": {"$substr": ["$createdAt", 0, 10]}, "count": {"$sum": 1}}}
+    ]
+
+async def count_bulk_orders_by_status() -> dict:
+    """Bulk orders per status, one index count per status (a missing status counts as new)"""
+    statuses = {status for status in await db.bulk_orders.distinct("status") if status is not None} | {"new"}
+    filters = {status: {"status": {"$in": [None, "new"]} if status == "new" else status} for status in statuses}
+    counts = await asyncio.gather(*[db.bulk_orders.count_documents(query) for query in filters.values()])
+    return {status: count for status, count in zip(filters, counts) if count}
+
+async def compute_admin_stats(days: int) -> dict:
+    today = datetime.now(timezone.utc).date()
+    day_list = [(today - timedelta(days=offset)).isoformat() for offset in range(days - 1, -1, -1)]
+    # Totals come from collection metadata; only the date window is read from the createdAt indexes
+    counts, bulk_order_status, bulk_order_days, newsletter_days = await asyncio.gather(
+        asyncio.gather(*[db[name].estimated_document_count() for name in ADMIN_STATS_COLLECTIONS.values()]),
+        count_bulk_orders_by_status(),
+        db.bulk_orders.aggregate(submissions_per_day_pipeline(day_list[0])).to_list(None),
+        db.newsletter.aggregate(submissions_per_day_pipeline(day_list[0])).to_list(None),
+    )
+    
+    per_day = {day: {"date": day, "bulkOrders": 0, "newsletter": 0} for day in day_list}
+    for key, rows in (("bulkOrders", bulk_order_days), ("newsletter", newsletter_days)):
+        for row in rows:
+            entry = per_day.get(row["_id"])
+            if entry is not None:
+                entry[key] = row["count"]
+    
+    return {
+        "counts": dict(zip(ADMIN_STATS_COLLECTIONS, counts)),
+        "bulkOrderStatus": bulk_order_status,
+        "submissionsPerDay": list(per_day.values()),
+        "generatedAt": datetime.now(timezone.utc).isoformat()
+    }
+
+@api_router.get("/admin/stats")
+async def get_admin_stats(
+    days: int = Query(14, ge=1, le=90),
+    current_user: dict = Depends(get_current_user)
+):
+    """Dashboard counts, bulk orders per status and submissions per day"""
+    try:
+        key = f"admin_stats:{days}:{catalog_version()}"
+        return await admin_stats_cache.get_or_load(key, (), lambda: compute_admin_stats(days))
+    except Exception as e:
+        logging.error(f"Admin stats error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error computing stats: {str(e)}")
+
+# ----- Slow Query Routes -----
+@api_router.get("/admin/slow-queries")
+async def get_slow_queries(
+    limit: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(get_current_user)
+):
+    """Slowest query shapes by total time, with explain summaries and index suggestions"""
+    return {
+        "thresholdMs": slow_query_log.threshold_ms,
+        "shapes": slow_query_log.report(limit, declared=INDEXES),
+    }
+
+@api_router.delete("/admin/slow-queries")
+async def reset_slow_queries(current_user: dict = Depends(get_current_user)):
+    slow_query_log.reset()
+    return {"message": "Slow query log cleared"}
+
+# ----- Profiler Routes -----
+profiler = SamplingProfiler(
+    interval=float(os.environ.get('PROFILER_INTERVAL_MS', 5)) / 1000,
+    keep=int(os.environ.get('PROFILER_KEEP', 50)),
+    sample_rate=float(os.environ.get('PROFILER_SAMPLE_RATE', 0))
+)
+
+class ProfilerSettings(BaseModel):
+    sampleRate: float = Field(ge=0, le=1)
+
+@api_router.get("/admin/profiler")
+async def get_profiler(current_user: dict = Depends(get_current_user)):
+    """Profiler settings and the most recent request profiles, newest first"""
+    return {
+        "sampleRate": profiler.sample_rate,
+        "intervalMs": profiler.interval * 1000,
+        "profiles": profiler.summaries(),
+    }
+
+@api_router.put("/admin/profiler")
+async def update_profiler(settings: ProfilerSettings, current_user: dict = Depends(get_current_user)):
+    """Set the fraction of requests profiled (0 turns sampling off)"""
+    profiler.sample_rate = settings.sampleRate
+    return {"sampleRate": profiler.sample_rate}
+
+@api_router.get("/admin/profiler/{profile_id}")
+async def get_profile(
+    profile_id: str,
+    format: str = Query("json", pattern="^(json|collapsed)$"),
+    current_user: dict = Depends(get_current_user)
+):
+    """One request profile; format=collapsed returns flamegraph.pl / speedscope input"""
+    profile = profiler.get(profile_id)
+    if not profile:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    if format == "collapsed":
+        return Response(profile.collapsed(), media_type="text/plain; charset=utf-8")
+    return {**profile.summary(), "stacks": dict(profile.stacks.most_common())}
+
+@api_router.delete("/admin/profiler")
+async def clear_profiles(current_user: dict = Depends(get_current_user)):
+    profiler.profiles.clear()
+    return {"message": "Profiles cleared"}
+
 # ----- Seed Data Route -----
+SEED_MAX_SCALE = float(os.environ.get('SEED_MAX_SCALE', 100))
+
 @api_router.post("/seed-data")
-async def seed_data_endpoint():
-    """Reset database with seed data from seed_data.py"""
+async def seed_data_endpoint(
+    scale: Optional[float] = Query(None, gt=0, le=SEED_MAX_SCALE),
+    seed: int = 0,
+    credentials: HTTPAuthorizationCredentials = Depends(security)
+):
+    """Reset database with seed data from seed_data.py, or with generated data when scale is given"""
+    if scale is not None and not (credentials and verify_jwt_token(credentials.credentials)):
+        raise HTTPException(status_code=401, detail="Generated data requires an admin token")
     try:
         # Import seed data from seed_data.py
         from seed_data import (
@@ -725,7 +1285,8 @@ async def seed_data_endpoint():
             SEED_PRODUCTS,
             SEED_HERO_SLIDES,
             SEED_TESTIMONIALS,
-            SEED_GIFT_BOXES
+            SEED_GIFT_BOXES,
+            insert_generated
         )
         
         # Clear all collections
@@ -736,16 +1297,17 @@ async def seed_data_endpoint():
         await db.gift_boxes.delete_many({})
         
         # Insert all seed data
-        if SEED_CATEGORIES:
-            await db.categories.insert_many(SEED_CATEGORIES)
-        if SEED_PRODUCTS:
-            await db.products.insert_many(SEED_PRODUCTS)
+        if scale is None:
+            if SEED_CATEGORIES:
+                await db.categories.insert_many([dict(doc) for doc in SEED_CATEGORIES])
+            if SEED_PRODUCTS:
+                await db.products.insert_many([dict(doc) for doc in SEED_PRODUCTS])
+            if SEED_TESTIMONIALS:
+                await db.testimonials.insert_many([dict(doc) for doc in SEED_TESTIMONIALS])
         if SEED_HERO_SLIDES:
-            await db.hero_slides.insert_many(SEED_HERO_SLIDES)
-        if SEED_TESTIMONIALS:
-            await db.testimonials.insert_many(SEED_TESTIMONIALS)
+            await db.hero_slides.insert_many([dict(doc) for doc in SEED_HERO_SLIDES])
         if SEED_GIFT_BOXES:
-            await db.gift_boxes.insert_many(SEED_GIFT_BOXES)
+            await db.gift_boxes.insert_many([dict(doc) for doc in SEED_GIFT_BOXES])
         
         # Reset site settings
         await db.site_settings.update_one(
@@ -754,6 +1316,23 @@ async def seed_data_endpoint():
             upsert=True
         )
         
+        if scale is not None:
+            generated = await insert_generated(db, scale, seed)
+            logging.info(f"Generated data seeded via API (scale={scale}, seed={seed}): {generated}")
+            return {
+                "message": "Generated data seeded successfully",
+                "scale": scale,
+                "seed": seed,
+                "categories": generated["categories"],
+                "products": generated["products"],
+                "heroSlides": len(SEED_HERO_SLIDES),
+                "testimonials": generated["testimonials"],
+                "giftBoxes": len(SEED_GIFT_BOXES),
+                "bulkOrders": generated["bulk_orders"],
+                "newsletter": generated["newsletter"],
+                "statusChecks": generated["status_checks"]
+            }
+        
         logging.info("Data seeded successfully via API")
         
         return {
@@ -770,6 +1349,9 @@ async def seed_data_endpoint():
     except Exception as e:
         logging.error(f"Seed data error: {e}")
         raise HTTPException(status_code=500, detail=f"Error seeding data: {str(e)}")
+    finally:
+        # Even a partial write must invalidate cached catalog data
+        await mark_catalog_changed(*CATALOG_COLLECTIONS)
 
 # ============== DATA MANAGEMENT ==============
 
@@ -792,28 +1374,107 @@ class DataExport(BaseModel):
     giftBoxes: List[Dict[str, Any]]
     siteSettings: Dict[str, Any]
 
+# Export section -> collection, in the order they are imported
+IMPORT_COLLECTIONS = {
+    "categories": "categories",
+    "products": "products",
+    "heroSlides": "hero_slides",
+    "testimonials": "testimonials",
+    "giftBoxes": "gift_boxes"
+}
+IMPORT_BATCH_SIZE = int(os.environ.get('IMPORT_BATCH_SIZE', 1000))
+
+def validation_message(e: ValidationError) -> str:
+    error = e.errors()[0]
+    return f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}"
+
+class ImportValidator:
+    """Checks imported documents against the catalog models before they are written
+
+    Catalog reads skip validation (see fast_json.py), so nothing may reach
+    the catalog collections without passing the model first. Items are
+    returned as the model dumps them: defaults filled in, unknown fields
+    and _id dropped, a fresh id when the file had none.
+    """
+
+    def __init__(self):
+        self.positions: Dict[str, int] = {}
+
+    def item(self, section: str, doc: Any) -> dict:
+        position = self.positions.get(section, 0)
+        self.positions[section] = position + 1
+        try:
+            return CATALOG_MODELS[IMPORT_COLLECTIONS[section]].model_validate(doc).model_dump()
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid {section}[{position}]: {validation_message(e)}")
+
+    @staticmethod
+    def site_settings(kind: str, value: Any) -> dict:
+        """Validated site settings, limited to the fields the file contains"""
+        # An array arrives as ITEM events, anything else as one VALUE
+        if kind != VALUE or not isinstance(value, dict):
+            raise HTTPException(status_code=400, detail="siteSettings must be an object")
+        try:
+            settings = SiteSettings.model_validate(value).model_dump()
+        except ValidationError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid siteSettings: {validation_message(e)}")
+        return {key: settings[key] for key in value if key in settings and key != "id"}
+
+    def check(self, kind: str, key: str, value: Any):
+        """scan_keys() callback that rejects the file on the first invalid value"""
+        if kind == ITEM and key in IMPORT_COLLECTIONS:
+            self.item(key, value)
+        elif key == "siteSettings" and (value or kind == ITEM):
+            self.site_settings(kind, value)
+
+def streaming_json(
+    request: Request,
+    chunks,
+    headers: Optional[Dict[str, str]] = None,
+    media_type: str = "application/json"
+) -> StreamingResponse:
+    """Stream JSON chunks, brotli- or gzip-compressed when the client accepts it"""
+    headers = {**(headers or {}), "Vary": "Accept-Encoding"}
+    encoding = negotiate_encoding(request.headers.get("accept-encoding", ""))
+    if encoding:
+        headers["Content-Encoding"] = encoding
+        chunks = compress_chunks(chunks, encoding)
+    return StreamingResponse(chunks, media_type=media_type, headers=headers)
+
+async def counted(cursor, counts: Dict[str, int], key: str):
+    """Pass documents through while counting them"""
+    async for doc in cursor:
+        counts[key] += 1
+        yield doc
+
+def export_cursor(collection: str):
+    return db[collection].find({}, {"_id": 0}).batch_size(500)
+
 @api_router.get("/export-data")
-async def export_data():
-    """Export all data to JSON format"""
+async def export_data(request: Request):
+    """Export all data to JSON format, streamed straight from the database"""
     try:
-        # Fetch all data
-        categories = await db.categories.find({}, {"_id": 0}).to_list(1000)
-        products = await db.products.find({}, {"_id": 0}).to_list(1000)
-        hero_slides = await db.hero_slides.find({}, {"_id": 0}).to_list(100)
-        testimonials = await db.testimonials.find({}, {"_id": 0}).to_list(100)
-        gift_boxes = await db.gift_boxes.find({}, {"_id": 0}).to_list(100)
         site_settings = await db.site_settings.find_one({"id": "site_settings"}, {"_id": 0})
-        
-        export_data = {
-            "exportDate": datetime.now(timezone.utc).isoformat(),
-            "version": "1.0",
-            "categories": categories,
-            "products": products,
-            "heroSlides": hero_slides,
-            "testimonials": testimonials,
-            "giftBoxes": gift_boxes,
-            "siteSettings": site_settings or {}
-        }
+    except Exception as e:
+        logging.error(f"Export data error: {e}")
+        raise HTTPException(status_code=500, detail=f"Error exporting data: {str(e)}")
+    
+    counts = {key: 0 for key in IMPORT_COLLECTIONS}
+    fields = [
+        ("exportDate", datetime.now(timezone.utc).isoformat()),
+        ("version", "1.0"),
+        *[(key, counted(export_cursor(collection), counts, key)) for key, collection in IMPORT_COLLECTIONS.items()],
+        ("siteSettings", site_settings or {})
+    ]
+    
+    async def body():
+        try:
+            async for chunk in iter_json_object(fields, default=lambda o: o.isoformat() if isinstance(o, datetime) else str(o)):
+                yield chunk
+        except Exception as e:
+            # Headers are already sent; the client sees a truncated document
+            logging.error(f"Export data error: {e}")
+            raise
         
         # Log the export
         await db.data_changes.insert_one({
@@ -821,118 +1482,116 @@ async def export_data():
             "timestamp": datetime.now(timezone.utc).isoformat(),
             "action": "export",
             "filename": f"dryfruto_export_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json",
-            "summary": {
-                "categories": len(categories),
-                "products": len(products),
-                "heroSlides": len(hero_slides),
-                "testimonials": len(testimonials),
-                "giftBoxes": len(gift_boxes)
-            },
+            "summary": counts,
             "details": "Data exported successfully"
         })
-        
-        return export_data
-    except Exception as e:
-        logging.error(f"Export data error: {e}")
-        raise HTTPException(status_code=500, detail=f"Error exporting data: {str(e)}")
+    
+    return streaming_json(request, body())
+
+async def upsert_batch(collection, docs: List[dict]) -> Dict[str, int]:
+    """Upsert documents keyed on id with a single bulk_write
+
+    Returns added/updated counts. A document whose id appears more than once
+    is merged into one write, and each repeat counts as an update.
+    """
+    updated = 0
+    merged: Dict[str, dict] = {}
+    for doc in docs:
+        if 'id' not in doc:
+            doc['id'] = str(uuid.uuid4())
+        if doc['id'] in merged:
+            merged[doc['id']].update(doc)
+            updated += 1
+        else:
+            merged[doc['id']] = doc
+    ops = [UpdateOne({"id": doc_id}, {"$set": doc}, upsert=True) for doc_id, doc in merged.items()]
+    result = await collection.bulk_write(ops, ordered=False)
+    return {"added": result.upserted_count, "updated": updated + result.matched_count}
+
+class BatchWriter:
+    """Buffers streamed documents per section and writes them in batches
+
+    Each section has at most one write in flight while its next batch fills,
+    so parsing and the writes to different collections overlap, and memory
+    stays at about two batches per section.
+    """
+
+    def __init__(self, write_batch, batch_size: int):
+        self.write_batch = write_batch
+        self.batch_size = batch_size
+        self._buffers: Dict[str, List[dict]] = {}
+        self._inflight: Dict[str, asyncio.Task] = {}
+
+    async def add(self, section: str, doc: dict):
+        buffer = self._buffers.setdefault(section, [])
+        buffer.append(doc)
+        if len(buffer) >= self.batch_size:
+            await self._flush(section)
+
+    async def _flush(self, section: str):
+        batch = self._buffers.pop(section, None)
+        if not batch:
+            return
+        previous = self._inflight.get(section)
+        if previous is not None:
+            await previous
+        self._inflight[section] = asyncio.create_task(self.write_batch(section, batch))
+
+    async def close(self):
+        """Write whatever is still buffered and wait for every write"""
+        for section in list(self._buffers):
+            await self._flush(section)
+        await asyncio.gather(*self._inflight.values())
+
+    async def abort(self):
+        """Cancel writes still in flight and wait until they have stopped"""
+        for task in self._inflight.values():
+            task.cancel()
+        await asyncio.gather(*self._inflight.values(), return_exceptions=True)
 
 @api_router.post("/import-data")
-async def import_data(file: UploadFile = File(...)):
-    """Import data from JSON file"""
+async def import_data(
+    file: UploadFile = File(...),
+    batchSize: int = Query(IMPORT_BATCH_SIZE, ge=1, le=10000)
+):
+    """Import data from JSON file, streaming it in batches"""
+    writer = None
     try:
-        # Read and parse the file
-        content = await file.read()
-        data = json.loads(content.decode('utf-8'))
+        # First pass collects the top-level keys and validates every
+        # document, so an invalid file is rejected before anything is written
+        keys = await scan_keys(iter_upload(file), check=ImportValidator().check)
         
         # Validate required fields
         required_fields = ['categories', 'products']
         for field in required_fields:
-            if field not in data:
+            if field not in keys:
                 raise HTTPException(status_code=400, detail=f"Missing required field: {field}")
         
         # Track changes
-        changes = {
-            "categories": {"added": 0, "updated": 0},
-            "products": {"added": 0, "updated": 0},
-            "heroSlides": {"added": 0, "updated": 0},
-            "testimonials": {"added": 0, "updated": 0},
-            "giftBoxes": {"added": 0, "updated": 0},
-            "siteSettings": {"updated": False}
-        }
-        
-        # Import Categories
-        if 'categories' in data and data['categories']:
-            for cat in data['categories']:
-                if 'id' not in cat:
-                    cat['id'] = str(uuid.uuid4())
-                existing = await db.categories.find_one({"id": cat['id']})
-                if existing:
-                    await db.categories.update_one({"id": cat['id']}, {"$set": cat})
-                    changes['categories']['updated'] += 1
-                else:
-                    await db.categories.insert_one(cat)
-                    changes['categories']['added'] += 1
+        changes = {key: {"added": 0, "updated": 0} for key in IMPORT_COLLECTIONS}
+        changes["siteSettings"] = {"updated": False}
         
-        # Import Products
-        if 'products' in data and data['products']:
-            for prod in data['products']:
-                if 'id' not in prod:
-                    prod['id'] = str(uuid.uuid4())
-                existing = await db.products.find_one({"id": prod['id']})
-                if existing:
-                    await db.products.update_one({"id": prod['id']}, {"$set": prod})
-                    changes['products']['updated'] += 1
-                else:
-                    await db.products.insert_one(prod)
-                    changes['products']['added'] += 1
+        async def write_batch(section: str, docs: List[dict]):
+            result = await upsert_batch(db[IMPORT_COLLECTIONS[section]], docs)
+            changes[section]["added"] += result["added"]
+            changes[section]["updated"] += result["updated"]
         
-        # Import Hero Slides
-        if 'heroSlides' in data and data['heroSlides']:
-            for slide in data['heroSlides']:
-                if 'id' not in slide:
-                    slide['id'] = str(uuid.uuid4())
-                existing = await db.hero_slides.find_one({"id": slide['id']})
-                if existing:
-                    await db.hero_slides.update_one({"id": slide['id']}, {"$set": slide})
-                    changes['heroSlides']['updated'] += 1
-                else:
-                    await db.hero_slides.insert_one(slide)
-                    changes['heroSlides']['added'] += 1
-        
-        # Import Testimonials
-        if 'testimonials' in data and data['testimonials']:
-            for test in data['testimonials']:
-                if 'id' not in test:
-                    test['id'] = str(uuid.uuid4())
-                existing = await db.testimonials.find_one({"id": test['id']})
-                if existing:
-                    await db.testimonials.update_one({"id": test['id']}, {"$set": test})
-                    changes['testimonials']['updated'] += 1
-                else:
-                    await db.testimonials.insert_one(test)
-                    changes['testimonials']['added'] += 1
-        
-        # Import Gift Boxes
-        if 'giftBoxes' in data and data['giftBoxes']:
-            for gift in data['giftBoxes']:
-                if 'id' not in gift:
-                    gift['id'] = str(uuid.uuid4())
-                existing = await db.gift_boxes.find_one({"id": gift['id']})
-                if existing:
-                    await db.gift_boxes.update_one({"id": gift['id']}, {"$set": gift})
-                    changes['giftBoxes']['updated'] += 1
-                else:
-                    await db.gift_boxes.insert_one(gift)
-                    changes['giftBoxes']['added'] += 1
-        
-        # Import Site Settings
-        if 'siteSettings' in data and data['siteSettings']:
-            await db.site_settings.update_one(
-                {"id": "site_settings"},
-                {"$set": data['siteSettings']},
-                upsert=True
-            )
-            changes['siteSettings']['updated'] = True
+        # Second pass upserts each collection in batches as it is parsed
+        writer = BatchWriter(write_batch, batchSize)
+        await file.seek(0)
+        validator = ImportValidator()
+        async for kind, key, value in iter_events(iter_upload(file)):
+            if kind == ITEM and key in IMPORT_COLLECTIONS:
+                await writer.add(key, validator.item(key, value))
+            elif key == 'siteSettings' and value:
+                # Import Site Settings
+                await db.site_settings.update_one(
+                    {"id": "site_settings"},
+                    {"$set": validator.site_settings(kind, value)},
+                    upsert=True
+                )
+                changes['siteSettings']['updated'] = True
+        await writer.close()
         
         # Log the import
         await db.data_changes.insert_one({
@@ -952,9 +1611,15 @@ async def import_data(file: UploadFile = File(...)):
         }
     except json.JSONDecodeError:
         raise HTTPException(status_code=400, detail="Invalid JSON file")
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Import data error: {e}")
         raise HTTPException(status_code=500, detail=f"Error importing data: {str(e)}")
+    finally:
+        if writer is not None:
+            await writer.abort()
+        await mark_catalog_changed(*CATALOG_COLLECTIONS)
 
 @api_router.get("/data-history")
 async def get_data_history():
@@ -995,177 +1660,387 @@ async def clear_data_history():
 UPLOAD_DIR = ROOT_DIR / "uploads"
 UPLOAD_DIR.mkdir(exist_ok=True)
 
-@api_router.post("/upload")
-async def upload_file(file: UploadFile = File(...)):
+# Resized/re-encoded variants served by /uploads/{filename}?w=&format=
+derivative_cache = DerivativeCache(
+    UPLOAD_DIR / ".derivatives",
+    max_bytes=int(os.environ.get('IMAGE_CACHE_MAX_BYTES', 512 * 1024 * 1024)),
+    workers=int(os.environ['IMAGE_WORKERS']) if os.environ.get('IMAGE_WORKERS') else None
+)
+
+# Small, frequently requested upload bodies kept in memory
+hot_file_cache = HotFileCache(
+    max_bytes=int(os.environ.get('UPLOAD_MEMORY_CACHE_BYTES', 32 * 1024 * 1024)),
+    max_file_size=int(os.environ.get('UPLOAD_MEMORY_CACHE_FILE_LIMIT', 512 * 1024))
+)
+
+# Uploads stored under their sha256 (see upload_store.py) never change
+CONTENT_ADDRESSED_NAME = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+# Largest accepted upload; enforced while the body is streamed
+UPLOAD_MAX_BYTES = int(os.environ.get('UPLOAD_MAX_BYTES', 50 * 1024 * 1024))
+
+@api_router.post(
+    "/upload",
+    openapi_extra={"requestBody": {"required": True, "content": {"multipart/form-data": {"schema": {
+        "type": "object",
+        "properties": {"file": {"type": "string", "format": "binary"}},
+        "required": ["file"]
+    }}}}}
+)
+async def upload_file(request: Request):
     """Upload an image file and return its URL"""
     try:
-        # Validate file type
-        allowed_types = ["image/jpeg", "image/png", "image/gif", "image/webp"]
-        if file.content_type not in allowed_types:
-            raise HTTPException(status_code=400, detail="Invalid file type. Only JPEG, PNG, GIF, and WebP are allowed.")
-        
-        # Generate unique filename
-        file_ext = file.filename.split(".")[-1] if "." in file.filename else "jpg"
-        unique_filename = f"{uuid.uuid4()}.{file_ext}"
-        
-        # Save file
-        file_path = UPLOAD_DIR / unique_filename
-        content = await file.read()
-        
-        with open(file_path, "wb") as f:
-            f.write(content)
+        # Stored under its sha256, so re-uploading an image reuses its file
+        filename, size, created = await receive_upload(
+            request.headers.get("content-type", ""),
+            request.headers.get("content-length"),
+            request.stream(),
+            UPLOAD_DIR,
+            UPLOAD_MAX_BYTES
+        )
         
         # Return the URL path
-        return {"url": f"/api/uploads/{unique_filename}", "filename": unique_filename}
+        return {"url": f"/api/uploads/{filename}", "filename": filename}
     
+    except UploadError as e:
+        raise HTTPException(status_code=e.status_code, detail=e.detail)
     except Exception as e:
         logging.error(f"Upload error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
 
 @api_router.get("/uploads/{filename}")
-async def get_uploaded_file(filename: str):
-    """Serve uploaded files"""
-    from starlette.responses import FileResponse
-    
+async def get_uploaded_file(
+    request: Request,
+    filename: str,
+    w: Optional[int] = Query(None, ge=1, le=4096),
+    format: Optional[str] = Query(None, pattern=f"^({'|'.join(IMAGE_FORMATS)})$")
+):
+    """Serve uploaded files, optionally resized (w) and re-encoded (format)"""
     file_path = UPLOAD_DIR / filename
-    if not file_path.exists():
+    if not file_path.is_file():
         raise HTTPException(status_code=404, detail="File not found")
     
-    return FileResponse(file_path)
+    content_hash = CONTENT_ADDRESSED_NAME.match(filename)
+    cache_control = IMMUTABLE_CACHE_CONTROL if content_hash else "public, max-age=86400"
+    
+    if (w or format) and derivative_cache.available:
+        try:
+            derivative_path, media_type = await derivative_cache.get(file_path, w, format)
+            return await serve_file(
+                request, derivative_path, media_type,
+                cache_control=cache_control, cache=hot_file_cache
+            )
+        except Exception as e:
+            # Not a decodable image; fall back to the original
+            logging.error(f"Image derivative error for {filename}: {e}")
+    
+    return await serve_file(
+        request, file_path,
+        cache_control=cache_control,
+        etag=f'"{content_hash.group(1)}"' if content_hash else None,
+        cache=hot_file_cache
+    )
 
 # ============== FORM SUBMISSIONS ==============
 
+# Public submissions can be acknowledged before they reach MongoDB (see write_behind.py)
+write_behind = WriteBehindQueue(
+    db,
+    Path(os.environ.get('WRITE_BEHIND_DIR', ROOT_DIR / "write_behind")),
+    enabled=os.environ.get('WRITE_BEHIND', 'off') == 'on',
+    batch_size=int(os.environ.get('WRITE_BEHIND_BATCH_SIZE', 500)),
+    flush_interval=float(os.environ.get('WRITE_BEHIND_FLUSH_INTERVAL', 1.0)),
+    on_flush=lambda: admin_stats_cache.clear()
+)
+
 # Bulk Order Submissions
 @api_router.post("/bulk-orders")
 async def create_bulk_order(submission: BulkOrderSubmission):
     submission_dict = submission.model_dump()
     submission_dict["id"] = str(uuid.uuid4())
     submission_dict["createdAt"] = datetime.now(timezone.utc).isoformat()
-    await db.bulk_orders.insert_one(submission_dict)
+    await write_behind.submit("bulk_orders", submission_dict)
+    admin_stats_cache.clear()
     return {"message": "Bulk order inquiry submitted successfully", "id": submission_dict["id"]}
 
-@api_router.get("/bulk-orders")
-async def get_bulk_orders():
-    orders = await db.bulk_orders.find({}, {"_id": 0}).sort("createdAt", -1).to_list(1000)
-    return orders
+# Newest first; id breaks ties between submissions with the same timestamp
+SUBMISSION_SORT = [("createdAt", -1), ("id", -1)]
+
+def text_search_filter(fields: List[str], search: str) -> dict:
+    """Case-insensitive substring match on any of fields"""
+    pattern = {"$regex": re.escape(search), "$options": "i"}
+    return {"$or": [{field: pattern} for field in fields]}
+
+async def submissions_page(collection, model, query: dict, cursor: Optional[str], limit: int) -> Response:
+    items, next_cursor = await find_page(collection, query, SUBMISSION_SORT, cursor, limit, model_projection(model))
+    return FastJSONResponse({"items": shape_documents(model, items), "nextCursor": next_cursor})
+
+@api_router.get("/bulk-orders", response_model=BulkOrderPage)
+async def get_bulk_orders(
+    status: Optional[str] = None,
+    search: Optional[str] = Query(None, max_length=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Bulk order inquiries, newest first, paginated by cursor"""
+    query = {}
+    if status:
+        query["status"] = status
+    if search:
+        query.update(text_search_filter(["name", "email", "company", "phone"], search))
+    return await submissions_page(db.bulk_orders, BulkOrderSubmission, query, cursor, limit)
 
 @api_router.put("/bulk-orders/{order_id}")
 async def update_bulk_order_status(order_id: str, status: str):
     await db.bulk_orders.update_one({"id": order_id}, {"$set": {"status": status}})
+    admin_stats_cache.clear()
     return {"message": "Status updated"}
 
 @api_router.delete("/bulk-orders/{order_id}")
 async def delete_bulk_order(order_id: str):
     await db.bulk_orders.delete_one({"id": order_id})
+    admin_stats_cache.clear()
     return {"message": "Deleted"}
 
 # Newsletter Subscriptions
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
 @api_router.post("/newsletter")
 async def subscribe_newsletter(subscription: NewsletterSubscription):
-    # Check if email already exists
-    existing = await db.newsletter.find_one({"email": subscription.email})
-    if existing:
-        return {"message": "Email already subscribed", "exists": True}
-    
     sub_dict = subscription.model_dump()
+    sub_dict["email"] = normalize_email(subscription.email)
     sub_dict["id"] = str(uuid.uuid4())
     sub_dict["createdAt"] = datetime.now(timezone.utc).isoformat()
-    await db.newsletter.insert_one(sub_dict)
+    if write_behind.running:
+        # Queued inserts cannot report duplicates; the unique email index
+        # drops them when the batch is written
+        await write_behind.submit("newsletter", sub_dict)
+        admin_stats_cache.clear()
+        return {"message": "Successfully subscribed to newsletter", "id": sub_dict["id"]}
+    
+    # One round trip: the unique index on email decides which request inserts
+    email = sub_dict.pop("email")
+    try:
+        result = await db.newsletter.update_one({"email": email}, {"$setOnInsert": sub_dict}, upsert=True)
+    except DuplicateKeyError:
+        # Two upserts for the same email raced and this one lost
+        return {"message": "Email already subscribed", "exists": True}
+    if result.upserted_id is None:
+        return {"message": "Email already subscribed", "exists": True}
+    admin_stats_cache.clear()
     return {"message": "Successfully subscribed to newsletter", "id": sub_dict["id"]}
 
-@api_router.get("/newsletter")
-async def get_newsletter_subscriptions():
-    subs = await db.newsletter.find({}, {"_id": 0}).sort("createdAt", -1).to_list(1000)
-    return subs
+@api_router.get("/newsletter", response_model=NewsletterPage)
+async def get_newsletter_subscriptions(
+    search: Optional[str] = Query(None, max_length=100),
+    cursor: Optional[str] = None,
+    limit: int = Query(50, ge=1, le=200)
+):
+    """Newsletter subscriptions, newest first, paginated by cursor"""
+    query = text_search_filter(["email"], search) if search else {}
+    return await submissions_page(db.newsletter, NewsletterSubscription, query, cursor, limit)
 
 @api_router.delete("/newsletter/{sub_id}")
 async def delete_newsletter_subscription(sub_id: str):
     await db.newsletter.delete_one({"id": sub_id})
+    admin_stats_cache.clear()
     return {"message": "Deleted"}
 
+# ----- Submission Export Routes -----
+
+EXPORT_CHUNK_SIZE = 64 * 1024
+
+# Spreadsheets evaluate cells starting with these as formulas
+CSV_FORMULA_PREFIXES = ("=", "@", "\t", "\r")
+# A leading + or - is only left alone on a plain number or phone number
+CSV_SIGNED_NUMBER = re.compile(r"^[+-][\d .()-]+$")
+
+def parse_date_bound(value: str, name: str, end: bool = False) -> Dict[str, str]:
+    """createdAt condition for a since/until parameter (ISO date or datetime, UTC if no offset)
+
+    A bare date used as the end of a range includes that whole day.
+    """
+    try:
+        if len(value) == 10:
+            moment = datetime.combine(datetime.fromisoformat(value).date(), datetime.min.time(), timezone.utc)
+            if end:
+                return {"$lt": (moment + timedelta(days=1)).isoformat()}
+        else:
+            moment = datetime.fromisoformat(value.replace("Z", "+00:00"))
+            if moment.tzinfo is None:
+                moment = moment.replace(tzinfo=timezone.utc)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid {name} date: {value}")
+    # createdAt is stored as a UTC ISO string, so string order is time order
+    return {"$lte" if end else "$gte": moment.astimezone(timezone.utc).isoformat()}
+
+def created_at_filter(since: Optional[str], until: Optional[str]) -> dict:
+    condition = {}
+    if since:
+        condition.update(parse_date_bound(since, "since"))
+    if until:
+        condition.update(parse_date_bound(until, "until", end=True))
+    return {"createdAt": condition} if condition else {}
+
+def csv_cell(value: Any) -> str:
+    text = "" if value is None else str(value)
+    if text.startswith(CSV_FORMULA_PREFIXES) or (text[:1] in ("+", "-") and not CSV_SIGNED_NUMBER.match(text)):
+        return "'" + text
+    return text
+
+async def iter_export(cursor, columns: List[str], fmt: str):
+    """Encode cursor documents as CSV or NDJSON, yielding chunks of about EXPORT_CHUNK_SIZE"""
+    buffer = io.StringIO()
+    if fmt == "csv":
+        writer = csv.writer(buffer)
+        # BOM so spreadsheet apps detect UTF-8
+        buffer.write("\ufeff")
+        writer.writerow(columns)
+    async for doc in cursor:
+        if fmt == "csv":
+            writer.writerow([csv_cell(doc.get(column)) for column in columns])
+        else:
+            buffer.write(dump_json(doc).decode("utf-8"))
+            buffer.write("\n")
+        if buffer.tell() >= EXPORT_CHUNK_SIZE:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+def export_submissions(request: Request, collection, model, query: dict, fmt: str, name: str) -> StreamingResponse:
+    """Stream a submissions collection as a CSV or NDJSON download, newest first"""
+    columns = [field for field in model.model_fields if field != "id"]
+    cursor = collection.find(query, model_projection(model)).sort(SUBMISSION_SORT).batch_size(1000)
+    extension, media_type = ("csv", "text/csv; charset=utf-8") if fmt == "csv" else ("ndjson", "application/x-ndjson")
+    filename = f"{name}_{datetime.now(timezone.utc).strftime('%Y%m%d')}.{extension}"
+    return streaming_json(
+        request,
+        iter_export(cursor, columns, fmt),
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+        media_type=media_type
+    )
+
+@api_router.get("/bulk-orders/export")
+async def export_bulk_orders(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    status: Optional[str] = None,
+    search: Optional[str] = Query(None, max_length=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Download bulk order inquiries as CSV or NDJSON, streamed from the database"""
+    query = created_at_filter(since, until)
+    if status:
+        query["status"] = status
+    if search:
+        query.update(text_search_filter(["name", "email", "company", "phone"], search))
+    return export_submissions(request, db.bulk_orders, BulkOrderSubmission, query, format, "bulk_orders")
+
+@api_router.get("/newsletter/export")
+async def export_newsletter_subscriptions(
+    request: Request,
+    format: str = Query("csv", pattern="^(csv|ndjson)$"),
+    since: Optional[str] = None,
+    until: Optional[str] = None,
+    search: Optional[str] = Query(None, max_length=100),
+    current_user: dict = Depends(get_current_user)
+):
+    """Download newsletter subscriptions as CSV or NDJSON, streamed from the database"""
+    query = created_at_filter(since, until)
+    if search:
+        query.update(text_search_filter(["email"], search))
+    return export_submissions(request, db.newsletter, NewsletterSubscription, query, format, "newsletter_subscriptions")
+
 # ============== THEME EXPORT ==============
 
 @api_router.get("/export-theme")
-async def export_theme():
+async def export_theme(request: Request):
     """Export all site settings, content, and theme data as JSON"""
-    import json
-    from starlette.responses import Response
-    
-    # Get all collections data
     settings = await db.site_settings.find_one({"id": "site_settings"}, {"_id": 0})
-    categories = await db.categories.find({}, {"_id": 0}).to_list(1000)
-    products = await db.products.find({}, {"_id": 0}).to_list(1000)
-    hero_slides = await db.hero_slides.find({}, {"_id": 0}).to_list(100)
-    testimonials = await db.testimonials.find({}, {"_id": 0}).to_list(100)
-    gift_boxes = await db.gift_boxes.find({}, {"_id": 0}).to_list(100)
+    theme_name = settings.get("businessName", "MyTheme") if settings else "MyTheme"
     
-    # Create export object
-    export_data = {
-        "exportVersion": "1.0",
-        "exportDate": datetime.now(timezone.utc).isoformat(),
-        "themeName": settings.get("businessName", "MyTheme") if settings else "MyTheme",
-        "siteSettings": settings or SiteSettings().model_dump(),
-        "categories": categories,
-        "products": products,
-        "heroSlides": hero_slides,
-        "testimonials": testimonials,
-        "giftBoxes": gift_boxes
-    }
+    # Streamed field by field; arrays come straight from the cursors
+    fields = [
+        ("exportVersion", "1.0"),
+        ("exportDate", datetime.now(timezone.utc).isoformat()),
+        ("themeName", theme_name),
+        ("siteSettings", settings or SiteSettings().model_dump()),
+        *[(key, export_cursor(collection)) for key, collection in IMPORT_COLLECTIONS.items()]
+    ]
     
     # Return as downloadable JSON
-    json_str = json.dumps(export_data, indent=2, default=str)
-    
-    return Response(
-        content=json_str,
-        media_type="application/json",
-        headers={
-            "Content-Disposition": f"attachment; filename={export_data['themeName']}_theme_export.json"
-        }
+    return streaming_json(
+        request,
+        iter_json_object(fields, indent=2, default=str),
+        headers={"Content-Disposition": f"attachment; filename={theme_name}_theme_export.json"}
     )
 
-@api_router.post("/import-theme")
-async def import_theme(import_data: dict):
-    """Import theme data from JSON"""
+@api_router.post(
+    "/import-theme",
+    openapi_extra={"requestBody": {"required": True, "content": {"application/json": {"schema": {"type": "object"}}}}}
+)
+async def import_theme(request: Request):
+    """Import theme data from JSON, streaming the request body in batches
+
+    A section present in the file replaces the whole collection. Its
+    documents are validated against their model and go to a staging
+    collection first, upserted by id so repeated ids keep the last copy.
+    The staging collections replace the live ones only once the whole
+    file has been read, so a bad file leaves the current data untouched.
+    """
+    staging: Dict[str, str] = {}
+    
+    async def write_batch(section: str, docs: List[dict]):
+        collection = IMPORT_COLLECTIONS[section]
+        if section not in staging:
+            staging[section] = f"{collection}_import_{uuid.uuid4().hex[:8]}"
+            await create_collection_indexes(db[staging[section]], INDEXES.get(collection, []))
+        await db[staging[section]].bulk_write(
+            [ReplaceOne({"id": doc["id"]}, doc, upsert=True) for doc in docs],
+            ordered=False
+        )
+    
+    writer = BatchWriter(write_batch, IMPORT_BATCH_SIZE)
     try:
-        # Import site settings
-        if "siteSettings" in import_data:
-            settings = import_data["siteSettings"]
-            settings["id"] = "site_settings"
+        site_settings = None
+        validator = ImportValidator()
+        async for kind, key, value in iter_events(request.stream()):
+            if kind == ITEM and key in IMPORT_COLLECTIONS:
+                await writer.add(key, validator.item(key, value))
+            elif key == "siteSettings":
+                site_settings = validator.site_settings(kind, value)
+        await writer.close()
+        
+        for section, name in list(staging.items()):
+            await db[name].rename(IMPORT_COLLECTIONS[section], dropTarget=True)
+            del staging[section]
+        if site_settings is not None:
+            # Import site settings
             await db.site_settings.replace_one(
                 {"id": "site_settings"},
-                settings,
+                {**site_settings, "id": "site_settings"},
                 upsert=True
             )
         
-        # Import categories
-        if "categories" in import_data and import_data["categories"]:
-            await db.categories.delete_many({})
-            await db.categories.insert_many(import_data["categories"])
-        
-        # Import products
-        if "products" in import_data and import_data["products"]:
-            await db.products.delete_many({})
-            await db.products.insert_many(import_data["products"])
-        
-        # Import hero slides
-        if "heroSlides" in import_data and import_data["heroSlides"]:
-            await db.hero_slides.delete_many({})
-            await db.hero_slides.insert_many(import_data["heroSlides"])
-        
-        # Import testimonials
-        if "testimonials" in import_data and import_data["testimonials"]:
-            await db.testimonials.delete_many({})
-            await db.testimonials.insert_many(import_data["testimonials"])
-        
-        # Import gift boxes
-        if "giftBoxes" in import_data and import_data["giftBoxes"]:
-            await db.gift_boxes.delete_many({})
-            await db.gift_boxes.insert_many(import_data["giftBoxes"])
-        
         return {"message": "Theme imported successfully", "success": True}
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=400, detail="Invalid JSON body")
+    except HTTPException:
+        raise
     except Exception as e:
         logging.error(f"Import error: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        await writer.abort()
+        for name in staging.values():
+            await db.drop_collection(name)
+        await mark_catalog_changed(*CATALOG_COLLECTIONS)
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -1178,6 +2053,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+app.add_middleware(ProfilerMiddleware, profiler=profiler, authorize=lambda token: verify_jwt_token(token) is not None)
+
+# Outermost, so the timings include every other middleware
+app.add_middleware(HTTPMetricsMiddleware, metrics=http_metrics)
+
 # Configure logging
 logging.basicConfig(
     level=logging.INFO,
@@ -1185,6 +2065,30 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+@app.on_event("startup")
+async def create_indexes():
+    await ensure_indexes(db)
+
+@app.on_event("startup")
+async def start_slow_query_log():
+    slow_query_log.start(client)
+
+@app.on_event("startup")
+async def start_loop_lag_monitor():
+    await loop_lag_monitor.start()
+
+@app.on_event("startup")
+async def start_cache_bus():
+    await cache_bus.start()
+
+@app.on_event("startup")
+async def start_write_behind():
+    await write_behind.start()
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
+    await write_behind.drain()
+    await loop_lag_monitor.stop()
+    await cache_bus.stop()
+    derivative_cache.shutdown()
     client.close()
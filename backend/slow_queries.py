@@ -0,0 +1,294 @@
+# Slow-query log with sampled explain plans and index suggestions
+#
+# SlowQueryLog is a pymongo CommandListener, registered on the Motor client
+# next to MongoCommandMetrics. Commands slower than threshold_ms are reduced
+# to a query shape: the collection, the command, and its filter / sort /
+# pipeline with every literal replaced by "?". {"id": "abc"} and
+# {"id": "xyz"} are therefore one shape. The log keeps counts and timings
+# per shape. For a sample of slow executions it runs explain on the event
+# loop (never on the driver thread that reported the command), and keeps
+# the winning plan and the examined/returned counts.
+#
+# suggest_index() applies the equality, sort, range ordering rule to a
+# shape's filter and sort. GET /api/admin/slow-queries lists the worst shapes
+# with the suggestion for each one that scanned the collection, or that
+# examined far more documents than it returned.
+#
+# Shapes hold no literal values, so customer data (emails, phone numbers)
+# is not kept in memory or returned by the endpoint.
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import monitoring
+from pymongo.errors import PyMongoError
+
+logger = logging.getLogger(__name__)
+
+# Commands whose shape and plan are worth recording, and the field holding
+# their filter
+QUERY_FIELDS = {
+    "find": "filter",
+    "aggregate": "pipeline",
+    "count": "query",
+    "distinct": "query",
+    "findAndModify": "query",
+    "update": "updates",
+    "delete": "deletes",
+}
+
+# Stripped before a command is re-sent inside explain
+SESSION_FIELDS = {"lsid", "txnNumber", "autocommit", "startTransaction", "writeConcern", "readConcern", "$clusterTime", "$db", "$readPreference"}
+
+RANGE_OPERATORS = {"$gt", "$gte", "$lt", "$lte", "$ne", "$nin", "$regex", "$exists", "$not"}
+
+# A plan examining this many documents per document returned is flagged
+EXAMINED_RATIO = 10
+
+
+def normalize(value: Any) -> Any:
+    """Replace literals with "?", keeping field names and operators"""
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        if value and all(isinstance(item, dict) for item in value):
+            return [normalize(item) for item in value]
+        return "?"
+    return "?"
+
+
+def command_shape(command_name: str, command: Dict) -> Dict[str, Any]:
+    """The parts of a command that decide its plan, normalized"""
+    shape: Dict[str, Any] = {}
+    if command_name == "aggregate":
+        shape["pipeline"] = [
+            {stage: normalize(spec) if stage == "$match" else dict(spec) if stage == "$sort" else "…"
+             for stage, spec in step.items()}
+            for step in command.get("pipeline", [])
+        ]
+        return shape
+    if command_name in ("update", "delete"):
+        statements = command.get(QUERY_FIELDS[command_name]) or [{}]
+        shape["filter"] = normalize(statements[0].get("q", {}))
+        return shape
+    shape["filter"] = normalize(command.get(QUERY_FIELDS[command_name]) or {})
+    if command_name == "distinct":
+        shape["key"] = command.get("key")
+    if command.get("sort"):
+        shape["sort"] = dict(command["sort"])
+    return shape
+
+
+def shape_key(collection: str, command_name: str, shape: Dict) -> str:
+    return f"{collection}.{command_name} {shape}"
+
+
+def _filter_and_sort(shape: Dict) -> Tuple[Dict, Dict]:
+    if "pipeline" in shape:
+        # Only a leading $match / $sort can use an index
+        match, sort = {}, {}
+        for step in shape["pipeline"]:
+            if "$match" in step and not match and not sort:
+                match = step["$match"]
+            elif "$sort" in step and not sort:
+                sort = step["$sort"]
+            else:
+                break
+        return match, sort
+    return shape.get("filter") or {}, shape.get("sort") or {}
+
+
+def suggest_index(shape: Dict) -> Optional[List[Tuple[str, int]]]:
+    """Index keys for a shape by the equality, sort, range rule; None if there is nothing to index"""
+    query, sort = _filter_and_sort(shape)
+    if any(key.startswith("$") for key in query):
+        # $or / $and / $text need an index per branch; leave those to a human
+        return None
+    equality, ranges = [], []
+    for field, condition in query.items():
+        if isinstance(condition, dict) and any(op in RANGE_OPERATORS for op in condition):
+            ranges.append(field)
+        elif isinstance(condition, dict) and condition and not any(op in ("$eq", "$in") for op in condition):
+            # Sub-document match or unsupported operator
+            continue
+        else:
+            equality.append(field)
+    keys = [(field, 1) for field in equality]
+    keys += [(field, direction if isinstance(direction, int) else 1) for field, direction in sort.items() if field not in equality]
+    keys += [(field, 1) for field in ranges if field not in sort]
+    return keys or None
+
+
+def _plan_summary(explain: Dict) -> Dict[str, Any]:
+    planner = explain.get("queryPlanner") or {}
+    if not planner and explain.get("stages"):
+        # Aggregations report the find layer under stages[0].$cursor
+        planner = (explain["stages"][0].get("$cursor") or {}).get("queryPlanner") or {}
+    stages = []
+
+    def walk(plan):
+        if isinstance(plan, dict):
+            if "stage" in plan:
+                stage = plan["stage"]
+                if plan.get("indexName"):
+                    stage += f" {plan['indexName']}"
+                stages.append(stage)
+            for child in ("inputStage", "queryPlan"):
+                walk(plan.get(child))
+            for child in plan.get("inputStages", []):
+                walk(child)
+
+    walk(planner.get("winningPlan"))
+    stats = explain.get("executionStats") or {}
+    return {
+        "plan": " <- ".join(stages),
+        "collectionScan": any(stage.startswith("COLLSCAN") for stage in stages),
+        "docsExamined": stats.get("totalDocsExamined"),
+        "keysExamined": stats.get("totalKeysExamined"),
+        "returned": stats.get("nReturned"),
+    }
+
+
+class SlowQueryLog(monitoring.CommandListener):
+    def __init__(self, threshold_ms: float = 100, explain_rate: float = 0.1, max_shapes: int = 200):
+        self.threshold_ms = threshold_ms
+        self.explain_rate = explain_rate
+        self.max_shapes = max_shapes
+        self._lock = threading.Lock()
+        self._started: Dict[Tuple, Tuple[str, Dict]] = {}
+        self.shapes: Dict[str, Dict[str, Any]] = {}
+        self._client = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._explaining = set()
+
+    def start(self, client):
+        """Enable explains; must be called from the event loop"""
+        self._client = client
+        self._loop = asyncio.get_running_loop()
+
+    def started(self, event: monitoring.CommandStartedEvent):
+        if event.command_name in QUERY_FIELDS:
+            with self._lock:
+                self._started[(event.connection_id, event.request_id)] = (event.database_name, event.command)
+
+    def succeeded(self, event: monitoring.CommandSucceededEvent):
+        self._finish(event)
+
+    def failed(self, event: monitoring.CommandFailedEvent):
+        self._finish(event)
+
+    def _finish(self, event):
+        if event.command_name not in QUERY_FIELDS:
+            return
+        with self._lock:
+            started = self._started.pop((event.connection_id, event.request_id), None)
+        duration_ms = event.duration_micros / 1000
+        if started is None or duration_ms < self.threshold_ms:
+            return
+        database, command = started
+        collection = command.get(event.command_name)
+        if not isinstance(collection, str):
+            return
+        shape = command_shape(event.command_name, command)
+        key = shape_key(collection, event.command_name, shape)
+        with self._lock:
+            entry = self.shapes.get(key)
+            if entry is None:
+                if len(self.shapes) >= self.max_shapes:
+                    # Make room by dropping the shape that cost the least in total
+                    del self.shapes[min(self.shapes, key=lambda k: self.shapes[k]["totalMs"])]
+                entry = self.shapes[key] = {
+                    "collection": collection,
+                    "command": event.command_name,
+                    "shape": shape,
+                    "count": 0,
+                    "totalMs": 0.0,
+                    "maxMs": 0.0,
+                    "explain": None,
+                }
+            entry["count"] += 1
+            entry["totalMs"] += duration_ms
+            entry["maxMs"] = max(entry["maxMs"], duration_ms)
+            entry["lastSeen"] = time.time()
+            wants_explain = (
+                self._loop is not None
+                and key not in self._explaining
+                and (entry["explain"] is None or random.random() < self.explain_rate)
+            )
+            if wants_explain:
+                self._explaining.add(key)
+        logger.warning(f"Slow query {duration_ms:.0f}ms: {key}")
+        if wants_explain:
+            self._loop.call_soon_threadsafe(asyncio.ensure_future, self._explain(key, database, event.command_name, command))
+
+    async def _explain(self, key: str, database: str, command_name: str, command: Dict):
+        explained = {name: value for name, value in command.items() if name not in SESSION_FIELDS}
+        if command_name in ("update", "delete"):
+            # One statement is enough for the plan
+            field = QUERY_FIELDS[command_name]
+            explained[field] = explained[field][:1]
+        # executionStats runs the query; writes are only planned, never run
+        verbosity = "queryPlanner" if command_name in ("update", "delete", "findAndModify") else "executionStats"
+        summary = None
+        try:
+            result = await self._client[database].command({"explain": explained, "verbosity": verbosity})
+            summary = _plan_summary(result)
+        except PyMongoError as e:
+            summary = {"error": str(e)}
+        finally:
+            # Same lock as succeeded(), which reads and adds to _explaining from the listener thread
+            with self._lock:
+                self._explaining.discard(key)
+                if summary is not None and key in self.shapes:
+                    self.shapes[key]["explain"] = {**summary, "at": time.time()}
+
+    def report(self, limit: int = 20, declared: Optional[Dict[str, List[Dict]]] = None) -> List[Dict[str, Any]]:
+        """Worst shapes by total time, each with an index suggestion when its plan looks poor
+
+        declared is the indexes.INDEXES registry; suggestions it already
+        covers are marked so a missing index can be told from a new one.
+        """
+        with self._lock:
+            entries = sorted(self.shapes.values(), key=lambda entry: entry["totalMs"], reverse=True)[:limit]
+            entries = [dict(entry) for entry in entries]
+        for entry in entries:
+            entry["avgMs"] = round(entry["totalMs"] / entry["count"], 2)
+            entry["totalMs"] = round(entry["totalMs"], 2)
+            entry["maxMs"] = round(entry["maxMs"], 2)
+            entry["lastSeen"] = _iso(entry["lastSeen"])
+            if entry["explain"]:
+                entry["explain"] = {**entry["explain"], "at": _iso(entry["explain"]["at"])}
+            explain = entry["explain"] or {}
+            examined, returned = explain.get("docsExamined"), explain.get("returned")
+            poor = explain.get("collectionScan") or (
+                examined is not None and examined > EXAMINED_RATIO * max(returned or 0, 1)
+            )
+            entry["suggestedIndex"] = None
+            if poor:
+                keys = suggest_index(entry["shape"])
+                if keys:
+                    entry["suggestedIndex"] = {
+                        "keys": [[field, direction] for field, direction in keys],
+                        "declared": _is_declared(declared or {}, entry["collection"], keys),
+                    }
+        return entries
+
+    def reset(self):
+        with self._lock:
+            self.shapes.clear()
+
+
+def _iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat()
+
+
+def _is_declared(declared: Dict[str, List[Dict]], collection: str, keys: List[Tuple[str, int]]) -> bool:
+    for spec in declared.get(collection, []):
+        if [tuple(key) for key in spec["keys"][:len(keys)]] == [tuple(key) for key in keys]:
+            return True
+    return False
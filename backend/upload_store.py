@@ -0,0 +1,205 @@
+# Streaming, content-addressed storage for uploaded images
+#
+# receive_upload() parses a multipart/form-data body straight off the request
+# stream instead of letting Starlette spool it first. The file part is
+# hashed (sha256) and written to a temporary file as it arrives, with the
+# disk writes run in a worker thread, and the size limit is checked on every
+# chunk so an oversized upload is cut off as soon as it crosses the limit.
+# The finished file is renamed to <sha256>.<ext>: uploading the same image
+# twice stores it once and returns the same URL.
+
+import asyncio
+import hashlib
+import os
+import tempfile
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+try:
+    from python_multipart.multipart import MultipartParser, parse_options_header
+except ImportError:  # python-multipart < 0.0.13
+    from multipart.multipart import MultipartParser, parse_options_header
+
+# Accepted image types and the extension each is stored under
+ALLOWED_TYPES = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+# Data is handed to the writer thread in blocks of about this size
+WRITE_BLOCK_SIZE = 1024 * 1024
+
+# Allowance for multipart boundaries and part headers in Content-Length
+MULTIPART_OVERHEAD = 64 * 1024
+
+
+class UploadError(Exception):
+    def __init__(self, status_code: int, detail: str):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+
+
+class _FilePartCollector:
+    """Multipart callbacks that keep the data of the first file part named field"""
+
+    def __init__(self, field: str):
+        self.field = field
+        self.content_type: Optional[str] = None
+        self.original_name: Optional[str] = None
+        self.found = False
+        self.complete = False
+        self.data: List[bytes] = []
+        self.pending = 0
+        self._capturing = False
+        self._headers: Dict[bytes, bytes] = {}
+        self._header_field = b""
+        self._header_value = b""
+
+    def callbacks(self) -> Dict:
+        return {
+            "on_part_begin": self.on_part_begin,
+            "on_part_data": self.on_part_data,
+            "on_part_end": self.on_part_end,
+            "on_header_field": self.on_header_field,
+            "on_header_value": self.on_header_value,
+            "on_header_end": self.on_header_end,
+            "on_headers_finished": self.on_headers_finished,
+        }
+
+    def on_part_begin(self):
+        self._headers = {}
+
+    def on_header_field(self, data: bytes, start: int, end: int):
+        self._header_field += data[start:end]
+
+    def on_header_value(self, data: bytes, start: int, end: int):
+        self._header_value += data[start:end]
+
+    def on_header_end(self):
+        self._headers[self._header_field.lower()] = self._header_value
+        self._header_field = b""
+        self._header_value = b""
+
+    def on_headers_finished(self):
+        _, options = parse_options_header(self._headers.get(b"content-disposition", b""))
+        name = options.get(b"name", b"").decode("utf-8", "replace")
+        if self.found or name != self.field or b"filename" not in options:
+            return
+        self.found = True
+        self._capturing = True
+        self.original_name = options[b"filename"].decode("utf-8", "replace")
+        content_type, _ = parse_options_header(self._headers.get(b"content-type", b""))
+        self.content_type = content_type.decode("latin-1").lower()
+        if self.content_type not in ALLOWED_TYPES:
+            raise UploadError(400, "Invalid file type. Only JPEG, PNG, GIF, and WebP are allowed.")
+
+    def on_part_data(self, data: bytes, start: int, end: int):
+        if self._capturing:
+            self.data.append(data[start:end])
+            self.pending += end - start
+
+    def on_part_end(self):
+        if self._capturing:
+            self._capturing = False
+            self.complete = True
+
+    def take(self) -> bytes:
+        data = b"".join(self.data)
+        self.data = []
+        self.pending = 0
+        return data
+
+
+class _HashingWriter:
+    """Temporary file in the upload directory that hashes what is written to it
+
+    Every method does blocking I/O and is meant to run in a worker thread.
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = directory
+        self.sha256 = hashlib.sha256()
+        self.path: Optional[Path] = None
+        self._file = None
+
+    def write(self, data: bytes):
+        if self._file is None:
+            fd, name = tempfile.mkstemp(prefix=".upload-", dir=self.directory)
+            self._file = os.fdopen(fd, "wb")
+            self.path = Path(name)
+        self.sha256.update(data)
+        self._file.write(data)
+
+    def commit(self, extension: str) -> Tuple[str, bool]:
+        """Move the file to its content address; returns (filename, created)"""
+        if self._file is None:
+            self.write(b"")
+        self._file.close()
+        filename = f"{self.sha256.hexdigest()}.{extension}"
+        target = self.directory / filename
+        if target.exists():
+            self.path.unlink()
+            return filename, False
+        os.chmod(self.path, 0o644)
+        os.replace(self.path, target)
+        return filename, True
+
+    def discard(self):
+        if self._file is not None:
+            self._file.close()
+        if self.path is not None and self.path.exists():
+            self.path.unlink()
+
+
+async def receive_upload(
+    content_type: str,
+    content_length: Optional[str],
+    stream: AsyncIterator[bytes],
+    directory: Path,
+    max_bytes: int,
+    field: str = "file"
+) -> Tuple[str, int, bool]:
+    """Store the file part of a multipart body; returns (filename, size, created)
+
+    Raises UploadError for a missing or invalid file and for one larger than
+    max_bytes.
+    """
+    mime_type, params = parse_options_header(content_type)
+    if mime_type != b"multipart/form-data" or b"boundary" not in params:
+        raise UploadError(400, "Expected a multipart/form-data upload")
+    if content_length and content_length.isdigit() and int(content_length) > max_bytes + MULTIPART_OVERHEAD:
+        raise UploadError(413, f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB.")
+
+    collector = _FilePartCollector(field)
+    parser = MultipartParser(params[b"boundary"], collector.callbacks())
+    writer = _HashingWriter(directory)
+    size = 0
+    try:
+        async for chunk in stream:
+            try:
+                parser.write(chunk)
+            except ValueError:
+                raise UploadError(400, "Malformed multipart body")
+            if size + collector.pending > max_bytes:
+                raise UploadError(413, f"File too large. Maximum size is {max_bytes // (1024 * 1024)} MB.")
+            if collector.pending >= WRITE_BLOCK_SIZE:
+                data = collector.take()
+                size += len(data)
+                await asyncio.to_thread(writer.write, data)
+        parser.finalize()
+        if not collector.complete:
+            raise UploadError(400, "No file uploaded")
+        data = collector.take()
+        size += len(data)
+        if size == 0:
+            raise UploadError(400, "Uploaded file is empty")
+        if data:
+            await asyncio.to_thread(writer.write, data)
+        filename, created = await asyncio.to_thread(writer.commit, ALLOWED_TYPES[collector.content_type])
+        return filename, size, created
+    except BaseException:
+        writer.discard()
+        raise
@@ -0,0 +1,276 @@
+# Write-behind queue for public form submissions
+#
+# With WRITE_BEHIND=on, POST /bulk-orders, /newsletter and /status answer as
+# soon as the document is queued instead of waiting for insert_one. Every
+# queued document is first appended to a spill file and fsynced, so a crash,
+# restart or power loss loses nothing that was acknowledged: leftover files
+# are replayed on the next start. Appends are group-committed: submissions
+# that arrive while one write + fsync runs in a thread share the next one, so
+# the loop never blocks on the disk. A background task writes the queue with
+# insert_many once it holds batch_size documents or every flush_interval
+# seconds, and drain() empties it on shutdown.
+#
+# Each worker spills to its own files and holds an flock on them. Files whose
+# lock is free belong to a worker that died; the next worker to start adopts
+# them. Replaying is safe because every queued collection has a unique index
+# on id: documents that were already written are dropped as duplicates.
+
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import uuid
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo.errors import BulkWriteError, PyMongoError
+
+from fast_json import dumps
+
+logger = logging.getLogger(__name__)
+
+DUPLICATE_KEY = 11000
+
+
+class _Segment:
+    """A locked spill file and the documents appended to it"""
+
+    def __init__(self, path: Path, fd: int, docs: Optional[List[Tuple[str, Dict]]] = None):
+        self.path = path
+        self.fd = fd
+        self.docs = docs if docs is not None else []
+
+    def release(self, delete: bool):
+        # Unlink before unlocking, so no other worker can adopt the file
+        if delete:
+            try:
+                self.path.unlink()
+            except FileNotFoundError:
+                pass
+        os.close(self.fd)
+
+
+class WriteBehindQueue:
+    def __init__(
+        self,
+        db,
+        directory: Path,
+        enabled: bool = False,
+        batch_size: int = 500,
+        flush_interval: float = 1.0,
+        on_flush: Optional[Callable[[], None]] = None
+    ):
+        self.db = db
+        self.directory = directory
+        self.enabled = enabled
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.on_flush = on_flush
+        self._active: Optional[_Segment] = None
+        # Lines waiting for the next group commit, and the task that will write them
+        self._buffer: List[Tuple[bytes, Tuple[str, Dict]]] = []
+        self._commit: Optional[asyncio.Task] = None
+        self._append_lock: Optional[asyncio.Lock] = None
+        # Rotated segments waiting to be written, oldest first
+        self._segments: List[_Segment] = []
+        self._wake: Optional[asyncio.Event] = None
+        self._lock: Optional[asyncio.Lock] = None
+        self._task: Optional[asyncio.Task] = None
+        self.written = 0
+        self.duplicates = 0
+        self.rejected = 0
+        self.failed_flushes = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None
+
+    @property
+    def pending(self) -> int:
+        queued = len(self._active.docs) if self._active else 0
+        return queued + sum(len(segment.docs) for segment in self._segments)
+
+    async def submit(self, collection: str, doc: Dict):
+        """Store doc in collection, now or (in write-behind mode) on the next flush"""
+        if not self.running:
+            await self.db[collection].insert_one(doc)
+            return
+        self._buffer.append((dumps({"c": collection, "d": doc}) + b"\n", (collection, doc)))
+        if self._commit is None:
+            self._commit = asyncio.create_task(self._append())
+        # Shielded: a client disconnecting must not cancel the commit other submissions share
+        await asyncio.shield(self._commit)
+
+    async def _append(self):
+        """Write and fsync every buffered line to the active spill file, then queue the documents"""
+        async with self._append_lock:
+            batch, self._buffer = self._buffer, []
+            # Submissions from here on wait for the next commit
+            self._commit = None
+            segment = self._active
+            await asyncio.to_thread(self._write_spill, segment.fd, b"".join(line for line, _ in batch))
+            segment.docs.extend(entry for _, entry in batch)
+        if len(self._active.docs) >= self.batch_size:
+            self._wake.set()
+
+    @staticmethod
+    def _write_spill(fd: int, data: bytes):
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+        os.fsync(fd)
+
+    async def start(self):
+        if not self.enabled or self.running:
+            return
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._append_lock = asyncio.Lock()
+        self._active = await asyncio.to_thread(self._open_segment)
+        self._segments = await asyncio.to_thread(self._adopt_orphans)
+        if self._segments:
+            logger.info(f"Write-behind: replaying {self.pending} queued submissions")
+            self._wake.set()
+        self._task = asyncio.create_task(self._run())
+
+    async def drain(self):
+        """Stop the flush task and write out everything still queued"""
+        if not self.running:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        if self._commit is not None:
+            try:
+                await asyncio.shield(self._commit)
+            except Exception:
+                # The submitters were told; their documents were never queued
+                pass
+        if not await self.flush():
+            logger.warning(f"Write-behind: {self.pending} submissions left in {self.directory} for the next start")
+        for segment in self._segments:
+            segment.release(delete=False)
+        self._segments = []
+        self._active.release(delete=not self._active.docs)
+        self._active = None
+
+    async def flush(self) -> bool:
+        """Write every queued document; False if some are kept for a retry"""
+        async with self._lock:
+            async with self._append_lock:
+                if self._active.docs:
+                    # Swap files first; submissions arriving during the write go to the new one
+                    self._segments.append(self._active)
+                    self._active = await asyncio.to_thread(self._open_segment)
+            wrote = False
+            while self._segments:
+                segment = self._segments[0]
+                if not await self._write(segment.docs):
+                    return False
+                self._segments.pop(0)
+                await asyncio.to_thread(segment.release, True)
+                wrote = True
+            if wrote and self.on_flush:
+                self.on_flush()
+            return True
+
+    async def _run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Write-behind flush failed: {e}")
+
+    async def _write(self, docs: List[Tuple[str, Dict]]) -> bool:
+        by_collection: Dict[str, List[Dict]] = {}
+        for collection, doc in docs:
+            by_collection.setdefault(collection, []).append(doc)
+        for collection, batch in by_collection.items():
+            try:
+                await self.db[collection].insert_many(batch, ordered=False)
+            except BulkWriteError as e:
+                # Duplicates are replays (or a second signup with the same
+                # email); anything else would fail again, so it is dropped
+                errors = e.details.get("writeErrors", [])
+                duplicates = sum(1 for error in errors if error.get("code") == DUPLICATE_KEY)
+                self.duplicates += duplicates
+                if len(errors) > duplicates:
+                    self.rejected += len(errors) - duplicates
+                    logger.error(f"Write-behind: {len(errors) - duplicates} {collection} documents rejected: {errors[0].get('errmsg')}")
+                if e.details.get("writeConcernErrors"):
+                    self.failed_flushes += 1
+                    return False
+            except PyMongoError as e:
+                # Connection trouble: keep the segment and retry on the next flush
+                self.failed_flushes += 1
+                logger.warning(f"Write-behind flush of {collection} failed, will retry: {e}")
+                return False
+        self.written += len(docs)
+        return True
+
+    def _open_segment(self) -> _Segment:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.directory / f"spill-{os.getpid()}-{uuid.uuid4().hex[:8]}.ndjson"
+        fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_APPEND, 0o600)
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        return _Segment(path, fd)
+
+    def _adopt_orphans(self) -> List[_Segment]:
+        """Lock and load spill files left behind by stopped or crashed workers"""
+        adopted = []
+        for path in sorted(self.directory.glob("spill-*.ndjson"), key=lambda p: p.stat().st_mtime):
+            if path == self._active.path:
+                continue
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Still owned by a running worker
+                os.close(fd)
+                continue
+            if os.fstat(fd).st_nlink == 0:
+                # Flushed and deleted by its owner while we waited
+                os.close(fd)
+                continue
+            segment = _Segment(path, fd, self._read_spill(path))
+            if segment.docs:
+                adopted.append(segment)
+            else:
+                segment.release(delete=True)
+        return adopted
+
+    @staticmethod
+    def _read_spill(path: Path) -> List[Tuple[str, Dict]]:
+        docs = []
+        with open(path, "rb") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    docs.append((record["c"], record["d"]))
+                except (ValueError, KeyError, TypeError):
+                    # Torn final line from a crash mid-append
+                    logger.warning(f"Write-behind: skipping unreadable line in {path.name}")
+        return docs
+
+    def stats(self) -> Dict:
+        return {
+            "enabled": self.enabled,
+            "running": self.running,
+            "pending": self.pending,
+            "written": self.written,
+            "duplicates": self.duplicates,
+            "rejected": self.rejected,
+            "failedFlushes": self.failed_flushes,
+        }
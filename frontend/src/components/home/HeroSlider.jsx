@@ -2,6 +2,7 @@ import React, { useState, useEffect } from 'react';
 import { Link } from 'react-router-dom';
 import { ChevronLeft, ChevronRight } from 'lucide-react';
 import { useData } from '../../context/DataContext';
+import { imageUrl } from '../../lib/utils';
 
 const HeroSlider = () => {
   const { heroSlides } = useData();
@@ -50,7 +51,7 @@ const HeroSlider = () => {
         >
           <div 
             className="absolute inset-0 bg-cover bg-center"
-            style={{ backgroundImage: `url(${slide.image})` }}
+            style={{ backgroundImage: `url(${imageUrl(slide.image, 1920)})` }}
           >
             <div className="absolute inset-0 bg-gradient-to-r from-black/70 via-black/50 to-transparent" />
           </div>
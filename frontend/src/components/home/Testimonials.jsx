@@ -1,6 +1,7 @@
 import React, { useRef } from 'react';
 import { ChevronLeft, ChevronRight, Star } from 'lucide-react';
 import { useData } from '../../context/DataContext';
+import { imageUrl } from '../../lib/utils';
 
 const Testimonials = () => {
   const { testimonials } = useData();
@@ -72,7 +73,7 @@ const Testimonials = () => {
                 </p>
                 <div className="flex items-center gap-3">
                   <img
-                    src={testimonial.avatar}
+                    src={imageUrl(testimonial.avatar, 96)}
                     alt={testimonial.name}
                     className="w-12 h-12 rounded-full object-cover border-2 border-[#C1E899]"
                   />
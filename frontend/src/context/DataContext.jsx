@@ -82,29 +82,25 @@ export const DataProvider = ({ children }) => {
 
   const fetchAllData = async () => {
     try {
-      const [catRes, prodRes, heroRes, testRes, giftRes, settingsRes] = await Promise.all([
-        axios.get(`${API}/categories`).catch(() => ({ data: [] })),
-        axios.get(`${API}/products`).catch(() => ({ data: [] })),
-        axios.get(`${API}/hero-slides`).catch(() => ({ data: [] })),
-        axios.get(`${API}/testimonials`).catch(() => ({ data: [] })),
-        axios.get(`${API}/gift-boxes`).catch(() => ({ data: [] })),
-        axios.get(`${API}/site-settings`).catch(() => ({ data: {} }))
-      ]);
+      // Single bootstrap request; the backend rebuilds it only after admin writes
+      const response = await axios.get(`${API}/storefront`);
+      const storefront = response.data || {};
 
-      setCategories(catRes.data);
-      setProducts(prodRes.data);
-      setHeroSlides(heroRes.data);
-      setTestimonials(testRes.data);
-      setGiftBoxes(giftRes.data);
-      if (settingsRes.data && Object.keys(settingsRes.data).length > 0) {
-        setSiteSettings(settingsRes.data);
+      setCategories(storefront.categories || []);
+      setProducts(storefront.products || []);
+      setHeroSlides(storefront.heroSlides || []);
+      setTestimonials(storefront.testimonials || []);
+      setGiftBoxes(storefront.giftBoxes || []);
+      const settings = storefront.siteSettings;
+      if (settings && Object.keys(settings).length > 0) {
+        setSiteSettings(settings);
         // Apply theme CSS variables
-        if (settingsRes.data.theme) {
-          applyThemeCSS(settingsRes.data.theme);
+        if (settings.theme) {
+          applyThemeCSS(settings.theme);
         }
         // Apply page-specific CSS styles
-        if (settingsRes.data.pageStyles) {
-          applyPageStyles(settingsRes.data.pageStyles);
+        if (settings.pageStyles) {
+          applyPageStyles(settings.pageStyles);
         }
       }
     } catch (error) {
@@ -4,3 +4,10 @@ import { twMerge } from "tailwind-merge"
 export function cn(...inputs) {
   return twMerge(clsx(inputs));
 }
+
+// Resized WebP variant of an image uploaded through /api/upload; any other
+// image URL is returned unchanged
+export function imageUrl(src, width) {
+  if (!src || !src.includes('/api/uploads/')) return src;
+  return `${src}${src.includes('?') ? '&' : '?'}w=${width}&format=webp`;
+}
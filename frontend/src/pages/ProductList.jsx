@@ -1,4 +1,5 @@
-import React, { useState, useMemo } from 'react';
+import React, { useState, useEffect, useCallback } from 'react';
+import axios from 'axios';
 import { useSearchParams, Link } from 'react-router-dom';
 import { ChevronRight, Filter, X, SlidersHorizontal } from 'lucide-react';
 import Header from '../components/layout/Header';
@@ -6,6 +7,9 @@ import Footer from '../components/layout/Footer';
 import ProductCard from '../components/product/ProductCard';
 import ProductDetailModal from '../components/product/ProductDetailModal';
 import { useData } from '../context/DataContext';
+import { API_BASE_URL } from '../config/api';
+
+const PAGE_SIZE = 24;
 
 const productTypes = [
   "Almonds",
@@ -22,7 +26,7 @@ const productTypes = [
 ];
 
 const ProductList = () => {
-  const { products, categories } = useData();
+  const { categories } = useData();
   const [searchParams] = useSearchParams();
   const categorySlug = searchParams.get('category');
   const searchQuery = searchParams.get('search');
@@ -32,49 +36,52 @@ const ProductList = () => {
   const [isFilterOpen, setIsFilterOpen] = useState(false);
   const [selectedProduct, setSelectedProduct] = useState(null);
 
-  const filteredProducts = useMemo(() => {
-    let result = [...products];
+  // Category, type, price and sort are applied by the API one page at a time
+  const [pagedProducts, setPagedProducts] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
+  const [loadingMore, setLoadingMore] = useState(false);
 
-    // Filter by category
-    if (categorySlug) {
-      result = result.filter(p => p.category === categorySlug);
+  const fetchProducts = useCallback(async (cursor = null) => {
+    setLoadingMore(true);
+    try {
+      const params = {
+        sort: sortBy,
+        minPrice: priceRange[0],
+        maxPrice: priceRange[1],
+        limit: PAGE_SIZE
+      };
+      if (categorySlug) params.category = categorySlug;
+      if (selectedType) params.type = selectedType;
+      if (cursor) params.cursor = cursor;
+      const response = await axios.get(`${API_BASE_URL}/products`, { params });
+      setPagedProducts(prev => (cursor ? [...prev, ...response.data.items] : response.data.items));
+      setNextCursor(response.data.nextCursor);
+    } catch (error) {
+      console.error('Error fetching products:', error);
+    } finally {
+      setLoadingMore(false);
     }
+  }, [categorySlug, selectedType, priceRange, sortBy]);
 
-    // Filter by search
-    if (searchQuery) {
-      const query = searchQuery.toLowerCase();
-      result = result.filter(p => 
-        p.name.toLowerCase().includes(query) ||
-        p.type.toLowerCase().includes(query) ||
-        p.category.toLowerCase().includes(query)
-      );
-    }
+  // Search is ranked by the API and tolerates typos
+  const [searchResults, setSearchResults] = useState([]);
 
-    // Filter by type
-    if (selectedType) {
-      result = result.filter(p => p.type === selectedType);
+  useEffect(() => {
+    if (!searchQuery) {
+      fetchProducts();
+      return;
     }
+    setLoadingMore(true);
+    axios.get(`${API_BASE_URL}/search`, { params: { q: searchQuery, limit: 50 } })
+      .then(response => setSearchResults(response.data.items))
+      .catch(error => {
+        console.error('Error searching products:', error);
+        setSearchResults([]);
+      })
+      .finally(() => setLoadingMore(false));
+  }, [fetchProducts, searchQuery]);
 
-    // Filter by price
-    result = result.filter(p => p.basePrice >= priceRange[0] && p.basePrice <= priceRange[1]);
-
-    // Sort
-    switch (sortBy) {
-      case 'price-low':
-        result.sort((a, b) => a.basePrice - b.basePrice);
-        break;
-      case 'price-high':
-        result.sort((a, b) => b.basePrice - a.basePrice);
-        break;
-      case 'name':
-        result.sort((a, b) => a.name.localeCompare(b.name));
-        break;
-      default:
-        break;
-    }
-
-    return result;
-  }, [products, categorySlug, searchQuery, selectedType, priceRange, sortBy]);
+  const filteredProducts = searchQuery ? searchResults : pagedProducts;
 
   const currentCategory = categories.find(c => c.slug === categorySlug);
 
@@ -211,7 +218,7 @@ const ProductList = () => {
                     </div>
                   ))}
                 </div>
-              ) : (
+              ) : loadingMore ? null : (
                 <div className="bg-white rounded-xl p-12 text-center">
                   <p className="text-gray-500 text-lg">No products found matching your criteria.</p>
                   <Link to="/products" className="text-[#8BC34A] hover:text-[#689F38] font-medium mt-2 inline-block">
@@ -219,6 +226,18 @@ const ProductList = () => {
                   </Link>
                 </div>
               )}
+
+              {!searchQuery && nextCursor && (
+                <div className="text-center mt-8">
+                  <button
+                    onClick={() => fetchProducts(nextCursor)}
+                    disabled={loadingMore}
+                    className="bg-[#7CB342] hover:bg-[#689F38] text-white font-medium py-3 px-8 rounded-lg transition-colors disabled:opacity-50"
+                  >
+                    {loadingMore ? 'Loading...' : 'Load More'}
+                  </button>
+                </div>
+              )}
             </div>
           </div>
         </div>
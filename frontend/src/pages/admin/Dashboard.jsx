@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from 'react';
-import { Package, Image, Star, Gift, RefreshCw } from 'lucide-react';
+import { Package, Image, Star, Gift, RefreshCw, ClipboardList, Mail } from 'lucide-react';
 import axios from 'axios';
 import { API_BASE_URL } from '../../config/api';
 
@@ -10,8 +10,11 @@ const Dashboard = () => {
     products: 0,
     categories: 0,
     testimonials: 0,
-    giftBoxes: 0
+    giftBoxes: 0,
+    bulkOrders: 0,
+    newsletter: 0
   });
+  const [bulkOrderStatus, setBulkOrderStatus] = useState({});
   const [loading, setLoading] = useState(true);
   const [seeding, setSeeding] = useState(false);
 
@@ -21,19 +24,9 @@ const Dashboard = () => {
 
   const fetchStats = async () => {
     try {
-      const [products, categories, testimonials, giftBoxes] = await Promise.all([
-        axios.get(`${API}/products`),
-        axios.get(`${API}/categories`),
-        axios.get(`${API}/testimonials`),
-        axios.get(`${API}/gift-boxes`)
-      ]);
-
-      setStats({
-        products: products.data.length,
-        categories: categories.data.length,
-        testimonials: testimonials.data.length,
-        giftBoxes: giftBoxes.data.length
-      });
+      const response = await axios.get(`${API}/admin/stats`);
+      setStats(response.data.counts);
+      setBulkOrderStatus(response.data.bulkOrderStatus);
     } catch (error) {
       console.error('Error fetching stats:', error);
     } finally {
@@ -63,6 +56,8 @@ const Dashboard = () => {
     { name: 'Categories', value: stats.categories, icon: Image, color: 'bg-green-500' },
     { name: 'Testimonials', value: stats.testimonials, icon: Star, color: 'bg-yellow-500' },
     { name: 'Gift Boxes', value: stats.giftBoxes, icon: Gift, color: 'bg-purple-500' },
+    { name: 'Bulk Orders', value: stats.bulkOrders, detail: `${bulkOrderStatus.new || 0} new`, icon: ClipboardList, color: 'bg-orange-500' },
+    { name: 'Newsletter', value: stats.newsletter, icon: Mail, color: 'bg-pink-500' },
   ];
 
   return (
@@ -73,7 +68,7 @@ const Dashboard = () => {
       </div>
 
       {/* Stats Grid */}
-      <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-4 gap-6 mb-8">
+      <div className="grid grid-cols-1 md:grid-cols-2 lg:grid-cols-3 gap-6 mb-8">
         {statCards.map((stat) => (
           <div key={stat.name} className="bg-white rounded-xl shadow-sm p-6">
             <div className="flex items-center justify-between">
@@ -82,6 +77,9 @@ const Dashboard = () => {
                 <p className="text-3xl font-bold text-gray-800 mt-1">
                   {loading ? '...' : stat.value}
                 </p>
+                {stat.detail && !loading && (
+                  <p className="text-sm text-gray-500 mt-1">{stat.detail}</p>
+                )}
               </div>
               <div className={`${stat.color} p-3 rounded-lg`}>
                 <stat.icon className="w-6 h-6 text-white" />
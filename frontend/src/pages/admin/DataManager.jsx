@@ -38,10 +38,11 @@ const DataManager = () => {
   const handleExport = async () => {
     try {
       setExporting(true);
-      const response = await axios.get(`${API}/export-data`);
+      // Keep the streamed export as raw bytes instead of parsing it in the browser
+      const response = await axios.get(`${API}/export-data`, { responseType: 'blob' });
       
       // Create and download the file
-      const blob = new Blob([JSON.stringify(response.data, null, 2)], { type: 'application/json' });
+      const blob = new Blob([response.data], { type: 'application/json' });
       const url = window.URL.createObjectURL(blob);
       const a = document.createElement('a');
       a.href = url;
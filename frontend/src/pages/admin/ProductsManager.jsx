@@ -18,13 +18,27 @@ const ProductsManager = () => {
     fetchData();
   }, []);
 
+  // The products API is paginated; the manager walks every page
+  const fetchAllProducts = async () => {
+    const items = [];
+    let cursor = null;
+    do {
+      const response = await axios.get(`${API}/products`, {
+        params: { limit: 100, ...(cursor ? { cursor } : {}) }
+      });
+      items.push(...response.data.items);
+      cursor = response.data.nextCursor;
+    } while (cursor);
+    return items;
+  };
+
   const fetchData = async () => {
     try {
-      const [productsRes, categoriesRes] = await Promise.all([
-        axios.get(`${API}/products`),
+      const [allProducts, categoriesRes] = await Promise.all([
+        fetchAllProducts(),
         axios.get(`${API}/categories`)
       ]);
-      setProducts(productsRes.data);
+      setProducts(allProducts);
       setCategories(categoriesRes.data);
     } catch (error) {
       console.error('Error fetching data:', error);
@@ -4,28 +4,56 @@ import axios from 'axios';
 import { API_BASE_URL } from '../../config/api';
 
 const API = API_BASE_URL;
+const PAGE_SIZE = 50;
 
 const SubmissionsManager = () => {
   const [activeTab, setActiveTab] = useState('bulk');
   const [bulkOrders, setBulkOrders] = useState([]);
   const [newsletters, setNewsletters] = useState([]);
+  const [bulkCursor, setBulkCursor] = useState(null);
+  const [newsCursor, setNewsCursor] = useState(null);
+  const [counts, setCounts] = useState({ bulkOrders: 0, newsletter: 0 });
   const [loading, setLoading] = useState(true);
+  const [loadingMore, setLoadingMore] = useState(false);
   const [searchTerm, setSearchTerm] = useState('');
+  const [search, setSearch] = useState('');
+  const [statusFilter, setStatusFilter] = useState('');
   const [selectedOrder, setSelectedOrder] = useState(null);
+  const [exportSince, setExportSince] = useState('');
+  const [exportUntil, setExportUntil] = useState('');
+  const [exporting, setExporting] = useState(false);
+
+  // Search runs on the server; wait for typing to pause
+  useEffect(() => {
+    const timer = setTimeout(() => setSearch(searchTerm.trim()), 300);
+    return () => clearTimeout(timer);
+  }, [searchTerm]);
 
   useEffect(() => {
     fetchData();
-  }, []);
+  }, [search, statusFilter]);
+
+  const fetchBulkOrders = (cursor) => axios.get(`${API}/bulk-orders`, {
+    params: { limit: PAGE_SIZE, cursor, search: search || undefined, status: statusFilter || undefined }
+  });
+
+  const fetchNewsletters = (cursor) => axios.get(`${API}/newsletter`, {
+    params: { limit: PAGE_SIZE, cursor, search: search || undefined }
+  });
 
   const fetchData = async () => {
     setLoading(true);
     try {
-      const [bulkRes, newsRes] = await Promise.all([
-        axios.get(`${API}/bulk-orders`),
-        axios.get(`${API}/newsletter`)
+      const [bulkRes, newsRes, statsRes] = await Promise.all([
+        fetchBulkOrders(),
+        fetchNewsletters(),
+        axios.get(`${API}/admin/stats`)
       ]);
-      setBulkOrders(bulkRes.data);
-      setNewsletters(newsRes.data);
+      setBulkOrders(bulkRes.data.items);
+      setBulkCursor(bulkRes.data.nextCursor);
+      setNewsletters(newsRes.data.items);
+      setNewsCursor(newsRes.data.nextCursor);
+      setCounts(statsRes.data.counts);
     } catch (error) {
       console.error('Error fetching data:', error);
     } finally {
@@ -33,6 +61,25 @@ const SubmissionsManager = () => {
     }
   };
 
+  const loadMore = async () => {
+    setLoadingMore(true);
+    try {
+      if (activeTab === 'bulk') {
+        const response = await fetchBulkOrders(bulkCursor);
+        setBulkOrders(prev => [...prev, ...response.data.items]);
+        setBulkCursor(response.data.nextCursor);
+      } else {
+        const response = await fetchNewsletters(newsCursor);
+        setNewsletters(prev => [...prev, ...response.data.items]);
+        setNewsCursor(response.data.nextCursor);
+      }
+    } catch (error) {
+      console.error('Error loading more:', error);
+    } finally {
+      setLoadingMore(false);
+    }
+  };
+
   const updateBulkOrderStatus = async (orderId, status) => {
     try {
       await axios.put(`${API}/bulk-orders/${orderId}?status=${status}`);
@@ -47,6 +94,7 @@ const SubmissionsManager = () => {
     try {
       await axios.delete(`${API}/bulk-orders/${orderId}`);
       setBulkOrders(bulkOrders.filter(o => o.id !== orderId));
+      setCounts(c => ({ ...c, bulkOrders: c.bulkOrders - 1 }));
     } catch (error) {
       console.error('Error deleting:', error);
     }
@@ -57,40 +105,45 @@ const SubmissionsManager = () => {
     try {
       await axios.delete(`${API}/newsletter/${subId}`);
       setNewsletters(newsletters.filter(n => n.id !== subId));
+      setCounts(c => ({ ...c, newsletter: c.newsletter - 1 }));
     } catch (error) {
       console.error('Error deleting:', error);
     }
   };
 
-  const exportToCSV = (data, filename) => {
-    if (data.length === 0) {
-      alert('No data to export');
-      return;
+  // The server streams every matching submission, not just the loaded pages
+  const exportToCSV = async () => {
+    const isBulk = activeTab === 'bulk';
+    setExporting(true);
+    try {
+      const response = await axios.get(`${API}/${isBulk ? 'bulk-orders' : 'newsletter'}/export`, {
+        params: {
+          format: 'csv',
+          since: exportSince || undefined,
+          until: exportUntil || undefined,
+          search: search || undefined,
+          status: isBulk && statusFilter ? statusFilter : undefined
+        },
+        responseType: 'blob'
+      });
+      const url = URL.createObjectURL(new Blob([response.data], { type: 'text/csv;charset=utf-8;' }));
+      const link = document.createElement('a');
+      link.href = url;
+      link.download = `${isBulk ? 'bulk_orders' : 'newsletter_subscriptions'}_${new Date().toISOString().split('T')[0]}.csv`;
+      link.click();
+      URL.revokeObjectURL(url);
+    } catch (error) {
+      console.error('Error exporting:', error);
+      alert('Export failed');
+    } finally {
+      setExporting(false);
     }
-
-    const headers = Object.keys(data[0]).filter(k => k !== 'id');
-    const csvContent = [
-      headers.join(','),
-      ...data.map(row => headers.map(h => `"${(row[h] || '').toString().replace(/"/g, '""')}"`).join(','))
-    ].join('\n');
-
-    const blob = new Blob([csvContent], { type: 'text/csv;charset=utf-8;' });
-    const link = document.createElement('a');
-    link.href = URL.createObjectURL(blob);
-    link.download = `${filename}_${new Date().toISOString().split('T')[0]}.csv`;
-    link.click();
   };
 
-  const filteredBulkOrders = bulkOrders.filter(order =>
-    order.name?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    order.company?.toLowerCase().includes(searchTerm.toLowerCase()) ||
-    order.phone?.includes(searchTerm) ||
-    order.email?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
-
-  const filteredNewsletters = newsletters.filter(sub =>
-    sub.email?.toLowerCase().includes(searchTerm.toLowerCase())
-  );
+  // Already filtered by the server
+  const filteredBulkOrders = bulkOrders;
+  const filteredNewsletters = newsletters;
+  const hasMore = activeTab === 'bulk' ? bulkCursor : newsCursor;
 
   const getStatusBadge = (status) => {
     const styles = {
@@ -134,7 +187,7 @@ const SubmissionsManager = () => {
           }`}
         >
           <Package className="w-5 h-5" />
-          Bulk Orders ({bulkOrders.length})
+          Bulk Orders ({counts.bulkOrders})
         </button>
         <button
           onClick={() => setActiveTab('newsletter')}
@@ -145,7 +198,7 @@ const SubmissionsManager = () => {
           }`}
         >
           <Mail className="w-5 h-5" />
-          Newsletter ({newsletters.length})
+          Newsletter ({counts.newsletter})
         </button>
       </div>
 
@@ -163,6 +216,21 @@ const SubmissionsManager = () => {
             />
           </div>
         </div>
+        {activeTab === 'bulk' && (
+          <div className="relative">
+            <Filter className="absolute left-3 top-1/2 -translate-y-1/2 w-5 h-5 text-gray-400" />
+            <select
+              value={statusFilter}
+              onChange={(e) => setStatusFilter(e.target.value)}
+              className="pl-10 pr-4 py-2 border rounded-lg focus:ring-2 focus:ring-[#8BC34A] outline-none"
+            >
+              <option value="">All statuses</option>
+              <option value="new">New</option>
+              <option value="contacted">Contacted</option>
+              <option value="completed">Completed</option>
+            </select>
+          </div>
+        )}
         <button
           onClick={fetchData}
           className="flex items-center gap-2 px-4 py-2 bg-gray-100 hover:bg-gray-200 rounded-lg transition-colors"
@@ -170,15 +238,30 @@ const SubmissionsManager = () => {
           <RefreshCw className="w-5 h-5" />
           Refresh
         </button>
+        <div className="flex items-center gap-2">
+          <input
+            type="date"
+            value={exportSince}
+            onChange={(e) => setExportSince(e.target.value)}
+            title="Export from"
+            className="px-3 py-2 border rounded-lg focus:ring-2 focus:ring-[#8BC34A] outline-none"
+          />
+          <span className="text-gray-400">to</span>
+          <input
+            type="date"
+            value={exportUntil}
+            onChange={(e) => setExportUntil(e.target.value)}
+            title="Export until"
+            className="px-3 py-2 border rounded-lg focus:ring-2 focus:ring-[#8BC34A] outline-none"
+          />
+        </div>
         <button
-          onClick={() => exportToCSV(
-            activeTab === 'bulk' ? bulkOrders : newsletters,
-            activeTab === 'bulk' ? 'bulk_orders' : 'newsletter_subscriptions'
-          )}
-          className="flex items-center gap-2 px-4 py-2 bg-green-600 hover:bg-green-700 text-white rounded-lg transition-colors"
+          onClick={exportToCSV}
+          disabled={exporting}
+          className="flex items-center gap-2 px-4 py-2 bg-green-600 hover:bg-green-700 text-white rounded-lg transition-colors disabled:opacity-50"
         >
           <Download className="w-5 h-5" />
-          Export CSV
+          {exporting ? 'Exporting...' : 'Export CSV'}
         </button>
       </div>
 
@@ -294,6 +377,18 @@ const SubmissionsManager = () => {
               )}
             </div>
           )}
+
+          {hasMore && (
+            <div className="text-center mt-6">
+              <button
+                onClick={loadMore}
+                disabled={loadingMore}
+                className="px-6 py-2 bg-gray-100 hover:bg-gray-200 rounded-lg transition-colors disabled:opacity-50"
+              >
+                {loadingMore ? 'Loading...' : 'Load More'}
+              </button>
+            </div>
+          )}
         </>
       )}
 
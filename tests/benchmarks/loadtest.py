@@ -0,0 +1,283 @@
+# Load test for the API: throughput and latency percentiles per route
+#
+# Boots server.app in-process (requests go through httpx's ASGI transport, so
+# no server or network is involved), seeds a generated catalog of --scale
+# products (see seed_data.py), and runs --concurrency async clients for
+# --duration seconds. Each client picks
+# scenarios from a weighted mix: storefront and catalog reads, product
+# detail, search, newsletter signups, bulk-order posts, imports, exports
+# and uploads. Run from the repo root:
+#
+#   python -m tests.benchmarks.loadtest                      # in-memory database
+#   python -m tests.benchmarks.loadtest --mongo mongodb://localhost:27017
+#   python -m tests.benchmarks.loadtest --save-baseline      # record numbers
+#   python -m tests.benchmarks.loadtest --baseline tests/benchmarks/baseline.json
+#
+# The in-memory database is mongomock-motor (pip install mongomock-motor). It
+# shows the cost of the Python side only. Use a real mongod for numbers that
+# mean anything about production. With --mongo, a scratch database
+# (--db, default dryfruto_loadtest) is dropped and re-created first.
+#
+# --baseline compares every scenario with a stored run. It exits with status
+# 1 when a p95 is more than --threshold (default 25%) slower, or when
+# throughput drops by more than that. Baselines depend on the machine, so
+# record them on the machine that compares against them.
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import struct
+import sys
+import tempfile
+import time
+import uuid
+import zlib
+from pathlib import Path
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+DEFAULT_BASELINE = Path(__file__).resolve().parent / "baseline.json"
+
+
+def tiny_png(seed: int) -> bytes:
+    """A valid 8x8 RGB PNG; different seeds give different files"""
+    def chunk(kind: bytes, data: bytes) -> bytes:
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+    rows = b"".join(b"\x00" + bytes((seed * 7 + x * 31 + y) % 256 for x in range(24)) for y in range(8))
+    header = struct.pack(">IIBBBBB", 8, 8, 8, 2, 0, 0, 0)
+    return b"\x89PNG\r\n\x1a\n" + chunk(b"IHDR", header) + chunk(b"IDAT", zlib.compress(rows)) + chunk(b"IEND", b"")
+
+
+class Context:
+    """State shared by scenarios: seeded ids, auth header, import payload"""
+
+    def __init__(self, product_ids: List[str], search_terms: List[str], token: str, import_payload: bytes):
+        self.product_ids = product_ids
+        self.search_terms = search_terms
+        self.auth = {"Authorization": f"Bearer {token}"}
+        self.import_payload = import_payload
+
+
+Scenario = Callable[[httpx.AsyncClient, Context, random.Random], Awaitable[httpx.Response]]
+
+
+async def storefront(client, ctx, rng):
+    return await client.get("/api/storefront")
+
+
+async def product_list(client, ctx, rng):
+    return await client.get("/api/products", params={"limit": 24})
+
+
+async def product_detail(client, ctx, rng):
+    return await client.get(f"/api/products/{rng.choice(ctx.product_ids)}")
+
+
+async def search(client, ctx, rng):
+    return await client.get("/api/search", params={"q": rng.choice(ctx.search_terms)})
+
+
+async def newsletter_signup(client, ctx, rng):
+    return await client.post("/api/newsletter", json={"email": f"load-{uuid.uuid4().hex[:12]}@example.com"})
+
+
+async def bulk_order(client, ctx, rng):
+    return await client.post("/api/bulk-orders", json={
+        "name": "Load Test", "company": "Bench Co", "email": "bench@example.com",
+        "phone": "9999999999", "productType": "Almonds", "quantity": f"{rng.randint(10, 500)} kg",
+    })
+
+
+async def export_data(client, ctx, rng):
+    return await client.get("/api/export-data")
+
+
+async def import_data(client, ctx, rng):
+    files = {"file": ("loadtest.json", ctx.import_payload, "application/json")}
+    return await client.post("/api/import-data", files=files)
+
+
+async def upload(client, ctx, rng):
+    # A small pool of images, so repeats exercise the content-addressed dedup
+    files = {"file": ("load.png", tiny_png(rng.randrange(16)), "image/png")}
+    return await client.post("/api/upload", files=files, headers=ctx.auth)
+
+
+# name -> (scenario, weight)
+MIX: Dict[str, Tuple[Scenario, int]] = {
+    "storefront": (storefront, 30),
+    "product_list": (product_list, 15),
+    "product_detail": (product_detail, 25),
+    "search": (search, 8),
+    "newsletter_signup": (newsletter_signup, 10),
+    "bulk_order": (bulk_order, 5),
+    "upload": (upload, 4),
+    "export_data": (export_data, 2),
+    "import_data": (import_data, 1),
+}
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+async def setup_database(args):
+    """Point server at the chosen database and return the server module"""
+    sys.path.insert(0, str(BACKEND_DIR))
+    os.environ.setdefault("MONGO_URL", args.mongo or "mongodb://localhost:27017")
+    os.environ["DB_NAME"] = args.db
+    import server
+
+    if args.mongo:
+        await server.client.drop_database(args.db)
+    else:
+        try:
+            from mongomock_motor import AsyncMongoMockClient
+        except ImportError:
+            sys.exit("The in-memory database needs mongomock-motor: pip install mongomock-motor (or pass --mongo URL)")
+        server.client = AsyncMongoMockClient()
+        server.db = server.client[args.db]
+        # Objects built at import time hold their own reference to db
+        server.cache_bus.db = server.db
+        server.write_behind.db = server.db
+    server.UPLOAD_DIR = Path(tempfile.mkdtemp(prefix="dryfruto-loadtest-"))
+    return server
+
+
+async def seed(server, client: httpx.AsyncClient, scale: int, random_seed: int) -> Context:
+    response = await client.post("/api/seed-data")
+    response.raise_for_status()
+    from seed_data import SCALE_UNIT, insert_generated
+
+    # Replace the fixed catalog with a generated one of the requested size
+    await insert_generated(server.db, scale / SCALE_UNIT["products"], random_seed)
+    await server.mark_catalog_changed(*server.CATALOG_COLLECTIONS)
+
+    product_ids = [doc["id"] async for doc in server.db.products.find({}, {"id": 1, "_id": 0})]
+    names = [doc["name"] async for doc in server.db.products.find({}, {"name": 1, "_id": 0}).limit(200)]
+    search_terms = sorted({word.lower() for name in names for word in name.split() if len(word) > 3})
+
+    # Re-importing a slice of the catalog updates it in place
+    categories = [doc async for doc in server.db.categories.find({}, {"_id": 0})]
+    products = [doc async for doc in server.db.products.find({}, {"_id": 0}).limit(50)]
+    payload = json.dumps({"categories": categories, "products": products}, default=str).encode()
+
+    token = server.create_jwt_token("loadtest", "loadtest")
+    return Context(product_ids, search_terms or ["almond"], token, payload)
+
+
+async def run(args) -> Dict[str, Dict]:
+    server = await setup_database(args)
+    mix = {name: MIX[name] for name in (args.only or MIX)}
+    names = list(mix)
+    weights = [mix[name][1] for name in names]
+    latencies: Dict[str, List[float]] = {name: [] for name in names}
+    errors: Dict[str, int] = {name: 0 for name in names}
+
+    transport = httpx.ASGITransport(app=server.app)
+    await server.app.router.startup()
+    try:
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=120) as client:
+            ctx = await seed(server, client, args.scale, args.seed)
+            print(f"seeded {len(ctx.product_ids)} products; running {args.concurrency} clients for {args.duration}s")
+
+            deadline = time.perf_counter() + args.duration
+
+            async def worker(index: int):
+                rng = random.Random(args.seed * 1000 + index)
+                while time.perf_counter() < deadline:
+                    name = rng.choices(names, weights)[0]
+                    start = time.perf_counter()
+                    try:
+                        response = await mix[name][0](client, ctx, rng)
+                        failed = response.status_code >= 400
+                    except Exception:
+                        failed = True
+                    latencies[name].append(time.perf_counter() - start)
+                    if failed:
+                        errors[name] += 1
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker(i) for i in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+    finally:
+        await server.app.router.shutdown()
+
+    results = {}
+    for name in names:
+        values = latencies[name]
+        results[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "rps": round(len(values) / elapsed, 2),
+            "p50Ms": round(percentile(values, 0.50) * 1000, 2),
+            "p95Ms": round(percentile(values, 0.95) * 1000, 2),
+            "p99Ms": round(percentile(values, 0.99) * 1000, 2),
+            "maxMs": round(max(values, default=0.0) * 1000, 2),
+        }
+    return results
+
+
+def print_report(results: Dict[str, Dict]):
+    print(f"{'scenario':18} {'requests':>8} {'errors':>6} {'rps':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name, row in results.items():
+        print(f"{name:18} {row['requests']:>8} {row['errors']:>6} {row['rps']:>8} "
+              f"{row['p50Ms']:>8} {row['p95Ms']:>8} {row['p99Ms']:>8} {row['maxMs']:>8}")
+
+
+def compare(results: Dict[str, Dict], baseline: Dict[str, Dict], threshold: float) -> List[str]:
+    """Descriptions of scenarios that regressed against the baseline"""
+    regressions = []
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base or not row["requests"]:
+            continue
+        if base["p95Ms"] and row["p95Ms"] > base["p95Ms"] * (1 + threshold):
+            regressions.append(f"{name}: p95 {row['p95Ms']} ms vs baseline {base['p95Ms']} ms")
+        if base["rps"] and row["rps"] < base["rps"] * (1 - threshold):
+            regressions.append(f"{name}: {row['rps']} req/s vs baseline {base['rps']} req/s")
+    return regressions
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Load test the DryFruto API in-process")
+    parser.add_argument("--mongo", help="MongoDB URL; default is an in-memory stand-in")
+    parser.add_argument("--db", default="dryfruto_loadtest", help="scratch database name (dropped first with --mongo)")
+    parser.add_argument("--scale", type=int, default=1000, help="products in the seeded catalog")
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds to run")
+    parser.add_argument("--concurrency", type=int, default=32, help="concurrent clients")
+    parser.add_argument("--seed", type=int, default=42, help="random seed for data and scenario choice")
+    parser.add_argument("--only", nargs="+", choices=list(MIX), help="run only these scenarios")
+    parser.add_argument("--out", type=Path, help="write the results as JSON")
+    parser.add_argument("--baseline", type=Path, help="compare against this results file")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, type=Path, help="store the results as the baseline")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed relative regression")
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print_report(results)
+    if args.out:
+        args.out.write_text(json.dumps(results, indent=2))
+    if args.save_baseline:
+        args.save_baseline.write_text(json.dumps(results, indent=2))
+        print(f"baseline saved to {args.save_baseline}")
+    if args.baseline:
+        regressions = compare(results, json.loads(args.baseline.read_text()), args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}:")
+            for line in regressions:
+                print(f"  {line}")
+            return 1
+        print(f"no regressions over {args.threshold:.0%} against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
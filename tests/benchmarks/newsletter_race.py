@@ -0,0 +1,84 @@
+# Concurrent duplicate newsletter signups must store exactly one document
+#
+# Fires --requests parallel POST /api/newsletter calls for one address, in
+# mixed case and with stray whitespace, and checks that exactly one response
+# reports a new subscription and exactly one document exists afterwards. Run
+# from the repo root against the database in MONGO_URL / DB_NAME:
+#
+#   python -m tests.benchmarks.newsletter_race [--requests 2000]
+#
+# By default requests go through the ASGI app in-process; pass
+# --url http://localhost:8001 to race the workers of a running server (which
+# must use the same database). The test address is deleted afterwards.
+# With WRITE_BEHIND=on every signup is acknowledged as new, so run it off.
+
+import argparse
+import asyncio
+import os
+import sys
+import time
+import uuid
+from pathlib import Path
+
+import httpx
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "dryfruto")
+
+import server  # noqa: E402
+from indexes import ensure_indexes  # noqa: E402
+
+
+def variants(email: str):
+    """Spellings of one address that must all count as the same subscriber"""
+    local, domain = email.split("@")
+    return [email, email.upper(), f"  {email} ", f"{local.capitalize()}@{domain.upper()}"]
+
+
+async def race(client: httpx.AsyncClient, email: str, requests: int, concurrency: int):
+    spellings = variants(email)
+    gate = asyncio.Semaphore(concurrency)
+
+    async def subscribe(i: int):
+        async with gate:
+            response = await client.post("/api/newsletter", json={"email": spellings[i % len(spellings)]})
+            response.raise_for_status()
+            return response.json()
+
+    return await asyncio.gather(*(subscribe(i) for i in range(requests)))
+
+
+async def main(args) -> int:
+    email = f"race-{uuid.uuid4().hex[:12]}@example.com"
+    if args.url:
+        client = httpx.AsyncClient(base_url=args.url, timeout=60)
+    else:
+        await ensure_indexes(server.db)
+        client = httpx.AsyncClient(transport=httpx.ASGITransport(app=server.app), base_url="http://race", timeout=60)
+
+    try:
+        start = time.perf_counter()
+        async with client:
+            results = await race(client, email, args.requests, args.concurrency)
+        elapsed = time.perf_counter() - start
+        created = sum(1 for result in results if not result.get("exists"))
+        stored = await server.db.newsletter.count_documents({"email": email})
+    finally:
+        await server.db.newsletter.delete_many({"email": email})
+
+    print(f"{args.requests} requests in {elapsed:.2f}s: {created} reported new, {stored} stored")
+    if created != 1 or stored != 1:
+        print("FAIL: expected exactly one new subscription and one document")
+        return 1
+    print("ok")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Race duplicate newsletter subscriptions")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=500, help="requests in flight at once")
+    parser.add_argument("--url", help="base URL of a running server instead of the in-process app")
+    sys.exit(asyncio.run(main(parser.parse_args())))
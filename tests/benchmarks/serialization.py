@@ -0,0 +1,85 @@
+# Per-request CPU cost of serializing product lists
+#
+# Compares FastAPI's response_model path (validate every document against
+# List[Product], serialize, json.dumps) with the fast path used by the read
+# routes (fill defaults, encode with fast_json.dumps). Run from the repo root:
+#
+#   python -m tests.benchmarks.serialization [--sizes 1000 10000] [--repeat 5]
+#
+# No database is needed; documents are built from seed_data.SEED_PRODUCTS.
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List
+
+BACKEND_DIR = Path(__file__).resolve().parents[2] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+# server.py reads these at import time; the client never connects here
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+from fastapi.responses import JSONResponse  # noqa: E402
+from fastapi.routing import serialize_response  # noqa: E402
+from fastapi.utils import create_response_field  # noqa: E402
+
+import fast_json  # noqa: E402
+from seed_data import SEED_PRODUCTS  # noqa: E402
+from server import Product  # noqa: E402
+
+
+def make_products(count: int) -> List[dict]:
+    docs = []
+    for i in range(count):
+        doc = dict(SEED_PRODUCTS[i % len(SEED_PRODUCTS)])
+        doc["id"] = f"bench-{i}"
+        doc["slug"] = f"{doc['slug']}-{i}"
+        docs.append(doc)
+    return docs
+
+
+def response_model_path(docs: List[dict]) -> bytes:
+    """What FastAPI does for a route declaring response_model=List[Product]"""
+    field = create_response_field(name="Response_bench", type_=List[Product], mode="serialization")
+    content = asyncio.run(serialize_response(field=field, response_content=docs))
+    return JSONResponse(content).body
+
+
+def fast_path(docs: List[dict]) -> bytes:
+    return fast_json.dump_documents(Product, docs)
+
+
+def cpu_ms(fn: Callable[[List[dict]], bytes], docs: List[dict], repeat: int) -> float:
+    """Best-of-repeat CPU time of one call, in milliseconds"""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        fn(docs)
+        best = min(best, time.process_time() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark product list serialization")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    encoder = "orjson" if fast_json.orjson is not None else "json (orjson not installed)"
+    print(f"fast path encoder: {encoder}")
+    print(f"{'products':>9} {'response_model ms':>18} {'fast path ms':>13} {'saved ms':>9} {'speedup':>8}")
+    for size in args.sizes:
+        docs = make_products(size)
+        # Both paths must produce the same document
+        assert json.loads(response_model_path(docs)) == json.loads(fast_path(docs))
+        slow = cpu_ms(response_model_path, docs, args.repeat)
+        fast = cpu_ms(fast_path, docs, args.repeat)
+        print(f"{size:>9} {slow:>18.1f} {fast:>13.1f} {slow - fast:>9.1f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+# Shared fixtures: server.app on an in-memory MongoDB (mongomock-motor)
+#
+# Each test gets a fresh database and empty caches. Run from the repo root:
+#
+#   pip install mongomock-motor
+#   python -m pytest tests
+
+import os
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parents[1] / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "dryfruto_test")
+os.environ.setdefault("WRITE_BEHIND", "off")
+
+mongomock_motor = pytest.importorskip("mongomock_motor")
+
+
+@pytest.fixture
+def server(tmp_path, monkeypatch):
+    """The server module bound to an empty in-memory database"""
+    import server as server_module
+
+    mock = mongomock_motor.AsyncMongoMockClient()
+    db = mock[os.environ["DB_NAME"]]
+    monkeypatch.setattr(server_module, "client", mock)
+    monkeypatch.setattr(server_module, "db", db)
+    # Objects built at import time hold their own reference to db
+    monkeypatch.setattr(server_module.cache_bus, "db", db)
+    monkeypatch.setattr(server_module.write_behind, "db", db)
+    monkeypatch.setattr(server_module, "UPLOAD_DIR", tmp_path / "uploads")
+    server_module.catalog_cache.clear()
+    server_module.admin_stats_cache.clear()
+    server_module.product_search.version = None
+    yield server_module
+    server_module.catalog_cache.clear()
+
+
+@pytest.fixture
+def client(server):
+    from fastapi.testclient import TestClient
+
+    with TestClient(server.app) as test_client:
+        yield test_client
+
+
+@pytest.fixture
+def auth_headers(server):
+    return {"Authorization": f"Bearer {server.create_jwt_token('test-admin', 'admin')}"}
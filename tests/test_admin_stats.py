@@ -0,0 +1,51 @@
+from datetime import datetime, timedelta, timezone
+
+
+def submission(collection, index, created, status=None):
+    doc = {"id": f"{collection}-{index}", "createdAt": created.isoformat()}
+    if collection == "newsletter":
+        doc["email"] = f"reader{index}@example.com"
+    elif status is not None:
+        doc["status"] = status
+    return doc
+
+
+def test_admin_stats_counts_statuses_and_recent_days(client, server, auth_headers):
+    client.post("/api/seed-data").raise_for_status()
+    now = datetime.now(timezone.utc)
+    orders = [
+        submission("bulk_orders", 0, now, "contacted"),
+        submission("bulk_orders", 1, now),  # no status counts as new
+        submission("bulk_orders", 2, now - timedelta(days=1), "new"),
+        submission("bulk_orders", 3, now - timedelta(days=30), "completed"),
+    ]
+    subscribers = [submission("newsletter", i, now - timedelta(days=age)) for i, age in enumerate((0, 0, 2, 40))]
+    client.portal.call(server.db.bulk_orders.insert_many, orders)
+    client.portal.call(server.db.newsletter.insert_many, subscribers)
+
+    stats = client.get("/api/admin/stats?days=3", headers=auth_headers).json()
+
+    assert stats["counts"] == {
+        "categories": 6, "products": 12, "heroSlides": 3, "testimonials": 6, "giftBoxes": 6,
+        "bulkOrders": 4, "newsletter": 4,
+    }
+    assert stats["bulkOrderStatus"] == {"new": 2, "contacted": 1, "completed": 1}
+    assert [(day["bulkOrders"], day["newsletter"]) for day in stats["submissionsPerDay"]] == [(0, 1), (1, 0), (2, 2)]
+    assert stats["submissionsPerDay"][-1]["date"] == now.date().isoformat()
+
+
+def test_admin_stats_requires_auth(client):
+    assert client.get("/api/admin/stats").status_code in (401, 403)
+
+
+def test_catalog_write_on_another_worker_refreshes_cached_stats(client, server, auth_headers):
+    client.post("/api/seed-data").raise_for_status()
+    assert client.get("/api/admin/stats", headers=auth_headers).json()["counts"]["categories"] == 6
+
+    # Another worker's write: the document appears and the cache bus delivers new versions,
+    # but this worker's admin stats cache is never cleared
+    client.portal.call(server.db.categories.insert_one, {"id": "extra", "name": "Extra", "slug": "extra"})
+    versions = {**server.catalog_cache.versions, "categories": server.catalog_cache.versions["categories"] + 1}
+    server.catalog_cache.adopt(versions, server.catalog_cache.source_epoch)
+
+    assert client.get("/api/admin/stats", headers=auth_headers).json()["counts"]["categories"] == 7
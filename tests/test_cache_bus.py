@@ -0,0 +1,87 @@
+import asyncio
+
+from pymongo.errors import OperationFailure
+
+from cache_bus import CacheInvalidationBus
+from catalog_cache import CatalogCache
+
+COLLECTIONS = ("categories", "products")
+
+
+class StandaloneDatabase:
+    """A database whose collections reject change streams, like a standalone mongod"""
+
+    def __init__(self, db):
+        self._db = db
+
+    def __getattr__(self, name):
+        return StandaloneCollection(getattr(self._db, name))
+
+
+class StandaloneCollection:
+    def __init__(self, collection):
+        self._collection = collection
+
+    def __getattr__(self, name):
+        return getattr(self._collection, name)
+
+    def watch(self, *args, **kwargs):
+        raise OperationFailure("The $changeStream stage is only supported on replica sets", code=40573)
+
+
+async def wait_for(condition, timeout: float = 2.0):
+    deadline = asyncio.get_running_loop().time() + timeout
+    while not condition():
+        assert asyncio.get_running_loop().time() < deadline, "condition not met in time"
+        await asyncio.sleep(0.01)
+
+
+async def follow_writes(writer_db, reader_db, mode: str):
+    writer = CacheInvalidationBus(writer_db, CatalogCache(COLLECTIONS), mode="poll", poll_interval=0.01)
+    reader = CacheInvalidationBus(reader_db, CatalogCache(COLLECTIONS), mode=mode, poll_interval=0.01)
+    await writer.sync()
+    await reader.start()
+    try:
+        reader.cache.put("products:json", reader.cache.snapshot(("products",)), b"[]")
+        await writer.publish("products")
+        await wait_for(lambda: reader.cache.versions["products"] == 1)
+        assert reader.cache.epoch == writer.cache.epoch
+        assert reader.cache.get("products:json", ("products",)) == (False, None)
+        assert reader.cache.versions["categories"] == 0
+    finally:
+        await reader.stop()
+
+
+def test_poll_mode_adopts_versions_published_by_another_worker(server):
+    asyncio.run(follow_writes(server.db, server.db, mode="poll"))
+
+
+def test_changestream_mode_falls_back_to_polling(server, caplog):
+    asyncio.run(follow_writes(server.db, StandaloneDatabase(server.db), mode="changestream"))
+
+    assert "falling back to polling" in caplog.text
+
+
+def test_load_started_before_an_epoch_change_is_not_joined_or_stored():
+    async def scenario():
+        cache = CatalogCache(COLLECTIONS)
+        release = asyncio.Event()
+
+        async def stale_load():
+            await release.wait()
+            return "old epoch"
+
+        async def fresh_load():
+            return "new epoch"
+
+        stale = asyncio.ensure_future(cache.get_or_load("products", ("products",), stale_load))
+        await asyncio.sleep(0)
+        # Another worker reset the counters; the version tuple is unchanged
+        cache.adopt({"products": 0}, "other-epoch")
+        # Joining the old load would wait for release forever
+        assert await asyncio.wait_for(cache.get_or_load("products", ("products",), fresh_load), 1) == "new epoch"
+        release.set()
+        assert await stale == "old epoch"
+        assert cache.get("products", ("products",)) == (True, "new epoch")
+
+    asyncio.run(scenario())
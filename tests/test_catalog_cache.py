@@ -0,0 +1,60 @@
+import asyncio
+
+from catalog_cache import CatalogCache
+
+
+def test_entries_expire_after_the_ttl(monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr("catalog_cache.time.monotonic", lambda: now[0])
+    cache = CatalogCache(["products"], ttl_seconds=10)
+    cache.put("products", cache.snapshot(("products",)), ["p1"])
+
+    now[0] += 9
+    assert cache.get("products", ("products",)) == (True, ["p1"])
+    now[0] += 2
+    assert cache.get("products", ("products",)) == (False, None)
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = CatalogCache(["products"], max_entries=2)
+    versions = cache.snapshot(("products",))
+    cache.put("a", versions, 1)
+    cache.put("b", versions, 2)
+    cache.get("a", ("products",))
+    cache.put("c", versions, 3)
+
+    assert cache.get("b", ("products",)) == (False, None)
+    assert cache.get("a", ("products",)) == (True, 1)
+    assert cache.get("c", ("products",)) == (True, 3)
+    assert cache.evictions == 1
+
+
+def test_bump_makes_entries_stale():
+    cache = CatalogCache(["products", "categories"])
+    cache.put("products", cache.snapshot(("products",)), 1)
+    cache.put("categories", cache.snapshot(("categories",)), 2)
+
+    cache.bump("products")
+
+    assert cache.get("products", ("products",)) == (False, None)
+    assert cache.get("categories", ("categories",)) == (True, 2)
+
+
+def test_hit_and_miss_counters_and_shared_loads():
+    cache = CatalogCache(["products"])
+    loads = []
+
+    async def load():
+        loads.append(1)
+        await asyncio.sleep(0.01)
+        return "value"
+
+    async def scenario():
+        first = await asyncio.gather(*[cache.get_or_load("products", ("products",), load) for _ in range(5)])
+        return first + [await cache.get_or_load("products", ("products",), load)]
+
+    assert asyncio.run(scenario()) == ["value"] * 6
+    assert len(loads) == 1
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["hitRatio"]) == (1, 5, round(1 / 6, 4))
@@ -0,0 +1,31 @@
+class NoDatabase:
+    def __getattr__(self, name):
+        raise AssertionError(f"database read: {name}")
+
+    __getitem__ = __getattr__
+
+
+def test_bump_changes_etag_and_matching_etag_skips_the_database(client, server, monkeypatch):
+    client.post("/api/seed-data").raise_for_status()
+    before = client.get("/api/storefront").headers["etag"]
+
+    client.portal.call(server.mark_catalog_changed, "categories")
+    after = client.get("/api/storefront").headers["etag"]
+    monkeypatch.setattr(server, "db", NoDatabase())
+    revalidated = client.get("/api/storefront", headers={"If-None-Match": after})
+
+    assert after != before
+    assert revalidated.status_code == 304
+    assert revalidated.headers["etag"] == after
+
+
+def test_states_with_equal_version_sums_have_different_etags(server):
+    cache = server.catalog_cache
+    cache.adopt({"categories": 1}, "shared")
+    first = server.catalog_version()
+
+    # The shared counters moved back (e.g. a publish that never reached MongoDB)
+    cache.adopt({"products": 1}, "shared")
+
+    assert server.catalog_version() != first
+    assert cache.source_epoch == "shared"
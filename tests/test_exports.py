@@ -0,0 +1,73 @@
+import csv
+import io
+import json
+
+import pytest
+
+from .test_pagination import bulk_order
+
+
+@pytest.mark.parametrize("value, cell", [
+    ("=1+1", "'=1+1"),
+    ("@SUM(A1:A2)", "'@SUM(A1:A2)"),
+    ("+cmd", "'+cmd"),
+    ("-cmd", "'-cmd"),
+    ("-1+cmd|' /C calc'!A0", "'-1+cmd|' /C calc'!A0"),
+    ("\tdata", "'\tdata"),
+    ("+91 98709 90795", "+91 98709 90795"),
+    ("+1 (555) 010-0000", "+1 (555) 010-0000"),
+    ("-12.5", "-12.5"),
+    ("Almonds", "Almonds"),
+    (None, ""),
+])
+def test_csv_cell_escapes_formulas(server, value, cell):
+    assert server.csv_cell(value) == cell
+
+
+def insert_orders(client, server, *orders):
+    client.portal.call(server.db.bulk_orders.insert_many, [dict(order) for order in orders])
+
+
+def test_csv_export_escapes_formulas_but_not_phone_numbers(client, server, auth_headers):
+    insert_orders(client, server, {**bulk_order(1), "name": "=HYPERLINK(\"http://x\")", "phone": "+919870990795"})
+
+    response = client.get("/api/bulk-orders/export", headers=auth_headers)
+
+    rows = list(csv.DictReader(io.StringIO(response.content.decode("utf-8-sig"))))
+    assert rows[0]["name"] == "'=HYPERLINK(\"http://x\")"
+    assert rows[0]["phone"] == "+919870990795"
+
+
+@pytest.mark.parametrize("params, expected", [
+    ({"until": "2025-01-10"}, ["order-00", "order-01"]),
+    ({"since": "2025-01-10"}, ["order-01", "order-02"]),
+    ({"since": "2025-01-11T00:00:00Z", "until": "2025-01-11"}, ["order-02"]),
+])
+def test_date_bounds(client, server, auth_headers, params, expected):
+    insert_orders(
+        client, server,
+        {**bulk_order(0), "createdAt": "2025-01-09T12:00:00+00:00"},
+        {**bulk_order(1), "createdAt": "2025-01-10T23:59:59.999999+00:00"},
+        {**bulk_order(2), "createdAt": "2025-01-11T00:00:00+00:00"},
+    )
+
+    response = client.get("/api/bulk-orders/export", params={**params, "format": "ndjson"}, headers=auth_headers)
+
+    assert sorted(json.loads(line)["id"] for line in response.text.splitlines()) == expected
+
+
+def test_ndjson_rows_round_trip(client, server, auth_headers):
+    orders = [{**bulk_order(i), "message": "Line one\nline two, \"quoted\" ✓"} for i in range(3)]
+    insert_orders(client, server, *orders)
+
+    response = client.get("/api/bulk-orders/export?format=ndjson", headers=auth_headers)
+
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    assert [json.loads(line) for line in response.text.splitlines()] == sorted(orders, key=lambda o: o["id"], reverse=True)
+
+
+@pytest.mark.parametrize("route", ["bulk-orders", "newsletter"])
+def test_invalid_since_is_rejected(client, auth_headers, route):
+    response = client.get(f"/api/{route}/export", params={"since": "last tuesday"}, headers=auth_headers)
+
+    assert response.status_code == 400
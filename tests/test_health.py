@@ -0,0 +1,36 @@
+import pytest
+
+
+@pytest.fixture(autouse=True)
+def pool_size(server, monkeypatch):
+    # The in-memory client has no real pool options
+    monkeypatch.setattr(server, "max_pool_size", lambda: 100)
+
+
+def test_deep_health_is_ready_under_the_thresholds(client):
+    response = client.get("/api/health/deep")
+
+    assert response.status_code == 200
+    assert response.json()["status"] == "ready"
+
+
+def test_deep_health_answers_503_when_loop_lag_exceeds_the_threshold(client, server, monkeypatch):
+    stats = server.loop_lag_monitor.stats
+    monkeypatch.setattr(server.loop_lag_monitor, "stats", lambda: {**stats(), "recentMs": 250.0})
+    monkeypatch.setattr(server, "HEALTH_MAX_LOOP_LAG_MS", 200.0)
+
+    response = client.get("/api/health/deep")
+
+    assert response.status_code == 503
+    assert response.json()["status"] == "degraded"
+    assert response.json()["failing"] == ["eventLoop"]
+
+
+def test_deep_health_answers_503_when_the_pool_is_saturated(client, server, monkeypatch):
+    stats = server.pool_monitor.stats
+    monkeypatch.setattr(server.pool_monitor, "stats", lambda max_size: {**stats(max_size), "waiting": 50})
+
+    response = client.get("/api/health/deep")
+
+    assert response.status_code == 503
+    assert response.json()["failing"] == ["connectionPool"]
@@ -0,0 +1,79 @@
+import asyncio
+import os
+import time
+
+import pytest
+
+pytest.importorskip("PIL")
+
+import image_derivatives  # noqa: E402
+from image_derivatives import DerivativeCache  # noqa: E402
+
+
+@pytest.fixture
+def source(tmp_path):
+    from PIL import Image
+
+    path = tmp_path / "photo.png"
+    Image.new("RGB", (800, 600), (200, 120, 40)).save(path)
+    return path
+
+
+def test_derivative_written_by_another_worker_is_a_hit(tmp_path, source):
+    root = tmp_path / "derivatives"
+    first, second = DerivativeCache(root), DerivativeCache(root)
+
+    async def run():
+        try:
+            rendered, _ = await first.get(source, 320, "webp")
+            served, media_type = await second.get(source, 320, "webp")
+            return rendered, served, media_type
+        finally:
+            first.shutdown()
+            second.shutdown()
+
+    rendered, served, media_type = asyncio.run(run())
+
+    assert served == rendered and media_type == "image/webp"
+    assert (first.misses, second.hits, second.misses) == (1, 1, 0)
+
+
+def test_cap_is_enforced_over_files_from_every_worker(tmp_path, source):
+    root = tmp_path / "derivatives"
+    root.mkdir()
+    # Older derivatives written by other workers
+    for i in range(5):
+        path = root / f"other-{i}.webp"
+        path.write_bytes(b"x" * 10_000)
+        os.utime(path, (time.time() - 1000 + i, time.time() - 1000 + i))
+    cache = DerivativeCache(root, max_bytes=25_000)
+
+    async def run():
+        try:
+            target, _ = await cache.get(source, 160, "webp")
+            await cache.wait_for_scan()
+            return target
+        finally:
+            cache.shutdown()
+
+    target = asyncio.run(run())
+
+    remaining = sorted(path.name for path in root.iterdir())
+    assert target.name in remaining
+    assert sum(path.stat().st_size for path in root.iterdir()) <= 25_000
+    # Least recently used go first
+    assert "other-0.webp" not in remaining and "other-4.webp" in remaining
+    assert cache.stats()["bytes"] <= 25_000 and cache.evictions >= 3
+
+
+def test_failed_sources_are_bounded_and_expire(monkeypatch):
+    cache = DerivativeCache(None)
+    monkeypatch.setattr(image_derivatives, "MAX_FAILED", 10)
+    for i in range(25):
+        cache._remember_failure(f"broken-{i}.webp")
+
+    assert len(cache._failed) == 10
+    assert cache._has_failed("broken-24.webp") and not cache._has_failed("broken-0.webp")
+
+    monkeypatch.setattr(image_derivatives, "FAILED_TTL", -1)
+    assert not cache._has_failed("broken-24.webp")
@@ -0,0 +1,45 @@
+import json
+
+from .test_import_theme import product, stored
+
+
+def test_import_data_upserts_in_batches_of_the_requested_size(client, server, monkeypatch):
+    client.post("/api/seed-data").raise_for_status()
+    existing = stored(client, server, "products")[:2]
+    categories = stored(client, server, "categories")[:1]
+    body = {
+        "categories": categories,
+        "products": [{**doc, "name": f"{doc['name']} (renamed)"} for doc in existing]
+        + [product(f"new-{i}", f"New {i}") for i in range(3)],
+    }
+    batches = []
+    upsert_batch = server.upsert_batch
+
+    async def recording_upsert_batch(collection, docs):
+        batches.append((collection.name, len(docs)))
+        return await upsert_batch(collection, docs)
+
+    monkeypatch.setattr(server, "upsert_batch", recording_upsert_batch)
+
+    response = client.post(
+        "/api/import-data", params={"batchSize": 2},
+        files={"file": ("data.json", json.dumps(body), "application/json")},
+    )
+
+    assert response.status_code == 200
+    changes = response.json()["changes"]
+    assert changes["products"] == {"added": 3, "updated": 2}
+    assert changes["categories"] == {"added": 0, "updated": 1}
+    assert [size for name, size in batches if name == "products"] == [2, 2, 1]
+    names = {doc["id"]: doc["name"] for doc in stored(client, server, "products")}
+    assert len(names) == 12 + 3
+    assert all(names[doc["id"]].endswith("(renamed)") for doc in existing)
+
+
+def test_import_data_rejects_a_batch_size_out_of_range(client):
+    response = client.post(
+        "/api/import-data", params={"batchSize": 0},
+        files={"file": ("data.json", json.dumps({"categories": [], "products": []}), "application/json")},
+    )
+
+    assert response.status_code == 422
@@ -0,0 +1,44 @@
+import json
+
+
+def product(product_id, name):
+    doc = {
+        "name": name, "slug": name.lower().replace(" ", "-"), "category": "nuts-dry-fruits", "type": "Almonds",
+        "basePrice": 100.0, "image": "https://example.com/a.jpg", "sku": "T1",
+        "shortDescription": "Short", "description": "Long",
+    }
+    if product_id is not None:
+        doc["id"] = product_id
+    return doc
+
+
+def stored(client, server, collection):
+    return client.portal.call(server.db[collection].find({}, {"_id": 0}).to_list, None)
+
+
+def test_import_theme_keeps_last_copy_of_repeated_ids_and_fills_missing_ids(client, server, monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_BATCH_SIZE", 2)
+    client.post("/api/seed-data").raise_for_status()
+    body = {"products": [product("p1", "First"), product(None, "No Id"), product("p1", "First Again"), product("p2", "Second")]}
+
+    response = client.post("/api/import-theme", content=json.dumps(body))
+
+    assert response.status_code == 200
+    products = {doc["name"]: doc for doc in stored(client, server, "products")}
+    assert set(products) == {"First Again", "No Id", "Second"}
+    assert products["No Id"]["id"]
+    assert stored(client, server, "categories")  # sections not in the file are left alone
+
+
+def test_failed_import_theme_leaves_existing_data(client, server, monkeypatch):
+    monkeypatch.setattr(server, "IMPORT_BATCH_SIZE", 1)
+    client.post("/api/seed-data").raise_for_status()
+    before = stored(client, server, "products")
+    truncated = json.dumps({"products": [product("p1", "First"), product("p2", "Second")]})[:-20]
+
+    response = client.post("/api/import-theme", content=truncated)
+
+    assert response.status_code == 400
+    assert stored(client, server, "products") == before
+    names = client.portal.call(server.db.list_collection_names)
+    assert not [name for name in names if "_import_" in name]
@@ -0,0 +1,59 @@
+import json
+
+import pytest
+
+from .test_import_theme import product, stored
+
+INVALID_PRODUCTS = [
+    {**product("bad", "Bad Price"), "basePrice": "free"},
+    {key: value for key, value in product("bad", "No Sku").items() if key != "sku"},
+    "not an object",
+]
+
+
+def import_file(client, body):
+    files = {"file": ("import.json", json.dumps(body).encode(), "application/json")}
+    return client.post("/api/import-data", files=files)
+
+
+@pytest.mark.parametrize("invalid", INVALID_PRODUCTS)
+def test_import_data_rejects_invalid_documents_before_writing(client, server, invalid):
+    client.post("/api/seed-data").raise_for_status()
+    before = stored(client, server, "products")
+
+    response = import_file(client, {"categories": [], "products": [product("ok", "Fine"), invalid]})
+
+    assert response.status_code == 400
+    assert "products[1]" in response.json()["detail"]
+    assert stored(client, server, "products") == before
+
+
+@pytest.mark.parametrize("invalid", INVALID_PRODUCTS)
+def test_import_theme_rejects_invalid_documents(client, server, invalid):
+    client.post("/api/seed-data").raise_for_status()
+    before = stored(client, server, "products")
+
+    response = client.post("/api/import-theme", json={"products": [product("ok", "Fine"), invalid]})
+
+    assert response.status_code == 400
+    assert stored(client, server, "products") == before
+
+
+def test_imported_documents_are_stored_as_the_model_dumps_them(client, server):
+    doc = {**product("p1", "Extra Fields"), "_id": "5f0000000000000000000000", "internal": "secret"}
+
+    response = import_file(client, {"categories": [], "products": [doc], "siteSettings": {"slogan": "New", "junk": 1}})
+
+    assert response.status_code == 200
+    [saved] = stored(client, server, "products")
+    assert "internal" not in saved and saved["features"] == server.Product.model_fields["features"].default
+    settings = client.get("/api/site-settings").json()
+    assert settings["slogan"] == "New" and "junk" not in settings
+    assert client.get("/api/products/p1").json()["name"] == "Extra Fields"
+
+
+def test_import_rejects_invalid_site_settings(client):
+    response = import_file(client, {"categories": [], "products": [], "siteSettings": {"theme": "dark"}})
+
+    assert response.status_code == 400
+    assert "siteSettings" in response.json()["detail"]
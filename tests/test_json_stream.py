@@ -0,0 +1,76 @@
+import json
+import random
+import time
+
+import pytest
+
+from json_stream import ITEM, VALUE, TopLevelParser
+
+DOCUMENT = {
+    "categories": [{"id": "c1", "name": "Nuts {and} [seeds]"}, {"id": "c2", "name": "Quote \" and \\ slash"}],
+    "products": [{"id": f"p{i}", "tags": ["a", "b"], "price": i * 1.5, "note": "ünïcødé ✓"} for i in range(50)],
+    "empty": [],
+    "siteSettings": {"businessName": "DryFruto", "nested": {"list": [1, 2, {"x": None}]}},
+    "count": 12345,
+    "flag": True,
+}
+
+
+def expected_events(document):
+    for key, value in document.items():
+        if isinstance(value, list):
+            yield from ((ITEM, key, item) for item in value)
+        else:
+            yield VALUE, key, value
+
+
+def parse_in_chunks(data: bytes, sizes):
+    parser = TopLevelParser()
+    events, start = [], 0
+    while start < len(data):
+        size = next(sizes)
+        events += parser.feed(data[start:start + size])
+        start += size
+    return events + parser.close()
+
+
+@pytest.mark.parametrize("chunk", [1, 2, 7, 64, 100000])
+def test_events_do_not_depend_on_chunk_boundaries(chunk):
+    data = json.dumps(DOCUMENT, ensure_ascii=False, indent=2).encode()
+
+    assert parse_in_chunks(data, iter(lambda: chunk, None)) == list(expected_events(DOCUMENT))
+
+
+def test_random_chunk_boundaries():
+    data = json.dumps(DOCUMENT, ensure_ascii=False).encode()
+    rng = random.Random(3)
+
+    for _ in range(20):
+        assert parse_in_chunks(data, iter(lambda: rng.randint(1, 40), None)) == list(expected_events(DOCUMENT))
+
+
+def test_large_element_in_small_chunks_is_linear():
+    element = {"id": "big", "description": "x" * 8_000_000, "items": [{"k": "v\\"}] * 20000}
+    data = json.dumps({"products": [element]}).encode()
+
+    started = time.perf_counter()
+    events = parse_in_chunks(data, iter(lambda: 2048, None))
+
+    assert events == [(ITEM, "products", element)]
+    # Re-parsing the buffered element per chunk took about 30 seconds here
+    assert time.perf_counter() - started < 5
+
+
+@pytest.mark.parametrize("data", [b'{"products": [{"id": 1}', b'{"products": [{"id": 1}}', b'{"count": 12', b'{"a": tru'])
+def test_incomplete_or_malformed_documents_raise(data):
+    parser = TopLevelParser()
+    with pytest.raises(json.JSONDecodeError):
+        parser.feed(data)
+        parser.close()
+
+
+@pytest.mark.parametrize("settings", [["not", "an", "object"], "text", 42])
+def test_import_theme_rejects_non_object_site_settings(client, settings):
+    response = client.post("/api/import-theme", json={"siteSettings": settings})
+
+    assert response.status_code == 400
@@ -0,0 +1,18 @@
+def request_count(text, **labels):
+    prefix = "dryfruto_http_requests_total{" + ",".join(f'{key}="{value}"' for key, value in labels.items()) + "} "
+    return sum(int(line[len(prefix):]) for line in text.splitlines() if line.startswith(prefix))
+
+
+def test_requests_are_labelled_by_route_template(client):
+    before = client.get("/api/metrics").text
+    for product_id in ("missing-1", "missing-2", "missing-3"):
+        assert client.get(f"/api/products/{product_id}").status_code == 404
+    client.get("/api/no-such-route-42")
+
+    text = client.get("/api/metrics").text
+
+    labels = {"method": "GET", "route": "/api/products/{product_id}", "status": "404"}
+    assert request_count(text, **labels) == request_count(before, **labels) + 3
+    assert "missing-1" not in text and "no-such-route-42" not in text
+    assert request_count(text, method="GET", route="unmatched", status="404") >= 1
+    assert 'dryfruto_http_request_duration_seconds_count{method="GET",route="/api/products/{product_id}"}' in text
@@ -0,0 +1,40 @@
+from concurrent.futures import ThreadPoolExecutor
+
+from indexes import ensure_indexes
+
+SPELLINGS = ["reader@example.com", "READER@EXAMPLE.COM", "  reader@example.com ", "Reader@Example.com"]
+
+
+def subscribers(client, server):
+    return client.portal.call(server.db.newsletter.find({}, {"_id": 0}).to_list, None)
+
+
+def test_concurrent_subscribes_store_one_document(client, server):
+    with ThreadPoolExecutor(max_workers=16) as pool:
+        responses = list(pool.map(
+            lambda i: client.post("/api/newsletter", json={"email": SPELLINGS[i % len(SPELLINGS)]}).json(), range(64)
+        ))
+
+    assert sum("id" in response for response in responses) == 1
+    assert [doc["email"] for doc in subscribers(client, server)] == ["reader@example.com"]
+
+
+def test_ensure_indexes_normalizes_and_dedupes_stored_emails(client, server):
+    collection = server.db.newsletter
+    client.portal.call(collection.drop)
+    rows = [
+        {"id": "old", "email": "Reader@Example.com", "createdAt": "2024-01-01T00:00:00+00:00"},
+        {"id": "dup", "email": " READER@example.com", "createdAt": "2024-02-01T00:00:00+00:00"},
+        {"id": "twin", "email": "other@example.com", "createdAt": "2024-03-01T00:00:00+00:00"},
+        {"id": "twin-later", "email": "other@example.com", "createdAt": "2024-04-01T00:00:00+00:00"},
+        {"id": "clean", "email": "third@example.com", "createdAt": "2024-05-01T00:00:00+00:00"},
+    ]
+    client.portal.call(collection.insert_many, rows)
+
+    assert client.portal.call(ensure_indexes, server.db) == []
+
+    assert {doc["email"]: doc["id"] for doc in subscribers(client, server)} == {
+        "reader@example.com": "old", "other@example.com": "twin", "third@example.com": "clean",
+    }
+    response = client.post("/api/newsletter", json={"email": "READER@example.com"}).json()
+    assert response["exists"] is True
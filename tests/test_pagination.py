@@ -0,0 +1,74 @@
+import base64
+import json
+
+import pytest
+
+STATUSES = ["new", "contacted", "completed"]
+
+
+def bulk_order(i):
+    # Five rows share each createdAt, so pages split ties on id
+    return {
+        "id": f"order-{i:02d}", "name": f"Buyer {i}", "company": "Acme Foods" if i % 2 else "Nutty Co",
+        "email": f"buyer{i}@example.com", "phone": "9870990795", "productType": "Almonds", "quantity": "10kg",
+        "createdAt": f"2025-01-{1 + i // 5:02d}T10:00:00+00:00", "status": STATUSES[i % 3],
+    }
+
+
+def subscriber(i):
+    return {"id": f"sub-{i:02d}", "email": f"reader{i}@{'gmail' if i % 2 else 'example'}.com",
+            "createdAt": f"2025-02-{1 + i // 4:02d}T08:00:00+00:00"}
+
+
+@pytest.fixture
+def submissions(client, server):
+    orders = [bulk_order(i) for i in range(23)]
+    subscribers = [subscriber(i) for i in range(17)]
+    client.portal.call(server.db.bulk_orders.insert_many, [dict(doc) for doc in orders])
+    client.portal.call(server.db.newsletter.insert_many, [dict(doc) for doc in subscribers])
+    return {"bulk-orders": orders, "newsletter": subscribers}
+
+
+def newest_first(docs):
+    return sorted(docs, key=lambda doc: (doc["createdAt"], doc["id"]), reverse=True)
+
+
+def all_pages(client, path, params):
+    items, cursor, pages = [], None, 0
+    while True:
+        page = client.get(path, params={**params, **({"cursor": cursor} if cursor else {})}).json()
+        items += page["items"]
+        pages += 1
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return items, pages
+
+
+@pytest.mark.parametrize("route, params, keep", [
+    ("bulk-orders", {}, lambda doc: True),
+    ("bulk-orders", {"status": "contacted"}, lambda doc: doc["status"] == "contacted"),
+    ("bulk-orders", {"search": "ACME"}, lambda doc: doc["company"] == "Acme Foods"),
+    ("bulk-orders", {"status": "completed", "search": "nutty"}, lambda doc: doc["status"] == "completed" and doc["company"] == "Nutty Co"),
+    ("newsletter", {}, lambda doc: True),
+    ("newsletter", {"search": "gmail"}, lambda doc: "gmail" in doc["email"]),
+])
+def test_pages_have_no_duplicates_or_gaps(client, submissions, route, params, keep):
+    expected = [doc["id"] for doc in newest_first(submissions[route]) if keep(doc)]
+
+    items, pages = all_pages(client, f"/api/{route}", {**params, "limit": 3})
+
+    assert [item["id"] for item in items] == expected
+    assert pages == max(1, -(-len(expected) // 3))
+
+
+def encoded(value) -> str:
+    return base64.urlsafe_b64encode(json.dumps(value).encode()).decode()
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!", encoded({"createdAt": "2025"}), encoded(["2025-01-01"]),
+    encoded([{"$gt": ""}, "x"]), base64.urlsafe_b64encode(b"\xff\xfe").decode(),
+])
+def test_tampered_cursor_is_rejected(client, submissions, cursor):
+    assert client.get("/api/bulk-orders", params={"cursor": cursor}).status_code == 400
+    assert client.get("/api/newsletter", params={"cursor": cursor}).status_code == 400
@@ -0,0 +1,47 @@
+from collections import Counter
+
+import pytest
+
+from .test_pagination import all_pages
+from .test_storefront import insert_products
+
+SORT_KEYS = {
+    "name": (lambda p: (p["name"], p["id"]), False),
+    "price-low": (lambda p: (p["basePrice"], p["id"]), False),
+    "price-high": (lambda p: (p["basePrice"], p["id"]), True),
+}
+
+
+@pytest.fixture
+def products(client, server):
+    insert_products(client, server, 200)
+    return client.portal.call(server.db.products.find({}, {"_id": 0}).to_list, None)
+
+
+@pytest.mark.parametrize("sort", list(SORT_KEYS))
+def test_filtered_sorted_pages_match_a_brute_force_sort(client, products, sort):
+    category = Counter(p["category"] for p in products).most_common(1)[0][0]
+    low, high = 200, 900
+    key, reverse = SORT_KEYS[sort]
+    expected = sorted(
+        (p for p in products if p["category"] == category and low <= p["basePrice"] <= high), key=key, reverse=reverse
+    )
+    assert len(expected) > 7
+
+    items, _ = all_pages(client, "/api/products", {
+        "category": category, "minPrice": low, "maxPrice": high, "sort": sort, "limit": 7,
+    })
+
+    assert [item["id"] for item in items] == [p["id"] for p in expected]
+
+
+def test_type_filter_with_default_sort_returns_every_match_once(client, products):
+    product_type = Counter(p["type"] for p in products).most_common(1)[0][0]
+
+    items, _ = all_pages(client, "/api/products", {"type": product_type, "limit": 5})
+
+    assert sorted(item["id"] for item in items) == sorted(p["id"] for p in products if p["type"] == product_type)
+
+
+def test_unknown_sort_is_rejected(client):
+    assert client.get("/api/products", params={"sort": "random"}).status_code == 400
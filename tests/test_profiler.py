@@ -0,0 +1,15 @@
+from .test_storefront import insert_products
+
+
+def test_profile_counts_cpu_of_streamed_response_body(client, server, auth_headers, monkeypatch):
+    monkeypatch.setattr(server.profiler, "interval", 0.001)
+    insert_products(client, server, 1000)
+
+    response = client.get("/api/export-data", headers={**auth_headers, "X-Profile": "1", "Accept-Encoding": "identity"})
+
+    assert response.status_code == 200
+    profile = server.profiler.get(response.headers["x-profile-id"])
+    assert profile.samples > 0
+    assert profile.summary()["cpuMs"] > 0
+    # The body is serialized in an anyio child task, not under the middleware frame
+    assert any("iter_json_object" in stack for stack in profile.stacks)
@@ -0,0 +1,21 @@
+def test_search_matches_product_type(client, server):
+    client.post("/api/seed-data").raise_for_status()
+    client.post("/api/import-theme", json={"products": [{
+        "id": "combo-1", "name": "Festive Hamper", "slug": "festive-hamper", "category": "gift-boxes",
+        "type": "Combo Pack", "basePrice": 999.0, "image": "https://example.com/h.jpg", "sku": "C1",
+        "shortDescription": "Assorted", "description": "Assorted dry fruits",
+    }]}).raise_for_status()
+
+    results = client.get("/api/search", params={"q": "combo"}).json()["items"]
+
+    assert [item["id"] for item in results] == ["combo-1"]
+
+
+def test_search_index_follows_product_writes(client, server, auth_headers):
+    client.post("/api/seed-data").raise_for_status()
+    assert client.get("/api/search", params={"q": "almonds"}).json()["items"]
+
+    client.delete("/api/products/prod-almonds", headers=auth_headers).raise_for_status()
+
+    ids = [item["id"] for item in client.get("/api/search", params={"q": "almonds"}).json()["items"]]
+    assert "prod-almonds" not in ids
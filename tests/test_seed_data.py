@@ -0,0 +1,33 @@
+import asyncio
+
+from cache_bus import VERSION_DOC_ID
+from seed_data import CATALOG_OUTPUT, publish_catalog_change
+
+
+def test_publish_catalog_change_creates_and_bumps_version_document(server):
+    async def publish_twice():
+        await publish_catalog_change(server.db)
+        first = await server.db.cache_versions.find_one({"id": VERSION_DOC_ID})
+        await publish_catalog_change(server.db)
+        return first, await server.db.cache_versions.find_one({"id": VERSION_DOC_ID})
+
+    first, second = asyncio.run(publish_twice())
+
+    assert first["epoch"] and second["epoch"] == first["epoch"]
+    assert second["versions"] == {name: 2 for name in CATALOG_OUTPUT}
+
+
+def test_generated_rows_that_clash_with_real_subscribers_are_skipped(client, server, auth_headers, caplog):
+    from seed_data import generate
+
+    clash = next(generate(0.01, seed=5)["newsletter"])["email"]
+    real = {"id": "real-subscriber", "email": clash, "createdAt": "2024-01-01T00:00:00+00:00"}
+    client.portal.call(server.db.newsletter.insert_one, dict(real))
+
+    response = client.post("/api/seed-data", params={"scale": 0.01, "seed": 5}, headers=auth_headers)
+
+    assert response.status_code == 200
+    rows = client.portal.call(server.db.newsletter.find({}, {"_id": 0}).to_list, None)
+    assert len(rows) == response.json()["newsletter"] + 1
+    assert [row for row in rows if row["email"] == clash] == [real]
+    assert "Skipped 1 generated newsletter rows" in caplog.text
@@ -0,0 +1,25 @@
+def insert_products(client, server, count):
+    from seed_data import generate_products
+
+    client.post("/api/seed-data").raise_for_status()
+    client.portal.call(server.db.products.insert_many, list(generate_products(count, seed=1)))
+    client.portal.call(server.mark_catalog_changed, "products")
+
+
+def test_storefront_flags_truncated_catalog(client, server, monkeypatch):
+    monkeypatch.setattr(server, "STOREFRONT_PRODUCT_LIMIT", 20)
+    insert_products(client, server, 30)
+
+    payload = client.get("/api/storefront").json()
+
+    assert len(payload["products"]) == 20
+    assert payload["productsTruncated"] is True
+
+
+def test_storefront_complete_catalog_is_not_truncated(client, server):
+    client.post("/api/seed-data").raise_for_status()
+
+    payload = client.get("/api/storefront").json()
+
+    assert len(payload["products"]) == 12
+    assert payload["productsTruncated"] is False
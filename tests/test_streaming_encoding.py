@@ -0,0 +1,18 @@
+import pytest
+
+
+@pytest.mark.parametrize("accept, expected", [
+    ("gzip", "gzip"),
+    ("gzip;q=0", None),
+    ("identity", None),
+    ("br, gzip", "br"),
+    ("br;q=0, gzip", "gzip"),
+])
+def test_export_negotiates_content_encoding(client, accept, expected):
+    client.post("/api/seed-data").raise_for_status()
+
+    response = client.get("/api/export-data", headers={"Accept-Encoding": accept})
+
+    assert response.status_code == 200
+    assert response.headers.get("content-encoding") == expected
+    assert len(response.json()["products"]) == 12
@@ -0,0 +1,128 @@
+import hashlib
+import os
+
+import pytest
+
+import upload_store
+
+BODY = bytes(range(100))
+
+
+@pytest.fixture
+def uploads(server):
+    server.UPLOAD_DIR.mkdir(parents=True, exist_ok=True)
+    return server.UPLOAD_DIR
+
+
+@pytest.fixture
+def stored_image(uploads):
+    name = f"{hashlib.sha256(BODY).hexdigest()}.png"
+    (uploads / name).write_bytes(BODY)
+    return name
+
+
+def test_content_addressed_upload_is_immutable_with_a_strong_etag(client, stored_image):
+    response = client.get(f"/api/uploads/{stored_image}")
+
+    assert response.status_code == 200
+    assert response.content == BODY
+    assert response.headers["etag"] == f'"{stored_image.split(".")[0]}"'
+    assert "immutable" in response.headers["cache-control"]
+
+
+def test_revalidation_gets_304(client, stored_image):
+    first = client.get(f"/api/uploads/{stored_image}")
+
+    by_etag = client.get(f"/api/uploads/{stored_image}", headers={"If-None-Match": first.headers["etag"]})
+    by_date = client.get(f"/api/uploads/{stored_image}", headers={"If-Modified-Since": first.headers["last-modified"]})
+
+    assert (by_etag.status_code, by_etag.content) == (304, b"")
+    assert (by_date.status_code, by_date.content) == (304, b"")
+
+
+@pytest.mark.parametrize("header, content_range, body", [
+    ("bytes=0-9", "bytes 0-9/100", BODY[:10]),
+    ("bytes=95-", "bytes 95-99/100", BODY[95:]),
+    ("bytes=-5", "bytes 95-99/100", BODY[-5:]),
+])
+def test_byte_ranges(client, stored_image, header, content_range, body):
+    response = client.get(f"/api/uploads/{stored_image}", headers={"Range": header})
+
+    assert response.status_code == 206
+    assert response.headers["content-range"] == content_range
+    assert response.content == body
+
+
+def test_unsatisfiable_range_gets_416(client, stored_image):
+    response = client.get(f"/api/uploads/{stored_image}", headers={"Range": "bytes=500-"})
+
+    assert response.status_code == 416
+    assert response.headers["content-range"] == "bytes */100"
+
+
+def test_stale_if_range_sends_the_whole_file(client, stored_image):
+    response = client.get(f"/api/uploads/{stored_image}", headers={"Range": "bytes=0-9", "If-Range": '"stale"'})
+
+    assert response.status_code == 200
+    assert response.content == BODY
+
+
+def test_hot_cache_is_keyed_on_modification_time(client, server, uploads):
+    path = uploads / "banner.png"
+    path.write_bytes(BODY)
+    client.get("/api/uploads/banner.png")
+    hits = server.hot_file_cache.hits
+
+    assert client.get("/api/uploads/banner.png").content == BODY
+    assert server.hot_file_cache.hits == hits + 1
+
+    path.write_bytes(BODY[::-1])
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    response = client.get("/api/uploads/banner.png")
+
+    assert response.content == BODY[::-1]
+    assert "immutable" not in response.headers["cache-control"]
+
+
+def multipart(field, data, filename="photo.png", content_type="image/png", boundary="testboundary"):
+    return (
+        f"--{boundary}\r\nContent-Disposition: form-data; name=\"{field}\"; filename=\"{filename}\"\r\n"
+        f"Content-Type: {content_type}\r\n\r\n"
+    ).encode() + data + f"\r\n--{boundary}--\r\n".encode()
+
+
+def upload(client, body, boundary="testboundary"):
+    def chunks():
+        # A generator body is sent chunked, without Content-Length
+        for start in range(0, len(body), 4096):
+            yield body[start:start + 4096]
+
+    return client.post("/api/upload", content=chunks(), headers={"Content-Type": f"multipart/form-data; boundary={boundary}"})
+
+
+def test_identical_uploads_share_one_content_addressed_file(client, server, uploads):
+    first = upload(client, multipart("file", BODY)).json()
+    second = upload(client, multipart("file", BODY, filename="copy.png")).json()
+
+    assert first["filename"] == second["filename"] == f"{hashlib.sha256(BODY).hexdigest()}.png"
+    assert [path.name for path in uploads.iterdir()] == [first["filename"]]
+
+
+def test_upload_over_the_limit_without_content_length_gets_413(client, server, uploads, monkeypatch):
+    monkeypatch.setattr(server, "UPLOAD_MAX_BYTES", 64 * 1024)
+    # Small blocks, so part of the file is already in a temp file when the limit is crossed
+    monkeypatch.setattr(upload_store, "WRITE_BLOCK_SIZE", 8 * 1024)
+    body = multipart("file", b"x" * (64 * 1024 + 1))
+
+    response = upload(client, body)
+
+    assert response.status_code == 413
+    assert list(uploads.iterdir()) == []
+
+
+def test_upload_with_the_wrong_field_name_gets_400(client, uploads):
+    response = upload(client, multipart("image", BODY))
+
+    assert response.status_code == 400
+    assert list(uploads.iterdir()) == []
@@ -0,0 +1,97 @@
+import asyncio
+import json
+
+from write_behind import WriteBehindQueue
+
+from .test_cache_bus import wait_for
+
+
+def order(i):
+    return {"id": f"order-{i}", "name": f"Customer {i}"}
+
+
+async def count(db, collection="bulk_orders"):
+    return await db[collection].count_documents({})
+
+
+async def with_queue(db, directory, scenario, **options):
+    await db.bulk_orders.create_index("id", unique=True)
+    queue = WriteBehindQueue(db, directory, enabled=True, **options)
+    await queue.start()
+    try:
+        return await scenario(queue)
+    finally:
+        await queue.drain()
+
+
+def test_batch_size_triggers_a_flush(server, tmp_path):
+    async def scenario(queue):
+        await asyncio.gather(*[queue.submit("bulk_orders", order(i)) for i in range(3)])
+        await wait_for(lambda: queue.written == 3)
+        assert await count(server.db) == 3
+
+    asyncio.run(with_queue(server.db, tmp_path, scenario, batch_size=3, flush_interval=60))
+
+
+def test_flush_interval_writes_a_partial_batch(server, tmp_path):
+    async def scenario(queue):
+        await queue.submit("bulk_orders", order(1))
+        await wait_for(lambda: queue.written == 1)
+
+    asyncio.run(with_queue(server.db, tmp_path, scenario, batch_size=100, flush_interval=0.05))
+
+
+def test_drain_writes_everything_still_queued(server, tmp_path):
+    async def scenario(queue):
+        for i in range(5):
+            await queue.submit("bulk_orders", order(i))
+        assert queue.pending == 5 and await count(server.db) == 0
+
+    asyncio.run(with_queue(server.db, tmp_path, scenario, batch_size=100, flush_interval=60))
+
+    assert asyncio.run(count(server.db)) == 5
+    assert not list(tmp_path.glob("spill-*.ndjson"))
+
+
+def test_acknowledged_submission_is_on_disk(server, tmp_path):
+    async def scenario(queue):
+        await queue.submit("bulk_orders", order(1))
+        lines = queue._active.path.read_bytes().splitlines()
+        assert [json.loads(line)["d"] for line in lines] == [order(1)]
+
+    asyncio.run(with_queue(server.db, tmp_path, scenario, batch_size=100, flush_interval=60))
+
+
+def test_leftover_spill_file_is_replayed_once_despite_duplicates(server, tmp_path):
+    spill = tmp_path / "spill-1-dead.ndjson"
+    spill.write_text("".join(json.dumps({"c": "bulk_orders", "d": order(i)}) + "\n" for i in range(4)) + '{"c": "bulk')
+    asyncio.run(server.db.bulk_orders.insert_one(order(1)))  # written before the crash
+
+    async def scenario(queue):
+        await wait_for(lambda: queue.pending == 0)
+        assert queue.duplicates == 1
+        return await server.db.bulk_orders.find({}, {"_id": 0, "id": 1}).to_list(None)
+
+    docs = asyncio.run(with_queue(server.db, tmp_path, scenario, flush_interval=60))
+
+    assert sorted(doc["id"] for doc in docs) == [f"order-{i}" for i in range(4)]
+    assert not spill.exists()
+    # A second restart has nothing left to replay
+    asyncio.run(with_queue(server.db, tmp_path, lambda queue: asyncio.sleep(0), flush_interval=60))
+    assert asyncio.run(count(server.db)) == 4
+
+
+def test_spill_file_locked_by_a_live_worker_is_not_adopted(server, tmp_path):
+    async def scenario(owner):
+        await owner.submit("bulk_orders", order(1))
+        other = WriteBehindQueue(server.db, tmp_path, enabled=True, flush_interval=60)
+        await other.start()
+        try:
+            assert other.pending == 0
+        finally:
+            await other.drain()
+        assert await count(server.db) == 0 and owner.pending == 1
+
+    asyncio.run(with_queue(server.db, tmp_path, scenario, flush_interval=60))
+
+    assert asyncio.run(count(server.db)) == 1